@@ -1,71 +1,47 @@
-import numpy as np
 import math
 import pygame
 import sys
 
+from boards import Connect4Board, GRID_ROWS as ROW_COUNT, GRID_COLS as COLUMN_COUNT
+
 BLUE = (0,0,200) # global variable fixing for the color
 BLACK = (0,0,0)
 RED = (255,0,0)
 YELLOW = (255,255,0)
 
-ROW_COUNT = 6
-COLUMN_COUNT = 7
 EVEN = 0
 ODD = 1
 
+# Pieces 1 and 2 are stored as 'R' and 'Y' on the shared board
+PIECES = {1: 'R', 2: 'Y'}
+
 def create_board():
-    board = np.zeros((ROW_COUNT,COLUMN_COUNT))
-    return board
+    return Connect4Board()
 
-def drop_piece(board,row,col,piece):
-    board[row][col] = piece
+def drop_piece(board,col,piece):
+    board.make_move(col, PIECES[piece])
 
 def is_valid_location(board,col):
-    return board[ROW_COUNT-1][col] == 0
-
-def get_next_open_rows(board,col):
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
+    return board.is_valid_move(col)
 
 def print_board(board):
-    print(np.flip(board, 0))
+    board.display_board()
 
 def winning_move(board,piece):
-    # check horizontal locations for win
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT):
-            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3]:
-                return True
-
-    # check vertical locations for win
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT - 3):
-            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c]:
-                return True
-
-    # check diagonals win from down to top
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT-3):
-            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3]:
-                return True
-    # check diagonals win from top to down
-    for c in range(COLUMN_COUNT-3):
-        for r in range(3,ROW_COUNT):
-            if board[r][c] == piece and board[r-1][c] == piece and board[r-2][c+3] == piece and board[r-3][c+3]:
-                return True
+    return board.check_winner(PIECES[piece])
 ### definimg the function for the pygame graphics
 def draw_board(board):
     for c in range(COLUMN_COUNT):
         for r in range(ROW_COUNT):
             pygame.draw.rect(screen, BLUE, (c*SQUARESIZE, r*SQUARESIZE+SQUARESIZE, SQUARESIZE, SQUARESIZE))
             pygame.draw.circle(screen,BLACK,(int(c*SQUARESIZE+SQUARESIZE/2),int(r*SQUARESIZE + SQUARESIZE + SQUARESIZE/2)), RADIUS)
+    grid = board.grid
     for c in range(COLUMN_COUNT):
         for r in range(ROW_COUNT):
-            if board[r][c] == 1:
-                (pygame.draw.circle(screen, RED, (int(c * SQUARESIZE + SQUARESIZE / 2), height - int(r * SQUARESIZE  + SQUARESIZE / 2)), RADIUS))
-            elif board[r][c] == 2:
-                pygame.draw.circle(screen, YELLOW, (int(c * SQUARESIZE + SQUARESIZE / 2), height - int(r * SQUARESIZE  + SQUARESIZE / 2)), RADIUS)
+            if grid[r][c] == 'R':
+                (pygame.draw.circle(screen, RED, (int(c * SQUARESIZE + SQUARESIZE / 2), int((r + 1) * SQUARESIZE  + SQUARESIZE / 2)), RADIUS))
+            elif grid[r][c] == 'Y':
+                pygame.draw.circle(screen, YELLOW, (int(c * SQUARESIZE + SQUARESIZE / 2), int((r + 1) * SQUARESIZE  + SQUARESIZE / 2)), RADIUS)
                 pygame.display.update()
 board = create_board()
 print_board(board)
@@ -108,8 +84,7 @@ while not game_over:
                 col = int(math.floor(posx/SQUARESIZE))
                 #col = int(input("Player 1 make your selection (0-6):"))
                 if is_valid_location(board,col):
-                    row = get_next_open_rows(board, col)
-                    drop_piece(board, row, col, 1)
+                    drop_piece(board, col, 1)
 
                     if winning_move(board, 1):
                         label = myfont.render("Player 1 wins!!", 1, RED)
@@ -123,8 +98,7 @@ while not game_over:
                 col = int(math.floor(posx / SQUARESIZE))
                 # col = int(input("Player 2 make your selection (0-6):"))
                 if is_valid_location(board,col):
-                    row = get_next_open_rows(board, col)
-                    drop_piece(board, row, col, 2)
+                    drop_piece(board, col, 2)
 
                     if winning_move(board, 2):
                         label = myfont.render("Player 2 wins!!", 1, YELLOW)
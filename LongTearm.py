@@ -1,126 +1,526 @@
 import pygame
 import sys
 import time
+import random
+import threading
+
+from animation import BoardView, ANIMATING_FPS
+from boards import Connect4Board, WindowBoard, GRID_COLS
+from idle import IdleWaiter
+from proofsearch import ProofSearch, UNKNOWN
 
 # Constants for the GUI
 SCREEN_WIDTH = 700
 SCREEN_HEIGHT = 600
 CELL_SIZE = 100
-GRID_ROWS = 6
-GRID_COLS = 7
 DISC_RADIUS = CELL_SIZE // 2 - 5
 
-class Connect4Board:
-    def __init__(self):
-        self.grid = [[' ' for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
-
-    def display_board(self):
-        for row in self.grid:
-            print('|'.join(row))
-            print('-' * (GRID_COLS * 2 - 1))
-
-    def is_valid_move(self, col):
-        return 0 <= col < GRID_COLS and self.grid[0][col] == ' '
-
-    def make_move(self, col, player):
-        for row in range(GRID_ROWS - 1, -1, -1):
-            if self.grid[row][col] == ' ':
-                self.grid[row][col] = player
-                return True
-        return False  # Column is full
-
-    def check_winner(self, player):
-        # Check horizontally
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row][col + i] == player for i in range(4)):
-                    return True
-
-        # Check vertically
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS):
-                if all(self.grid[row + i][col] == player for i in range(4)):
-                    return True
+class SearchAborted(Exception):
+    pass
 
-        # Check diagonally (down-right)
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row + i][col + i] == player for i in range(4)):
-                    return True
 
-        # Check diagonally (up-right)
-        for row in range(3, GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row - i][col + i] == player for i in range(4)):
-                    return True
+# Replies searched first while pondering, centre columns are the likeliest
+PONDER_ORDER = (3, 2, 4, 1, 5, 0, 6)
 
-        return False
+# Transposition table bound types
+EXACT, LOWER, UPPER = 0, 1, 2
 
-    def is_full(self):
-        return all(self.grid[0][col] != ' ' for col in range(GRID_COLS))
+# Score of a won position when an evaluator or the heuristic scores the others
+WIN_SCORE = 1000
 
 
 class LongTermAgent:
-    def __init__(self, player):
+    def __init__(self, player, depth=3, keep_state=True, table_size=1 << 20, cache=None, evaluator=None,
+                 search='pvs', heuristic=False, proof_nodes=None):
         self.player = player
+        self.opponent = 'R' if player == 'Y' else 'Y'
+        self.depth = depth
+
+        # Search limits, set by the engine; the GUI leaves them unlimited
+        self.nodes = 0
+        self.max_nodes = None
+        self.deadline = None
+        self.stop_event = threading.Event()
+
+        # Best replies found while the opponent was thinking, keyed by position
+        self.ponder_thread = None
+        self.ponder_results = {}
+        self.ponder_hits = 0
+
+        # Search state kept from one move to the next; keep_state=False starts every move from scratch
+        self.keep_state = keep_state
+        self.table_size = table_size
+        self.table = {}  # key -> (depth, value, flag, best_move, generation)
+        self.generation = 0
+        self.history = {'R': [0] * GRID_COLS, 'Y': [0] * GRID_COLS}
+        self.pv = []
+
+        # Optional poscache.PositionCache shared with other runs and processes
+        self.cache = cache
+
+        # Optional learned evaluator (ntuple.NTupleEvaluator) for positions the search cannot finish;
+        # wins then score WIN_SCORE so they always outrank its values
+        self.evaluator = evaluator
+        # heuristic=True scores the others by the board's window counts instead,
+        # searching on a WindowBoard where that is a lookup
+        self.heuristic = heuristic
+        self.win_score = 1 if evaluator is None and not heuristic else WIN_SCORE
+
+        # 'pvs' is negamax principal variation search; 'minimax' is the original search, kept for comparison
+        self.search = search
+
+        # Cached results are only shared with agents that would score positions the same way
+        if evaluator is not None:
+            self.cache_config = f'{search}:ntuple:{evaluator.fingerprint()}'
+        elif heuristic:
+            self.cache_config = f'{search}:heuristic'
+        else:
+            self.cache_config = search
+        self.aspiration = max(1, self.win_score // 20)  # Half-width of the window around a previous score
+
+        # With proof_nodes, every move first tries a proof-number search of that many nodes
+        # for a forced win or loss, and plays its line without searching when it finds one
+        self.proof_nodes = proof_nodes
+        self.prover = ProofSearch() if proof_nodes else None
+        self.proofs = 0
 
     def make_move(self, board):
-        _, move = self.minimax(board, 3, True, float('-inf'), float('inf'))
+        self.stop_pondering()
+        self.new_search()
+        move = self.ponder_results.get(board.key())
+        self.ponder_results.clear()
+        if move is not None:
+            self.ponder_hits += 1
+            return move
+        proved = self.proved_move(board)
+        if proved is not None:
+            return proved
+        _, move = self.cached_search(self.search_board(board), self.depth)
         return move
 
+    def proved_move(self, board):
+        # First move of a proved win, or of the longest defence of a proved loss
+        if self.prover is None:
+            return None
+        result, line = self.prover.prove(board, self.player, max_nodes=self.proof_nodes, deadline=self.deadline)
+        self.nodes += self.prover.nodes
+        if result == UNKNOWN or not line:
+            return None
+        self.proofs += 1
+        return line[0]
+
+    def search_board(self, board):
+        if self.heuristic and not isinstance(board, WindowBoard):
+            return WindowBoard.from_board(board)
+        return board
+
+    def cached_search(self, board, depth):
+        if self.cache is not None:
+            hit = self.cache.lookup(board.key(), self.cache_config, depth)
+            if hit is not None:
+                return hit
+        eval, move = self.search_root(board, depth)
+        if self.cache is not None:
+            self.cache.store(board.key(), self.cache_config, depth, eval, move)
+        return eval, move
+
+    def new_search(self):
+        if not self.keep_state:
+            self.table.clear()
+            self.history = {'R': [0] * GRID_COLS, 'Y': [0] * GRID_COLS}
+            self.pv = []
+            return
+        # Entries from older searches stay usable until they are two generations old
+        self.generation += 1
+        if len(self.table) > self.table_size * 3 // 4:
+            self.age_table()
+        for scores in self.history.values():
+            for col in range(GRID_COLS):
+                scores[col] //= 2
+
+    def age_table(self):
+        stale = [key for key, entry in self.table.items() if entry[4] < self.generation - 1]
+        for key in stale:
+            del self.table[key]
+
+    def store(self, key, depth, value, flag, best_move):
+        entry = self.table.get(key)
+        if entry is None:
+            if len(self.table) >= self.table_size:
+                self.age_table()
+                if len(self.table) >= self.table_size:
+                    return
+        elif entry[4] == self.generation and entry[0] > depth:
+            return  # Keep the deeper result of this search
+        self.table[key] = (depth, value, flag, best_move, self.generation)
+
+    def root_hint(self, board):
+        # The move the last principal variation expects here, otherwise the table's best move
+        moves = board.moves
+        if len(self.pv) >= 3 and len(moves) >= 2 and moves[-2:] == self.pv[:2]:
+            return self.pv[2]
+        entry = self.table.get(board.key())
+        return entry[3] if entry is not None else None
+
+    def search_root(self, board, depth):
+        # Searches the expected move first but still returns the lowest column
+        # among the best scores, so the choice matches a plain minimax
+        valid_moves = board.get_valid_moves()
+        hint = self.root_hint(board)
+        if hint not in valid_moves:
+            hint = valid_moves[0]
+
+        best_move = hint
+        best_eval = self.search_child(board, hint, depth, float('-inf'), float('inf'))
+        for move in valid_moves:
+            if move == hint:
+                continue
+            # Scores are whole numbers, so a null window answers "at least threshold?"
+            threshold = best_eval + 1 if move > best_move else best_eval
+            eval = self.search_child(board, move, depth, threshold - 1, threshold)
+            if eval >= threshold:
+                best_eval = self.search_child(board, move, depth, threshold - 1, float('inf'))
+                best_move = move
+
+        self.store(board.key(), depth, best_eval, EXACT, best_move)
+        self.pv = self.principal_variation(board, best_move)
+        return best_eval, best_move
+
+    def search_child(self, board, move, depth, alpha, beta):
+        board.make_move(move, self.player)
+        try:
+            if self.search == 'pvs':
+                eval = -self.negamax(board, depth - 1, -beta, -alpha, self.opponent)
+            else:
+                eval, _ = self.minimax(board, depth - 1, False, alpha, beta)
+        finally:
+            board.undo_move()
+        return eval
+
+    def principal_variation(self, board, first_move):
+        pv = [first_move]
+        player = self.player
+        board = board.copy()
+        board.make_move(first_move, player)
+        while len(pv) < self.depth:
+            entry = self.table.get(board.key())
+            if entry is None or entry[3] is None or not board.is_valid_move(entry[3]):
+                break
+            player = self.opponent if player == self.player else self.player
+            pv.append(entry[3])
+            board.make_move(entry[3], player)
+        return pv
+
+    def start_pondering(self, board):
+        # Search our reply to each opponent move in the background while the opponent thinks
+        self.stop_pondering()
+        self.ponder_results.clear()
+        self.ponder_thread = threading.Thread(target=self.ponder, args=(board.copy(),), daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        if self.ponder_thread is not None:
+            self.stop_event.set()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+            self.stop_event.clear()
+
+    def ponder(self, board):
+        # Searched on the same kind of board as make_move, so the replies match its own
+        board = self.search_board(board)
+        for col in PONDER_ORDER:
+            if not board.is_valid_move(col):
+                continue
+            board.make_move(col, self.opponent)
+            try:
+                if not (board.check_winner(self.opponent) or board.is_full()):
+                    _, move = self.cached_search(board, self.depth)
+                    self.ponder_results[board.key()] = move
+            except SearchAborted:
+                return
+            finally:
+                board.undo_move()
+
+    def score_moves(self, board, depth, previous=None):
+        # Exact score of every column (None when the column is full), used for multi-PV output.
+        # With the scores of the previous depth, each column starts with a narrow
+        # window around its last score and is searched again only if it falls outside.
+        board = self.search_board(board)
+        scores = [None] * GRID_COLS
+        for col in range(GRID_COLS):
+            if not board.is_valid_move(col):
+                continue
+            if previous is not None and previous[col] is not None and self.search == 'pvs':
+                alpha, beta = previous[col] - self.aspiration, previous[col] + self.aspiration
+                eval = self.search_child(board, col, depth, alpha, beta)
+                if alpha < eval < beta:
+                    scores[col] = eval
+                    continue
+            scores[col] = self.search_child(board, col, depth, float('-inf'), float('inf'))
+        return scores
+
+    def check_limits(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted()
+        if self.nodes % 256 == 0:
+            if self.stop_event.is_set() or (self.deadline is not None and time.perf_counter() > self.deadline):
+                raise SearchAborted()
+
+    def order_moves(self, board, player, hint):
+        # Table move first, then the columns that caused the most cutoffs
+        history = self.history[player]
+        moves = sorted(board.get_valid_moves(), key=lambda col: -history[col])
+        if hint in moves:
+            moves.remove(hint)
+            moves.insert(0, hint)
+        return moves
+
+    def negamax(self, board, depth, alpha, beta, player):
+        # Scores are from the point of view of player, who is to move
+        self.check_limits()
+        if depth == 0 or board.is_full() or board.check_winner(self.player) or board.check_winner(self.opponent):
+            eval = self.evaluate(board)
+            return eval if player == self.player else -eval
+
+        key = board.key()
+        hint = None
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, value, flag, hint, _ = entry
+            if entry_depth >= depth and (flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha)):
+                return value
+        alpha_orig = alpha
+        other = self.opponent if player == self.player else self.player
+
+        best_eval = float('-inf')
+        best_move = None
+        for i, move in enumerate(self.order_moves(board, player, hint)):
+            board.make_move(move, player)
+            try:
+                if i == 0:
+                    eval = -self.negamax(board, depth - 1, -beta, -alpha, other)
+                else:
+                    # Later moves only need to prove they are no better than the first
+                    eval = -self.negamax(board, depth - 1, -alpha - 1, -alpha, other)
+                    if alpha < eval < beta:
+                        eval = -self.negamax(board, depth - 1, -beta, -alpha, other)
+            finally:
+                board.undo_move()
+            if eval > best_eval:
+                best_eval = eval
+                best_move = move
+            alpha = max(alpha, eval)
+            if alpha >= beta:
+                self.history[player][move] += depth * depth
+                break
+
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.store(key, depth, best_eval, flag, best_move)
+        return best_eval
+
     def minimax(self, board, depth, maximizing_player, alpha, beta):
-        if depth == 0 or board.is_full() or board.check_winner(self.player) or board.check_winner('R'):
+        self.check_limits()
+        if depth == 0 or board.is_full() or board.check_winner(self.player) or board.check_winner(self.opponent):
             return self.evaluate(board), None
 
-        valid_moves = [col for col in range(GRID_COLS) if board.is_valid_move(col)]
+        key = board.key()
+        hint = None
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, value, flag, hint, _ = entry
+            if entry_depth >= depth and (flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha)):
+                return value, hint
+        alpha_orig, beta_orig = alpha, beta
 
         if maximizing_player:
             max_eval = float('-inf')
             best_move = None
-            for move in valid_moves:
-                new_board = Connect4Board()
-                new_board.grid = [row.copy() for row in board.grid]
-                new_board.make_move(move, self.player)
-                eval, _ = self.minimax(new_board, depth - 1, False, alpha, beta)
+            for move in self.order_moves(board, self.player, hint):
+                board.make_move(move, self.player)
+                try:
+                    eval, _ = self.minimax(board, depth - 1, False, alpha, beta)
+                finally:
+                    board.undo_move()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = move
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.history[self.player][move] += depth * depth
                     break
-            return max_eval, best_move
+            result = max_eval
         else:
             min_eval = float('inf')
             best_move = None
-            for move in valid_moves:
-                new_board = Connect4Board()
-                new_board.grid = [row.copy() for row in board.grid]
-                new_board.make_move(move, 'R')
-                eval, _ = self.minimax(new_board, depth - 1, True, alpha, beta)
+            for move in self.order_moves(board, self.opponent, hint):
+                board.make_move(move, self.opponent)
+                try:
+                    eval, _ = self.minimax(board, depth - 1, True, alpha, beta)
+                finally:
+                    board.undo_move()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = move
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.history[self.opponent][move] += depth * depth
                     break
-            return min_eval, best_move
+            result = min_eval
+
+        if result <= alpha_orig:
+            flag = UPPER
+        elif result >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.store(key, depth, result, flag, best_move)
+        return result, best_move
+
+    def plain_minimax(self, board, depth, maximizing_player, alpha, beta):
+        # The search as it was before any of the above: alpha-beta in column order,
+        # with no table, no move ordering and no null windows. Kept as a baseline.
+        self.check_limits()
+        if depth == 0 or board.is_full() or board.check_winner(self.player) or board.check_winner(self.opponent):
+            return self.evaluate(board), None
+
+        player = self.player if maximizing_player else self.opponent
+        best_eval = float('-inf') if maximizing_player else float('inf')
+        best_move = None
+        for move in board.get_valid_moves():
+            board.make_move(move, player)
+            try:
+                eval, _ = self.plain_minimax(board, depth - 1, not maximizing_player, alpha, beta)
+            finally:
+                board.undo_move()
+            if maximizing_player:
+                if eval > best_eval:
+                    best_eval, best_move = eval, move
+                alpha = max(alpha, eval)
+            else:
+                if eval < best_eval:
+                    best_eval, best_move = eval, move
+                beta = min(beta, eval)
+            if beta <= alpha:
+                break
+        return best_eval, best_move
 
     def evaluate(self, board):
         # Simple evaluation function for demonstration purposes
         if board.check_winner(self.player):
-            return 1
-        elif board.check_winner('R'):
-            return -1
+            return self.win_score
+        elif board.check_winner(self.opponent):
+            return -self.win_score
+        elif self.evaluator is not None:
+            # The evaluator scores for 'R', searches need whole numbers
+            value = self.evaluator.value(board)
+            if self.player == 'Y':
+                value = -value
+            return int(round(value * (WIN_SCORE - 1)))
+        elif self.heuristic:
+            value = board.heuristic() if self.player == 'R' else -board.heuristic()
+            return max(1 - WIN_SCORE, min(WIN_SCORE - 1, value))
         else:
             return 0
 
 
+def node_savings(depth=5, seed=None):
+    # Plays one game against RandomAgent and counts the nodes searched for
+    # every move with the state kept between moves and with a fresh search
+    from RandomAgents import RandomAgent
+
+    board = Connect4Board()
+    kept = LongTermAgent('Y', depth=depth)
+    fresh = LongTermAgent('Y', depth=depth, keep_state=False)
+    opponent = RandomAgent('R', random.Random(seed))
+    player = 'R'
+    rows = []
+    while not (board.check_winner('R') or board.check_winner('Y') or board.is_full()):
+        if player == 'R':
+            board.make_move(opponent.make_move(board), player)
+        else:
+            fresh.nodes = 0
+            fresh.make_move(board.copy())
+            kept.nodes = 0
+            board.make_move(kept.make_move(board), player)
+            rows.append((len(board.moves), fresh.nodes, kept.nodes))
+        player = 'Y' if player == 'R' else 'R'
+
+    print(f"{'ply':>4} {'fresh':>8} {'kept':>8} {'saved':>7}")
+    for ply, fresh_nodes, kept_nodes in rows:
+        print(f"{ply:>4} {fresh_nodes:>8} {kept_nodes:>8} {1 - kept_nodes / fresh_nodes:>7.1%}")
+    total_fresh = sum(row[1] for row in rows)
+    total_kept = sum(row[2] for row in rows)
+    print(f"{'all':>4} {total_fresh:>8} {total_kept:>8} {1 - total_kept / total_fresh:>7.1%}")
+
+
+def compare_search(depth=5, positions=100, seed=0, evaluator=None):
+    # Nodes searched for the same moves by the original alpha-beta (plain_minimax), by
+    # search='minimax', which adds the table, history ordering and null-window root, and
+    # by PVS; then by iterative multi-PV scoring (as in engine.py) with and without
+    # aspiration windows
+    rng = random.Random(seed)
+    totals = {'plain': 0, 'minimax': 0, 'pvs': 0, 'iterative': 0, 'aspiration': 0}
+    same_move = {'plain': 0, 'minimax': 0}
+    same_scores = 0
+    for _ in range(positions):
+        board = Connect4Board()
+        player = 'R'
+        for _ in range(rng.randint(0, 16)):
+            board.make_move(rng.choice(board.get_valid_moves()), player)
+            if board.check_winner(player):
+                board.undo_move()
+                break
+            player = 'Y' if player == 'R' else 'R'
+
+        agent = LongTermAgent(player, depth=depth, keep_state=False, evaluator=evaluator)
+        _, plain_move = agent.plain_minimax(board, depth, True, float('-inf'), float('inf'))
+        totals['plain'] += agent.nodes
+        moves = {}
+        for search in ('minimax', 'pvs'):
+            agent = LongTermAgent(player, depth=depth, keep_state=False, evaluator=evaluator, search=search)
+            moves[search] = agent.make_move(board)
+            totals[search] += agent.nodes
+        same_move['plain'] += plain_move == moves['pvs']
+        same_move['minimax'] += moves['minimax'] == moves['pvs']
+
+        results = {}
+        for mode in ('iterative', 'aspiration'):
+            agent = LongTermAgent(player, depth=depth, keep_state=False, evaluator=evaluator)
+            scores = None
+            for current in range(1, depth + 1):
+                scores = agent.score_moves(board, current, scores if mode == 'aspiration' else None)
+            results[mode] = scores
+            totals[mode] += agent.nodes
+        same_scores += results['iterative'] == results['aspiration']
+
+    print(f"depth {depth}, {positions} positions")
+    labels = {'plain': "original alpha-beta, column order",
+              'minimax': "minimax with table, history and null-window root",
+              'pvs': "negamax PVS with the same"}
+    for search in ('plain', 'minimax', 'pvs'):
+        print(f"  {search:10} {totals[search]:>10} nodes  {totals[search] / totals['plain']:7.1%}  {labels[search]}")
+    print(f"  PVS plays the same move as plain in {same_move['plain']}/{positions} positions, "
+          f"as minimax in {same_move['minimax']}/{positions}")
+    print(f"  iterative multi-PV scoring, depth 1 to {depth}:")
+    for mode in ('iterative', 'aspiration'):
+        print(f"  {mode:10} {totals[mode]:>10} nodes  {totals[mode] / totals['iterative']:7.1%}")
+    print(f"  same scores in {same_scores}/{positions} positions")
+
+
 class Connect4Game:
-    def __init__(self):
+    def __init__(self, use_engine=False, depth=3, ponder=False, cache=None, idle=False, evaluator=None,
+                 heuristic=False, proof_nodes=None):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Connect 4")
         self.clock = pygame.time.Clock()
+        self.view = BoardView(self.screen)
 
         self.board = Connect4Board()
         self.human_player = 'R'
@@ -128,21 +528,45 @@ class Connect4Game:
         self.current_player = self.human_player  # Start with human player
         self.game_over = False
         self.winner = None
+        # Block in pygame.event.wait instead of polling while waiting for a human
+        self.idle = IdleWaiter() if idle else None
+        self.exit_delay = 10  # Seconds the result stays on screen
+
+        if use_engine:
+            # Search in a separate engine process driven through pipes
+            from engine import EngineAgent
+            self.long_term_agent = EngineAgent(self.computer_player, depth=depth)
+        else:
+            self.long_term_agent = LongTermAgent(self.computer_player, depth=depth, cache=cache, evaluator=evaluator,
+                                                 heuristic=heuristic, proof_nodes=proof_nodes)
+        # Pondering needs the agent in this process
+        self.ponder = ponder and not use_engine
+        self.reply_times = []  # Seconds the computer took for every reply
+
+    def start_pondering(self):
+        if self.ponder and not self.game_over and self.current_player == self.human_player:
+            self.long_term_agent.start_pondering(self.board)
 
-        self.long_term_agent = LongTermAgent(self.computer_player)
+    def awaiting_input(self):
+        return self.current_player == self.human_player and not self.view.active
 
     def run(self):
-        while not self.game_over:
+        self.start_pondering()
+        while not self.game_over or self.view.active:
+            if self.idle is not None and self.awaiting_input():
+                self.idle.wait()
             self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(30)
+            self.clock.tick(ANIMATING_FPS if self.view.active else 30)
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            elif self.game_over:
+                continue
             elif event.type == pygame.MOUSEBUTTONDOWN and self.current_player == self.human_player:
                 col = event.pos[0] // CELL_SIZE
                 self.make_move(col)
@@ -156,6 +580,9 @@ class Connect4Game:
             # Human player's move
             if self.board.is_valid_move(col):
                 if self.board.make_move(col, self.human_player):
+                    self.view.drop_last(self.board)
+                    if self.ponder:
+                        self.long_term_agent.stop_pondering()
                     if self.board.check_winner(self.human_player):
                         self.winner = self.human_player
                         self.game_over = True
@@ -163,16 +590,16 @@ class Connect4Game:
                         self.winner = 'Draw'
                         self.game_over = True
                     else:
-                        time.sleep(1)
-
+                        # The computer replies in update once the disc has landed
                         self.current_player = self.computer_player
-                        # Computer agent makes a move
-                        self.make_move(-1)  # -1 as a placeholder for computer move
         else:
             # Computer agent's move
+            start = time.perf_counter()
             computer_move = self.long_term_agent.make_move(self.board)
+            self.reply_times.append(time.perf_counter() - start)
             if self.board.is_valid_move(computer_move):
                 if self.board.make_move(computer_move, self.computer_player):
+                    self.view.drop_last(self.board)
                     if self.board.check_winner(self.computer_player):
                         self.winner = self.computer_player
                         self.game_over = True
@@ -181,33 +608,28 @@ class Connect4Game:
                         self.game_over = True
                     else:
                         self.current_player = self.human_player
+                        self.start_pondering()
+
+    def reply_stats(self):
+        times = self.reply_times
+        if not times:
+            return "no computer replies"
+        line = (f"{len(times)} computer replies: mean {sum(times) / len(times) * 1000:.1f} ms, "
+                f"max {max(times) * 1000:.1f} ms")
+        if self.ponder:
+            line += f", {self.long_term_agent.ponder_hits} ponder hits"
+        return line
 
     def update(self):
-        # Add any game logic updates here
-        pass
+        if self.current_player == self.computer_player and not self.game_over and not self.view.active:
+            self.make_move(-1)  # -1 as a placeholder for computer move
 
     def draw(self):
-        self.screen.fill((255, 255, 255))  # White background
-
-        # Draw grid lines
-        for row in range(GRID_ROWS + 1):
-            pygame.draw.line(self.screen, (0, 0, 0), (0, row * CELL_SIZE), (SCREEN_WIDTH, row * CELL_SIZE), 2)
-        for col in range(GRID_COLS + 1):
-            pygame.draw.line(self.screen, (0, 0, 0), (col * CELL_SIZE, 0), (col * CELL_SIZE, SCREEN_HEIGHT), 2)
-
-        # Draw discs on the board
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS):
-                if self.board.grid[row][col] == 'R':
-                    color = (255, 0, 0)  # Red for player 'R'
-                elif self.board.grid[row][col] == 'Y':
-                    color = (255, 255, 0)  # Yellow for player 'Y'
-                else:
-                    continue  # Skip empty cells
-                pygame.draw.circle(self.screen, color, (col * CELL_SIZE + CELL_SIZE // 2, row * CELL_SIZE + CELL_SIZE // 2), DISC_RADIUS)
+        # Redraws only the columns that changed, with new discs falling into place
+        self.view.draw(self.board.grid)
 
-        # Display winner message
-        if self.winner is not None:
+        # Display winner message once the last disc has landed
+        if self.winner is not None and not self.view.active:
             font = pygame.font.Font(None, 36)
             if self.winner == 'Draw':
                 text = font.render("It's a Draw!", True, (0, 0, 0))
@@ -217,13 +639,66 @@ class Connect4Game:
             pygame.display.flip()
 
             # Add a delay before exiting
-            time.sleep(10)
+            time.sleep(self.exit_delay)
             pygame.quit()
             sys.exit()
 
-        pygame.display.flip()
-
 # Run the game
 if __name__ == "__main__":
-    game = Connect4Game()
+    import argparse
+    import atexit
+    import inputlog
+    import profiling
+
+    parser = argparse.ArgumentParser(description="Play Connect 4 against LongTermAgent")
+    parser.add_argument('--engine', action='store_true', help="search in a separate engine process")
+    parser.add_argument('--depth', type=int, default=3, help="search depth of the computer player")
+    parser.add_argument('--ponder', action='store_true', help="search likely replies while the human thinks")
+    parser.add_argument('--ntuple', metavar='PATH', help="n-tuple weights trained by ntuple.py")
+    parser.add_argument('--heuristic', action='store_true', help="score unfinished positions by open lines of four")
+    parser.add_argument('--cache', metavar='PATH', help="position cache file shared across runs")
+    parser.add_argument('--cache-min-depth', type=int, metavar='DEPTH',
+                        help="shallowest search written to the cache (default: --depth)")
+    parser.add_argument('--proof-nodes', type=int, metavar='N',
+                        help="try a proof-number search of N nodes for a forced win or loss before every move")
+    parser.add_argument('--node-savings', action='store_true',
+                        help="report the nodes saved by keeping search state over a game against RandomAgent")
+    parser.add_argument('--idle', action='store_true', help="sleep until input arrives instead of polling")
+    parser.add_argument('--compare-search', action='store_true',
+                        help="compare nodes and moves of minimax and PVS on random positions")
+    profiling.add_arguments(parser)
+    inputlog.add_arguments(parser)
+    args = parser.parse_args()
+    inputlog.prepare(args)
+
+    if args.node_savings:
+        node_savings(depth=args.depth)
+        sys.exit()
+    if args.compare_search:
+        from ntuple import NTupleEvaluator
+
+        compare_search(depth=args.depth, evaluator=NTupleEvaluator.load(args.ntuple) if args.ntuple else None)
+        sys.exit()
+
+    cache = None
+    if args.cache:
+        from poscache import PositionCache
+
+        cache = PositionCache(args.cache, min_depth=args.cache_min_depth or args.depth)
+        atexit.register(lambda: print(cache.stats()))
+
+    evaluator = None
+    if args.ntuple:
+        from ntuple import NTupleEvaluator
+
+        evaluator = NTupleEvaluator.load(args.ntuple)
+
+    game = Connect4Game(use_engine=args.engine, depth=args.depth, ponder=args.ponder, cache=cache, idle=args.idle,
+                        evaluator=evaluator, heuristic=args.heuristic, proof_nodes=args.proof_nodes)
+    profiling.setup(args, game)
+    inputlog.setup(args, game)
+    if game.idle is not None:
+        atexit.register(lambda: print(game.idle.stats()))
+    if game.ponder:
+        atexit.register(lambda: print(game.reply_stats()))
     game.run()
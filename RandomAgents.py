@@ -3,73 +3,31 @@ import sys
 import time
 import random
 
+from animation import BoardView, ANIMATING_FPS
+from boards import Connect4Board, GRID_COLS
+
 # Constants for the GUI
 SCREEN_WIDTH = 700
 SCREEN_HEIGHT = 600
 CELL_SIZE = 100
-GRID_ROWS = 6
-GRID_COLS = 7
 DISC_RADIUS = CELL_SIZE // 2 - 5
 
-class Connect4Board:
-    def __init__(self):
-        self.grid = [[' ' for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
-
-    def is_valid_move(self, col):
-        return 0 <= col < GRID_COLS and self.grid[0][col] == ' '
-
-    def make_move(self, col, player):
-        for row in range(GRID_ROWS - 1, -1, -1):
-            if self.grid[row][col] == ' ':
-                self.grid[row][col] = player
-                return True
-        return False  # Column is full
-
-    def check_winner(self, player):
-        # Check horizontally
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row][col + i] == player for i in range(4)):
-                    return True
-
-        # Check vertically
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS):
-                if all(self.grid[row + i][col] == player for i in range(4)):
-                    return True
-
-        # Check diagonally (down-right)
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row + i][col + i] == player for i in range(4)):
-                    return True
-
-        # Check diagonally (up-right)
-        for row in range(3, GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row - i][col + i] == player for i in range(4)):
-                    return True
-
-        return False
-
-    def is_full(self):
-        return all(self.grid[0][col] != ' ' for col in range(GRID_COLS))
-
-
 class RandomAgent:
-    def __init__(self, player):
+    def __init__(self, player, rng=random):
         self.player = player
+        self.rng = rng  # Any random.Random; the module's shared generator by default
 
     def make_move(self, board):
         valid_moves = [col for col in range(GRID_COLS) if board.is_valid_move(col)]
-        return random.choice(valid_moves)
+        return self.rng.choice(valid_moves)
 
 class Connect4Game:
-    def __init__(self):
+    def __init__(self, interval=1.0):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Connect 4-RANDOM AGENTS")
         self.clock = pygame.time.Clock()
+        self.view = BoardView(self.screen)
 
         self.board = Connect4Board()
         self.agent1 = RandomAgent('R')
@@ -77,13 +35,16 @@ class Connect4Game:
         self.current_agent = self.agent1
         self.game_over = False
         self.winner = None
+        # Seconds between moves; below the drop time several discs fall at once
+        self.interval = interval
+        self.next_move_at = time.perf_counter() + interval
 
     def run(self):
-        while not self.game_over:
+        while not self.game_over or self.view.active:
             self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(30)
+            self.clock.tick(ANIMATING_FPS if self.view.active else 30)
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -95,6 +56,7 @@ class Connect4Game:
         col = agent.make_move(self.board)
         if self.board.is_valid_move(col):
             if self.board.make_move(col, agent.player):
+                self.view.drop_last(self.board)
                 if self.board.check_winner(agent.player):
                     self.winner = agent.player
                     self.game_over = True
@@ -103,34 +65,21 @@ class Connect4Game:
                     self.game_over = True
 
     def update(self):
+        now = time.perf_counter()
+        if self.game_over or now < self.next_move_at:
+            return
+        self.next_move_at = now + self.interval
         # Switch the current agent before making a move
         self.current_agent = self.agent2 if self.current_agent == self.agent1 else self.agent1
         # Make a move for the current agent
-        time.sleep(1)
         self.make_move(self.current_agent)
 
     def draw(self):
-        self.screen.fill((255, 255, 255))  # White background
-
-        # Draw grid lines
-        for row in range(GRID_ROWS + 1):
-            pygame.draw.line(self.screen, (0, 0, 0), (0, row * CELL_SIZE), (SCREEN_WIDTH, row * CELL_SIZE), 2)
-        for col in range(GRID_COLS + 1):
-            pygame.draw.line(self.screen, (0, 0, 0), (col * CELL_SIZE, 0), (col * CELL_SIZE, SCREEN_HEIGHT), 2)
-
-        # Draw discs on the board
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS):
-                if self.board.grid[row][col] == 'R':
-                    color = (255, 0, 0)  # Red for player 'R'
-                elif self.board.grid[row][col] == 'Y':
-                    color = (255, 255, 0)  # Yellow for player 'Y'
-                else:
-                    continue  # Skip empty cells
-                pygame.draw.circle(self.screen, color, (col * CELL_SIZE + CELL_SIZE // 2, row * CELL_SIZE + CELL_SIZE // 2), DISC_RADIUS)
-
-        # Display winner message
-        if self.winner is not None:
+        # Redraws only the columns that changed, with new discs falling into place
+        self.view.draw(self.board.grid)
+
+        # Display winner message once the last disc has landed
+        if self.winner is not None and not self.view.active:
             font = pygame.font.Font(None, 36)
             if self.winner == 'Draw':
                 text = font.render("It's a Draw!", True, (0, 0, 0))
@@ -144,11 +93,18 @@ class Connect4Game:
             pygame.quit()
             sys.exit()
 
-        pygame.display.flip()
-
 # Run the game
 if __name__ == "__main__":
-    game = Connect4Game()
+    import argparse
+    import profiling
+
+    parser = argparse.ArgumentParser(description="Watch two random agents play Connect 4")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between moves")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+
+    game = Connect4Game(interval=args.interval)
+    profiling.setup(args, game)
     game.run()
 
 
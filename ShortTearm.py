@@ -3,64 +3,16 @@ import sys
 import time
 import random
 
+from animation import BoardView, ANIMATING_FPS
+from boards import Connect4Board, GRID_COLS
+from idle import IdleWaiter
+
 # Constants for the GUI
 SCREEN_WIDTH = 700
 SCREEN_HEIGHT = 600
 CELL_SIZE = 100
-GRID_ROWS = 6
-GRID_COLS = 7
 DISC_RADIUS = CELL_SIZE // 2 - 5
 
-class Connect4Board:
-    def __init__(self):
-        self.grid = [[' ' for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
-
-    def display_board(self):
-        for row in self.grid:
-            print('|'.join(row))
-            print('-' * (GRID_COLS * 2 - 1))
-
-    def is_valid_move(self, col):
-        return 0 <= col < GRID_COLS and self.grid[0][col] == ' '
-
-    def make_move(self, col, player):
-        for row in range(GRID_ROWS - 1, -1, -1):
-            if self.grid[row][col] == ' ':
-                self.grid[row][col] = player
-                return True
-        return False  # Column is full
-
-    def check_winner(self, player):
-        # Check horizontally
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row][col + i] == player for i in range(4)):
-                    return True
-
-        # Check vertically
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS):
-                if all(self.grid[row + i][col] == player for i in range(4)):
-                    return True
-
-        # Check diagonally (down-right)
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row + i][col + i] == player for i in range(4)):
-                    return True
-
-        # Check diagonally (up-right)
-        for row in range(3, GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row - i][col + i] == player for i in range(4)):
-                    return True
-
-        return False
-
-    def is_full(self):
-        return all(self.grid[0][col] != ' ' for col in range(GRID_COLS))
-
-
 class ShortTermAgent:
     def __init__(self, player):
         self.player = player
@@ -72,11 +24,12 @@ class ShortTermAgent:
 
 
 class Connect4Game:
-    def __init__(self):
+    def __init__(self, idle=False):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Connect 4")
         self.clock = pygame.time.Clock()
+        self.view = BoardView(self.screen)
 
         self.board = Connect4Board()
         self.human_player = 'R'
@@ -84,20 +37,30 @@ class Connect4Game:
         self.current_player = self.human_player  # Start with human player
         self.game_over = False
         self.winner = None
+        # Block in pygame.event.wait instead of polling while waiting for a human
+        self.idle = IdleWaiter() if idle else None
+        self.exit_delay = 2  # Seconds the result stays on screen
         self.short_term_agent = ShortTermAgent(self.computer_player)
 
+    def awaiting_input(self):
+        return self.current_player == self.human_player and not self.view.active
+
     def run(self):
-        while not self.game_over:
+        while not self.game_over or self.view.active:
+            if self.idle is not None and self.awaiting_input():
+                self.idle.wait()
             self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(30)
+            self.clock.tick(ANIMATING_FPS if self.view.active else 30)
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            elif self.game_over:
+                continue
             elif event.type == pygame.MOUSEBUTTONDOWN and self.current_player == self.human_player:
                 col = event.pos[0] // CELL_SIZE
                 self.make_move(col)
@@ -111,6 +74,7 @@ class Connect4Game:
             # Human player's move
             if self.board.is_valid_move(col):
                 if self.board.make_move(col, self.human_player):
+                    self.view.drop_last(self.board)
                     if self.board.check_winner(self.human_player):
                         self.winner = self.human_player
                         self.game_over = True
@@ -118,14 +82,14 @@ class Connect4Game:
                         self.winner = 'Draw'
                         self.game_over = True
                     else:
+                        # The computer replies in update once the disc has landed
                         self.current_player = self.computer_player
-                        # Computer agent makes a move
-                        self.make_move(-1)  # -1 as a placeholder for computer move
         else:
             # Computer agent's move
             computer_move = self.short_term_agent.make_move(self.board)
             if self.board.is_valid_move(computer_move):
                 if self.board.make_move(computer_move, self.computer_player):
+                    self.view.drop_last(self.board)
                     if self.board.check_winner(self.computer_player):
                         self.winner = self.computer_player
                         self.game_over = True
@@ -136,31 +100,15 @@ class Connect4Game:
                         self.current_player = self.human_player
 
     def update(self):
-        # Add any game logic updates here
-        pass
+        if self.current_player == self.computer_player and not self.game_over and not self.view.active:
+            self.make_move(-1)  # -1 as a placeholder for computer move
 
     def draw(self):
-        self.screen.fill((255, 255, 255))  # White background
-
-        # Draw grid lines
-        for row in range(GRID_ROWS + 1):
-            pygame.draw.line(self.screen, (0, 0, 0), (0, row * CELL_SIZE), (SCREEN_WIDTH, row * CELL_SIZE), 2)
-        for col in range(GRID_COLS + 1):
-            pygame.draw.line(self.screen, (0, 0, 0), (col * CELL_SIZE, 0), (col * CELL_SIZE, SCREEN_HEIGHT), 2)
-
-        # Draw discs on the board
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS):
-                if self.board.grid[row][col] == 'R':
-                    color = (255, 0, 0)  # Red for player 'R'
-                elif self.board.grid[row][col] == 'Y':
-                    color = (255, 255, 0)  # Yellow for player 'Y'
-                else:
-                    continue  # Skip empty cells
-                pygame.draw.circle(self.screen, color, (col * CELL_SIZE + CELL_SIZE // 2, row * CELL_SIZE + CELL_SIZE // 2), DISC_RADIUS)
-
-        # Display winner message
-        if self.winner is not None:
+        # Redraws only the columns that changed, with new discs falling into place
+        self.view.draw(self.board.grid)
+
+        # Display winner message once the last disc has landed
+        if self.winner is not None and not self.view.active:
             font = pygame.font.Font(None, 36)
             if self.winner == 'Draw':
                 text = font.render("It's a Draw!", True, (0, 0, 0))
@@ -170,13 +118,27 @@ class Connect4Game:
             pygame.display.flip()
 
             # Add a delay before exiting
-            time.sleep(2)
+            time.sleep(self.exit_delay)
             pygame.quit()
             sys.exit()
 
-        pygame.display.flip()
-
 # Run the game
 if __name__ == "__main__":
-    game = Connect4Game()
+    import argparse
+    import atexit
+    import inputlog
+    import profiling
+
+    parser = argparse.ArgumentParser(description="Play Connect 4 against ShortTermAgent")
+    parser.add_argument('--idle', action='store_true', help="sleep until input arrives instead of polling")
+    profiling.add_arguments(parser)
+    inputlog.add_arguments(parser)
+    args = parser.parse_args()
+    inputlog.prepare(args)
+
+    game = Connect4Game(idle=args.idle)
+    profiling.setup(args, game)
+    inputlog.setup(args, game)
+    if game.idle is not None:
+        atexit.register(lambda: print(game.idle.stats()))
     game.run()
@@ -0,0 +1,227 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+# Keep pygame's import banner out of the workers' output
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from boards import GRID_ROWS, GRID_COLS
+from engine import parse_moves, best_column
+from LongTearm import LongTermAgent, SearchAborted
+
+# Batch analysis: scores every position of a file of move strings ('4453',
+# columns 1-7, R first; record lines such as '4453322 R' work too) in a pool of
+# LongTermAgent workers and writes one JSON line per position:
+#
+#   {"offset": 120, "moves": "4453", "depth": 6, "nodes": 5210,
+#    "scores": [0, 0, 1, 0, null, 0, 0], "best": 3}
+#
+# Scores are from the side to move's point of view, null for full columns, and
+# best is a column 1-7. The input is read a chunk at a time and only a bounded
+# number of chunks is in flight, so memory stays flat on any file size. A
+# checkpoint next to the output records how far the input has been written,
+# and a rerun with --resume continues from there.
+
+agents = None
+evaluator = None
+
+
+def init_worker(ntuple):
+    global agents, evaluator
+    if ntuple:
+        from ntuple import NTupleEvaluator
+        evaluator = NTupleEvaluator.load(ntuple)
+    agents = {player: LongTermAgent(player, evaluator=evaluator) for player in ('R', 'Y')}
+
+
+def analyse_position(moves, depth, movetime):
+    board, player = parse_moves(moves)
+    result = {'moves': moves, 'depth': 0, 'nodes': 0, 'scores': None, 'best': None}
+    if board.check_winner('R') or board.check_winner('Y') or board.is_full():
+        return result
+    agent = agents[player]
+    agent.new_search()
+    agent.nodes = 0
+    agent.deadline = time.perf_counter() + movetime / 1000 if movetime is not None else None
+    scores = None
+    empty = GRID_ROWS * GRID_COLS - len(board.moves)
+    # Iterative deepening, so a time limit still leaves the deepest finished scores
+    for current in range(1, min(depth, empty) + 1):
+        try:
+            scores = agent.score_moves(board, current, scores)
+        except SearchAborted:
+            break
+        result['depth'] = current
+    agent.deadline = None
+    result['nodes'] = agent.nodes
+    if scores is not None:
+        result['scores'] = scores
+        result['best'] = best_column(scores) + 1
+    return result
+
+
+def analyse_chunk(chunk, depth, movetime):
+    results = []
+    for offset, moves in chunk:
+        try:
+            result = analyse_position(moves, depth, movetime)
+        except ValueError as error:
+            result = {'moves': moves, 'error': str(error)}
+        results.append(dict(offset=offset, **result))
+    return results
+
+
+def read_chunks(path, start, chunk_size):
+    # Yields (start offset, end offset, [(offset, moves)]) from byte offset start on
+    with open(path, 'rb') as file:
+        file.seek(start)
+        offset = start
+        chunk = []
+        chunk_start = offset
+        for line in file:
+            fields = line.split()
+            if fields:
+                chunk.append((offset, fields[0].decode()))
+            offset += len(line)
+            if len(chunk) == chunk_size:
+                yield chunk_start, offset, chunk
+                chunk = []
+                chunk_start = offset
+        if chunk or offset > chunk_start:
+            yield chunk_start, offset, chunk
+
+
+class Checkpoint:
+    # Input offset written up to, output size at that point, and (unordered runs)
+    # the start offsets of later chunks that are already in the output
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.output_size = 0
+        self.done = set()
+        self.chunk_size = None
+
+    def load(self):
+        with open(self.path) as file:
+            state = json.load(file)
+        self.offset = state['offset']
+        self.output_size = state['output_size']
+        self.done = set(state['done'])
+        self.chunk_size = state['chunk_size']
+
+    def save(self):
+        temp = self.path + '.tmp'
+        with open(temp, 'w') as file:
+            json.dump({'offset': self.offset, 'output_size': self.output_size,
+                       'done': sorted(self.done), 'chunk_size': self.chunk_size}, file)
+        os.replace(temp, self.path)
+
+
+def analyse_file(path, out, depth=6, movetime=None, workers=None, chunk_size=64, in_flight=None,
+                 ordered=True, resume=False, ntuple=None):
+    checkpoint = Checkpoint(out + '.checkpoint')
+    checkpoint.chunk_size = chunk_size
+    if resume and os.path.exists(checkpoint.path):
+        checkpoint.load()
+        # Chunks must line up with the ones recorded as done
+        chunk_size = checkpoint.chunk_size
+        with open(out, 'ab') as file:
+            file.truncate(checkpoint.output_size)
+    else:
+        open(out, 'w').close()
+        checkpoint.save()
+
+    workers = workers or os.cpu_count() or 1
+    in_flight = in_flight or 2 * workers
+    finished = queue.Queue()
+    pending = {}  # Chunk start offset -> end offset, in input order
+    end_offsets = {}
+    buffered = {}  # Finished chunks waiting for earlier ones (ordered output)
+    positions = 0
+    start = time.perf_counter()
+
+    output = open(out, 'a')
+    pool = multiprocessing.Pool(workers, initializer=init_worker, initargs=(ntuple,))
+
+    def write(chunk_start, results):
+        nonlocal positions
+        for result in results:
+            output.write(json.dumps(result) + '\n')
+        positions += len(results)
+        del pending[chunk_start]
+        if pending and next(iter(pending)) < chunk_start:
+            checkpoint.done.add(chunk_start)
+        else:
+            # Everything before this chunk is written, so the checkpoint moves on
+            # past it and past any later chunks that finished early
+            checkpoint.offset = end_offsets.pop(chunk_start)
+            while checkpoint.offset in checkpoint.done:
+                checkpoint.done.discard(checkpoint.offset)
+                checkpoint.offset = end_offsets.pop(checkpoint.offset)
+        output.flush()
+        checkpoint.output_size = output.tell()
+        checkpoint.save()
+
+    def collect(block):
+        item = finished.get(block)
+        if isinstance(item, BaseException):
+            raise item
+        chunk_start, results = item
+        if ordered:
+            buffered[chunk_start] = results
+            while pending and next(iter(pending)) in buffered:
+                first = next(iter(pending))
+                write(first, buffered.pop(first))
+        else:
+            write(chunk_start, results)
+
+    try:
+        for chunk_start, chunk_end, chunk in read_chunks(path, checkpoint.offset, chunk_size):
+            end_offsets[chunk_start] = chunk_end
+            if chunk_start in checkpoint.done:
+                # Written before the restart by an unordered run
+                pending[chunk_start] = chunk_end
+                finished.put((chunk_start, []))
+            else:
+                # Backpressure: read no further than in_flight chunks ahead of the writer
+                while len(pending) >= in_flight:
+                    collect(True)
+                pending[chunk_start] = chunk_end
+                pool.apply_async(analyse_chunk, (chunk, depth, movetime),
+                                 callback=lambda results, key=chunk_start: finished.put((key, results)),
+                                 error_callback=lambda error: finished.put(error))
+            while not finished.empty():
+                collect(False)
+        while pending:
+            collect(True)
+    finally:
+        pool.terminate()
+        pool.join()
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{positions} positions in {elapsed:.1f} s ({positions / max(elapsed, 1e-9):.1f}/s)", file=sys.stderr)
+    return positions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score every position of a file of move strings")
+    parser.add_argument('input', help="one position per line as columns 1-7, R first")
+    parser.add_argument('--out', required=True, help="JSON lines output file")
+    parser.add_argument('--depth', type=int, default=6, help="search depth per position")
+    parser.add_argument('--movetime', type=int, help="milliseconds per position; keeps the deepest finished scores")
+    parser.add_argument('--workers', type=int, help="analysis processes (default: one per CPU)")
+    parser.add_argument('--chunk', type=int, default=64, help="positions per work item")
+    parser.add_argument('--in-flight', type=int, help="chunks queued or buffered at once (default: 2 per worker)")
+    parser.add_argument('--unordered', action='store_true', help="write results as they finish, not in input order")
+    parser.add_argument('--resume', action='store_true', help="continue from the checkpoint of an earlier run")
+    parser.add_argument('--ntuple', metavar='PATH', help="n-tuple weights trained by ntuple.py")
+    args = parser.parse_args()
+
+    analyse_file(args.input, args.out, depth=args.depth, movetime=args.movetime, workers=args.workers,
+                 chunk_size=args.chunk, in_flight=args.in_flight, ordered=not args.unordered,
+                 resume=args.resume, ntuple=args.ntuple)
@@ -0,0 +1,117 @@
+import pygame
+
+from boards import GRID_ROWS, GRID_COLS
+
+# Falling-disc animation for the game windows. BoardView draws the board once,
+# then only redraws the columns that changed: a new disc falls from above the
+# board under constant acceleration, timed by the frame clock, and any number
+# of discs can be in flight at once.
+
+CELL_SIZE = 100
+DISC_RADIUS = CELL_SIZE // 2 - 5
+COLORS = {'R': (255, 0, 0), 'Y': (255, 255, 0)}
+BACKGROUND = (255, 255, 255)
+LINE_COLOR = (0, 0, 0)
+GRAVITY = 6000.0  # Pixels per second squared, about 0.4 s to fall the whole board
+ANIMATING_FPS = 60
+
+
+class BoardView:
+    def __init__(self, screen, gravity=GRAVITY):
+        self.screen = screen
+        self.gravity = gravity
+        self.width = GRID_COLS * CELL_SIZE
+        self.height = GRID_ROWS * CELL_SIZE
+        # Disc images are drawn once and blitted from then on
+        self.discs = {}
+        for piece, color in COLORS.items():
+            surface = pygame.Surface((2 * DISC_RADIUS, 2 * DISC_RADIUS), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (DISC_RADIUS, DISC_RADIUS), DISC_RADIUS)
+            self.discs[piece] = surface.convert_alpha()
+        self.shown = None  # Grid on screen, animated cells excluded
+        self.drops = []  # [col, row, piece, start ms]
+
+    @property
+    def active(self):
+        return bool(self.drops)
+
+    def drop(self, col, row, piece):
+        self.drops.append([col, row, piece, pygame.time.get_ticks()])
+
+    def drop_last(self, board):
+        # Animates the disc of the board's last move
+        col = board.moves[-1]
+        row = GRID_ROWS - board.moves.count(col)
+        self.drop(col, row, board.cell(row, col))
+
+    def redraw(self):
+        self.shown = None
+
+    def disc_position(self, col, y):
+        return col * CELL_SIZE + CELL_SIZE // 2 - DISC_RADIUS, int(y) - DISC_RADIUS
+
+    def draw(self, grid):
+        # Draws what changed since the last frame and returns the rects updated
+        now = pygame.time.get_ticks()
+        falling = {(row, col) for col, row, _, _ in self.drops}
+        dirty_columns = {col for col, _, _, _ in self.drops}
+        full = self.shown is None
+        if full:
+            self.screen.fill(BACKGROUND)
+            for row in range(GRID_ROWS + 1):
+                pygame.draw.line(self.screen, LINE_COLOR, (0, row * CELL_SIZE), (self.width, row * CELL_SIZE), 2)
+            for col in range(GRID_COLS + 1):
+                pygame.draw.line(self.screen, LINE_COLOR, (col * CELL_SIZE, 0), (col * CELL_SIZE, self.height), 2)
+            self.shown = [[' '] * GRID_COLS for _ in range(GRID_ROWS)]
+            dirty_columns = set(range(GRID_COLS))
+        else:
+            # Discs placed or removed without an animation, e.g. a new game
+            for row in range(GRID_ROWS):
+                for col in range(GRID_COLS):
+                    if grid[row][col] != self.shown[row][col] and (row, col) not in falling:
+                        dirty_columns.add(col)
+
+        rects = []
+        for col in sorted(dirty_columns):
+            rect = self.draw_column(grid, col, falling, now)
+            rects.append(rect)
+        self.drops = [drop for drop in self.drops if not self.landed(drop, now)]
+        if full:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+        return rects
+
+    def landed(self, drop, now):
+        return self.fall_y(drop, now) >= drop[1] * CELL_SIZE + CELL_SIZE // 2
+
+    def fall_y(self, drop, now):
+        elapsed = (now - drop[3]) / 1000
+        return -CELL_SIZE // 2 + 0.5 * self.gravity * elapsed * elapsed
+
+    def draw_column(self, grid, col, falling, now):
+        rect = pygame.Rect(col * CELL_SIZE + 1, 0, CELL_SIZE - 1, self.height)
+        self.screen.fill(BACKGROUND, rect)
+        for row in range(GRID_ROWS + 1):
+            pygame.draw.line(self.screen, LINE_COLOR, (rect.left, row * CELL_SIZE), (rect.right, row * CELL_SIZE), 2)
+        for row in range(GRID_ROWS):
+            piece = grid[row][col]
+            if (row, col) in falling and not self.landed_cell(row, col, now):
+                piece = ' '
+            else:
+                self.shown[row][col] = piece
+            if piece != ' ':
+                self.screen.blit(self.discs[piece], self.disc_position(col, row * CELL_SIZE + CELL_SIZE // 2))
+        for drop in self.drops:
+            if drop[0] == col and not self.landed(drop, now):
+                self.screen.blit(self.discs[drop[2]], self.disc_position(col, self.fall_y(drop, now)))
+        # Vertical grid lines are drawn over the edges of the falling discs
+        pygame.draw.line(self.screen, LINE_COLOR, (col * CELL_SIZE, 0), (col * CELL_SIZE, self.height), 2)
+        pygame.draw.line(self.screen, LINE_COLOR, ((col + 1) * CELL_SIZE, 0), ((col + 1) * CELL_SIZE, self.height), 2)
+        return pygame.Rect(col * CELL_SIZE, 0, CELL_SIZE + 2, self.height)
+
+    def landed_cell(self, row, col, now):
+        for drop in self.drops:
+            if drop[0] == col and drop[1] == row:
+                return self.landed(drop, now)
+        return True
@@ -0,0 +1,461 @@
+import os
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # The NumPy backend is optional
+    np = None
+
+# Board dimensions shared by every game
+GRID_ROWS = 6
+GRID_COLS = 7
+
+# Bitboard layout: one column after another, bottom cell first, with an
+# extra sentinel bit on top of every column so lines never wrap around
+COLUMN_BITS = GRID_ROWS + 1
+RED_BITS = GRID_COLS * COLUMN_BITS
+
+
+def cell_bit(row, col):
+    # row 0 is the top row, as in the string grid
+    return 1 << (col * COLUMN_BITS + GRID_ROWS - 1 - row)
+
+
+def make_windows():
+    # Every line of four cells that wins, as cell numbers col * GRID_ROWS + height
+    # (height 0 is the bottom cell)
+    windows = []
+    for col in range(GRID_COLS):
+        for height in range(GRID_ROWS):
+            for d_col, d_height in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                end_col, end_height = col + 3 * d_col, height + 3 * d_height
+                if 0 <= end_col < GRID_COLS and 0 <= end_height < GRID_ROWS:
+                    windows.append([(col + i * d_col) * GRID_ROWS + height + i * d_height for i in range(4)])
+    return windows
+
+
+WINDOWS = make_windows()
+# Windows through every cell, 3 to 13 of them
+CELL_WINDOWS = [[w for w, window in enumerate(WINDOWS) if cell in window] for cell in range(GRID_ROWS * GRID_COLS)]
+# Heuristic value of a window holding only one player's discs, by their number
+WINDOW_SCORES = (0, 1, 4, 16, 64)
+# Change of the mover's heuristic when a window goes from n to n + 1 of their
+# discs while holding o of the opponent's: it grows, or dies for the opponent
+WINDOW_GAIN = [[(WINDOW_SCORES[n + 1] - WINDOW_SCORES[n] if o == 0 else WINDOW_SCORES[o] if n == 0 else 0)
+                for o in range(5)] for n in range(4)]
+
+
+class BoardBackend:
+    # Every backend offers the same API. grid is a list of rows (top row
+    # first) holding ' ', 'R' or 'Y', and key() is identical across backends.
+    name = None
+
+    def is_valid_move(self, col):
+        raise NotImplementedError
+
+    def make_move(self, col, player):
+        raise NotImplementedError
+
+    def undo_move(self):
+        raise NotImplementedError
+
+    def check_winner(self, player):
+        raise NotImplementedError
+
+    def is_full(self):
+        return len(self.moves) == GRID_ROWS * GRID_COLS
+
+    def copy(self):
+        raise NotImplementedError
+
+    def key(self):
+        raise NotImplementedError
+
+    def cell(self, row, col):
+        return self.grid[row][col]
+
+    def get_valid_moves(self):
+        return [col for col in range(GRID_COLS) if self.is_valid_move(col)]
+
+    def heuristic(self):
+        # Window score from R's point of view: every line of four still open to
+        # one player counts for them, more the more of their discs it holds
+        score = 0
+        for window in WINDOWS:
+            pieces = [self.cell(GRID_ROWS - 1 - cell % GRID_ROWS, cell // GRID_ROWS) for cell in window]
+            red, yellow = pieces.count('R'), pieces.count('Y')
+            if yellow == 0:
+                score += WINDOW_SCORES[red]
+            elif red == 0:
+                score -= WINDOW_SCORES[yellow]
+        return score
+
+    def display_board(self):
+        for row in self.grid:
+            print('|'.join(row))
+            print('-' * (GRID_COLS * 2 - 1))
+
+
+class ListBoard(BoardBackend):
+    name = 'list'
+
+    def __init__(self):
+        self.grid = [[' ' for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
+        self.heights = [0] * GRID_COLS
+        self.moves = []
+        self.winners = []  # Winner (or None) after each move
+        self.bits = {'R': 0, 'Y': 0}
+
+    def is_valid_move(self, col):
+        return 0 <= col < GRID_COLS and self.heights[col] < GRID_ROWS
+
+    def make_move(self, col, player):
+        if not self.is_valid_move(col):
+            return False  # Column is full
+        row = GRID_ROWS - 1 - self.heights[col]
+        self.grid[row][col] = player
+        self.heights[col] += 1
+        self.bits[player] |= cell_bit(row, col)
+        winner = self.winners[-1] if self.winners else None
+        if winner is None and self.connects(row, col, player):
+            winner = player
+        self.moves.append(col)
+        self.winners.append(winner)
+        return True
+
+    def undo_move(self):
+        col = self.moves.pop()
+        self.winners.pop()
+        self.heights[col] -= 1
+        row = GRID_ROWS - 1 - self.heights[col]
+        self.bits[self.grid[row][col]] &= ~cell_bit(row, col)
+        self.grid[row][col] = ' '
+
+    def connects(self, row, col, player):
+        # Only lines through the last disc can have been completed by it
+        grid = self.grid
+        for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            for sign in (1, -1):
+                r, c = row + sign * d_row, col + sign * d_col
+                while 0 <= r < GRID_ROWS and 0 <= c < GRID_COLS and grid[r][c] == player:
+                    count += 1
+                    r += sign * d_row
+                    c += sign * d_col
+            if count >= 4:
+                return True
+        return False
+
+    def check_winner(self, player):
+        return bool(self.winners) and self.winners[-1] == player
+
+    def copy(self):
+        board = ListBoard.__new__(ListBoard)
+        board.grid = [row.copy() for row in self.grid]
+        board.heights = self.heights.copy()
+        board.moves = self.moves.copy()
+        board.winners = self.winners.copy()
+        board.bits = self.bits.copy()
+        return board
+
+    def key(self):
+        return self.bits['R'] | (self.bits['Y'] << RED_BITS)
+
+
+class NumpyBoard(BoardBackend):
+    name = 'numpy'
+    PIECES = {'R': 1, 'Y': 2}
+    CHARS = (' ', 'R', 'Y')
+
+    def __init__(self):
+        self.cells = np.zeros((GRID_ROWS, GRID_COLS), dtype=np.int8)
+        self.heights = np.zeros(GRID_COLS, dtype=np.int8)
+        self.moves = []
+
+    @property
+    def grid(self):
+        return [[self.CHARS[piece] for piece in row] for row in self.cells.tolist()]
+
+    def cell(self, row, col):
+        return self.CHARS[self.cells[row, col]]
+
+    def is_valid_move(self, col):
+        return 0 <= col < GRID_COLS and self.heights[col] < GRID_ROWS
+
+    def make_move(self, col, player):
+        if not self.is_valid_move(col):
+            return False  # Column is full
+        self.cells[GRID_ROWS - 1 - self.heights[col], col] = self.PIECES[player]
+        self.heights[col] += 1
+        self.moves.append(col)
+        return True
+
+    def undo_move(self):
+        col = self.moves.pop()
+        self.heights[col] -= 1
+        self.cells[GRID_ROWS - 1 - self.heights[col], col] = 0
+
+    def check_winner(self, player):
+        p = self.cells == self.PIECES[player]
+        if (p[:, :-3] & p[:, 1:-2] & p[:, 2:-1] & p[:, 3:]).any():
+            return True
+        if (p[:-3] & p[1:-2] & p[2:-1] & p[3:]).any():
+            return True
+        if (p[:-3, :-3] & p[1:-2, 1:-2] & p[2:-1, 2:-1] & p[3:, 3:]).any():
+            return True
+        return bool((p[3:, :-3] & p[2:-1, 1:-2] & p[1:-2, 2:-1] & p[:-3, 3:]).any())
+
+    def copy(self):
+        board = NumpyBoard.__new__(NumpyBoard)
+        board.cells = self.cells.copy()
+        board.heights = self.heights.copy()
+        board.moves = self.moves.copy()
+        return board
+
+    def key(self):
+        key = 0
+        for row, col in zip(*np.nonzero(self.cells)):
+            bit = cell_bit(int(row), int(col))
+            key |= bit if self.cells[row, col] == 1 else bit << RED_BITS
+        return key
+
+
+class BitBoard(BoardBackend):
+    name = 'bitboard'
+
+    def __init__(self):
+        self.bits = {'R': 0, 'Y': 0}
+        self.heights = [0] * GRID_COLS
+        self.moves = []
+        self.players = []
+
+    @property
+    def grid(self):
+        return [[self.cell(row, col) for col in range(GRID_COLS)] for row in range(GRID_ROWS)]
+
+    def cell(self, row, col):
+        bit = cell_bit(row, col)
+        if self.bits['R'] & bit:
+            return 'R'
+        if self.bits['Y'] & bit:
+            return 'Y'
+        return ' '
+
+    def is_valid_move(self, col):
+        return 0 <= col < GRID_COLS and self.heights[col] < GRID_ROWS
+
+    def make_move(self, col, player):
+        if not self.is_valid_move(col):
+            return False  # Column is full
+        self.bits[player] |= 1 << (col * COLUMN_BITS + self.heights[col])
+        self.heights[col] += 1
+        self.moves.append(col)
+        self.players.append(player)
+        return True
+
+    def undo_move(self):
+        col = self.moves.pop()
+        player = self.players.pop()
+        self.heights[col] -= 1
+        self.bits[player] &= ~(1 << (col * COLUMN_BITS + self.heights[col]))
+
+    def check_winner(self, player):
+        bits = self.bits[player]
+        # Vertical, horizontal and both diagonals
+        for shift in (1, COLUMN_BITS, COLUMN_BITS + 1, COLUMN_BITS - 1):
+            pairs = bits & (bits >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.bits = self.bits.copy()
+        board.heights = self.heights.copy()
+        board.moves = self.moves.copy()
+        board.players = self.players.copy()
+        return board
+
+    def key(self):
+        return self.bits['R'] | (self.bits['Y'] << RED_BITS)
+
+
+class WindowBoard(BitBoard):
+    # Bitboard that also keeps both players' disc counts in every window, so a
+    # move touches only the windows through its cell, and check_winner and
+    # heuristic are lookups instead of scans
+    name = 'window'
+
+    def __init__(self):
+        super().__init__()
+        self.counts = {'R': [0] * len(WINDOWS), 'Y': [0] * len(WINDOWS)}
+        self.wins = {'R': 0, 'Y': 0}  # Windows filled by each player
+        self.score = 0
+
+    def make_move(self, col, player):
+        if not self.is_valid_move(col):
+            return False  # Column is full
+        height = self.heights[col]
+        own = self.counts[player]
+        other = self.counts['Y' if player == 'R' else 'R']
+        gain = 0
+        for w in CELL_WINDOWS[col * GRID_ROWS + height]:
+            n = own[w]
+            gain += WINDOW_GAIN[n][other[w]]
+            own[w] = n + 1
+            if n == 3:
+                self.wins[player] += 1
+        self.score += gain if player == 'R' else -gain
+        self.bits[player] |= 1 << (col * COLUMN_BITS + height)
+        self.heights[col] = height + 1
+        self.moves.append(col)
+        self.players.append(player)
+        return True
+
+    def undo_move(self):
+        col = self.moves.pop()
+        player = self.players.pop()
+        height = self.heights[col] - 1
+        self.heights[col] = height
+        self.bits[player] &= ~(1 << (col * COLUMN_BITS + height))
+        own = self.counts[player]
+        other = self.counts['Y' if player == 'R' else 'R']
+        gain = 0
+        for w in CELL_WINDOWS[col * GRID_ROWS + height]:
+            n = own[w] - 1
+            own[w] = n
+            gain += WINDOW_GAIN[n][other[w]]
+            if n == 3:
+                self.wins[player] -= 1
+        self.score -= gain if player == 'R' else -gain
+
+    def check_winner(self, player):
+        return self.wins[player] > 0
+
+    def heuristic(self):
+        return self.score
+
+    def copy(self):
+        board = WindowBoard.__new__(WindowBoard)
+        board.bits = self.bits.copy()
+        board.heights = self.heights.copy()
+        board.moves = self.moves.copy()
+        board.players = self.players.copy()
+        board.counts = {player: counts.copy() for player, counts in self.counts.items()}
+        board.wins = self.wins.copy()
+        board.score = self.score
+        return board
+
+    @classmethod
+    def from_board(cls, board):
+        # Replays another backend's moves
+        window_board = cls()
+        player = 'R'
+        for col in board.moves:
+            window_board.make_move(col, player)
+            player = 'Y' if player == 'R' else 'R'
+        return window_board
+
+
+BACKENDS = {'list': ListBoard, 'bitboard': BitBoard, 'window': WindowBoard}
+if np is not None:
+    BACKENDS['numpy'] = NumpyBoard
+
+
+def random_game(rng):
+    # Columns of a random game played until a win or a full board
+    board = BitBoard()
+    player = 'R'
+    while not board.is_full():
+        board.make_move(rng.choice(board.get_valid_moves()), player)
+        if board.check_winner(player):
+            break
+        player = 'Y' if player == 'R' else 'R'
+    return board.moves
+
+
+def check_conformance(games=200, seed=0, backends=None):
+    # Plays the same random games on every backend and checks that they agree move by move
+    backends = list((backends or BACKENDS).values())
+    rng = random.Random(seed)
+    for _ in range(games):
+        boards = [cls() for cls in backends]
+        player = 'R'
+        for col in random_game(rng):
+            for board in boards:
+                assert board.make_move(col, player), (board.name, board.moves)
+            reference = boards[0]
+            for board in boards[1:]:
+                assert board.grid == reference.grid, (board.name, board.moves)
+                assert board.key() == reference.key(), (board.name, board.moves)
+                assert board.is_full() == reference.is_full(), (board.name, board.moves)
+                assert board.get_valid_moves() == reference.get_valid_moves(), (board.name, board.moves)
+                for p in ('R', 'Y'):
+                    assert board.check_winner(p) == reference.check_winner(p), (board.name, board.moves, p)
+            if len(board.moves) % 8 == 0:
+                # The scanning heuristic is slow, so only every few plies
+                for board in boards[1:]:
+                    assert board.heuristic() == reference.heuristic(), (board.name, board.moves)
+            copies = [board.copy() for board in boards]
+            for board, copy in zip(boards, copies):
+                assert copy.grid == board.grid and copy.key() == board.key(), (board.name, board.moves)
+            player = 'Y' if player == 'R' else 'R'
+        for board in boards:
+            while board.moves:
+                board.undo_move()
+            assert board.key() == 0 and board.grid == ListBoard().grid, board.name
+    return True
+
+
+def benchmark(cls, games):
+    # Seconds to replay the given games with the calls a search makes most
+    start = time.perf_counter()
+    for moves in games:
+        board = cls()
+        player = 'R'
+        for col in moves:
+            board.is_valid_move(col)
+            board.make_move(col, player)
+            board.check_winner(player)
+            board.is_full()
+            player = 'Y' if player == 'R' else 'R'
+        while board.moves:
+            board.undo_move()
+    return time.perf_counter() - start
+
+
+def fastest_backend(games=20, seed=0):
+    rng = random.Random(seed)
+    sample = [random_game(rng) for _ in range(games)]
+    timings = {name: benchmark(cls, sample) for name, cls in BACKENDS.items()}
+    return BACKENDS[min(timings, key=timings.get)], timings
+
+
+# The backend games use unless CONNECT4_BACKEND names another. It was the
+# fastest in the speed harness (python boards.py); CONNECT4_BACKEND=fastest
+# times every backend at import and takes the winner instead.
+DEFAULT_BACKEND = 'bitboard'
+
+
+def select_backend():
+    name = os.environ.get('CONNECT4_BACKEND') or DEFAULT_BACKEND
+    if name == 'fastest':
+        return fastest_backend()[0]
+    if name not in BACKENDS:
+        raise ValueError(f"unknown board backend {name!r}, expected one of {sorted(BACKENDS)} or 'fastest'")
+    return BACKENDS[name]
+
+
+Connect4Board = select_backend()
+
+
+if __name__ == "__main__":
+    if '--check' in sys.argv[1:]:
+        check_conformance()
+        print(f"All backends agree: {', '.join(BACKENDS)}")
+    fastest, timings = fastest_backend(games=500)
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1]):
+        print(f"{name:10} {seconds * 1000:8.1f} ms")
+    print(f"Selected: {Connect4Board.name} (fastest here: {fastest.name})")
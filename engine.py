@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+
+# Keep pygame's import banner off stdout, which carries the protocol
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from boards import Connect4Board, GRID_ROWS, GRID_COLS
+from LongTearm import LongTermAgent, SearchAborted
+
+# Line-based engine protocol, one command per line on stdin:
+#
+#   c4i                          -> id name ... / c4iok
+#   isready                      -> readyok
+#   newgame                      forget everything learned in the previous game
+#   position [startpos] [moves] 4453
+#                                columns are 1-7, 'R' moves first
+#   go [depth N] [movetime MS] [nodes N] [infinite]
+#                                -> info depth D nodes N time MS scores 1:0 2:1 ... / bestmove C
+#   stop                         finish the running search and print bestmove
+#   quit
+#
+# Scores are from the side to move's point of view, full columns are left out.
+
+ENGINE_NAME = 'Connect4 LongTermAgent'
+
+
+def parse_moves(moves):
+    board = Connect4Board()
+    player = 'R'
+    for char in moves:
+        col = ord(char) - ord('1')
+        if not board.is_valid_move(col) or board.check_winner('R') or board.check_winner('Y'):
+            raise ValueError(f"invalid move {char!r} in {moves!r}")
+        board.make_move(col, player)
+        player = 'Y' if player == 'R' else 'R'
+    return board, player
+
+
+def format_scores(scores):
+    return ' '.join(f"{col + 1}:{score}" for col, score in enumerate(scores) if score is not None)
+
+
+def best_column(scores):
+    # First column with the highest score, the same tie-break as LongTermAgent.make_move
+    best = None
+    for col, score in enumerate(scores):
+        if score is not None and (best is None or score > scores[best]):
+            best = col
+    return best
+
+
+class Engine:
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.out_lock = threading.Lock()
+        self.board, self.player = parse_moves('')
+        # Agents live as long as the process so their caches stay warm between searches
+        self.agents = {'R': LongTermAgent('R'), 'Y': LongTermAgent('Y')}
+        self.search_thread = None
+
+    def send(self, line):
+        with self.out_lock:
+            self.out.write(line + '\n')
+            self.out.flush()
+
+    def handle(self, line):
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == 'c4i':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send('c4iok')
+        elif command == 'isready':
+            self.wait()
+            self.send('readyok')
+        elif command == 'newgame':
+            self.stop()
+            self.agents = {'R': LongTermAgent('R'), 'Y': LongTermAgent('Y')}
+            self.board, self.player = parse_moves('')
+        elif command == 'position':
+            self.stop()
+            moves = ''.join(arg for arg in args if arg not in ('startpos', 'moves'))
+            try:
+                self.board, self.player = parse_moves(moves)
+            except ValueError as error:
+                self.send(f"info string {error}")
+        elif command == 'go':
+            self.stop()
+            self.go(args)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'quit':
+            self.stop()
+            return False
+        else:
+            self.send(f"info string unknown command {command}")
+        return True
+
+    def go(self, args):
+        limits = {'depth': GRID_ROWS * GRID_COLS, 'movetime': None, 'nodes': None}
+        i = 0
+        while i < len(args):
+            if args[i] in limits:
+                # A malformed limit is reported and the command ignored, the engine keeps running
+                if i + 1 == len(args) or not args[i + 1].isdigit():
+                    self.send(f"info string go {args[i]} needs a whole number")
+                    return
+                limits[args[i]] = int(args[i + 1])
+                i += 1
+            i += 1
+        depth, movetime, nodes = limits['depth'], limits['movetime'], limits['nodes']
+
+        agent = self.agents[self.player]
+        agent.new_search()
+        agent.stop_event.clear()
+        agent.nodes = 0
+        agent.max_nodes = nodes
+        agent.deadline = time.perf_counter() + movetime / 1000 if movetime is not None else None
+
+        board = self.board.copy()
+        self.search_thread = threading.Thread(target=self.search, args=(agent, board, depth), daemon=True)
+        self.search_thread.start()
+
+    def search(self, agent, board, max_depth):
+        start = time.perf_counter()
+        empty = GRID_ROWS * GRID_COLS - len(board.moves)
+        finished = board.check_winner('R') or board.check_winner('Y') or board.is_full()
+        scores = None
+        if not finished:
+            for depth in range(1, min(max_depth, empty) + 1):
+                try:
+                    scores = agent.score_moves(board, depth, scores)
+                except SearchAborted:
+                    break
+                elapsed = int((time.perf_counter() - start) * 1000)
+                self.send(f"info depth {depth} nodes {agent.nodes} time {elapsed} scores {format_scores(scores)}")
+            if scores is None:
+                # Not even depth 1 finished, fall back to the first legal column
+                scores = [0 if board.is_valid_move(col) else None for col in range(GRID_COLS)]
+        if scores is None:
+            self.send('bestmove none')
+        else:
+            self.send(f"bestmove {best_column(scores) + 1}")
+
+    def stop(self):
+        if self.search_thread is not None:
+            for agent in self.agents.values():
+                agent.stop_event.set()
+            self.wait()
+
+    def wait(self):
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+
+    def loop(self, stream=sys.stdin):
+        for line in stream:
+            if not self.handle(line.strip()):
+                break
+
+
+class EngineClient:
+    # Drives an engine process through pipes, for front-ends such as the pygame GUI
+    def __init__(self, command=None):
+        if command is None:
+            command = [sys.executable, os.path.abspath(__file__)]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1)
+        self.send('c4i')
+        self.read_until('c4iok')
+
+    def send(self, line):
+        self.process.stdin.write(line + '\n')
+        self.process.stdin.flush()
+
+    def read_until(self, prefix):
+        lines = []
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise EOFError("engine process exited")
+            line = line.strip()
+            lines.append(line)
+            if line.startswith(prefix):
+                return lines
+
+    def analyse(self, moves, depth=None, movetime=None, nodes=None):
+        self.send('position startpos moves ' + ''.join(str(col + 1) for col in moves))
+        limits = ''
+        if depth is not None:
+            limits += f" depth {depth}"
+        if movetime is not None:
+            limits += f" movetime {movetime}"
+        if nodes is not None:
+            limits += f" nodes {nodes}"
+        self.send('go' + limits)
+        lines = self.read_until('bestmove')
+
+        scores = [None] * GRID_COLS
+        for line in lines:
+            if line.startswith('info depth'):
+                tokens = line.split()
+                scores = [None] * GRID_COLS
+                for item in tokens[tokens.index('scores') + 1:]:
+                    col, score = item.split(':')
+                    scores[int(col) - 1] = int(score)
+        best = lines[-1].split()[1]
+        return (None if best == 'none' else int(best) - 1), scores
+
+    def close(self):
+        if self.process.poll() is None:
+            self.send('quit')
+            self.process.wait()
+
+
+class EngineAgent:
+    # Same interface as LongTermAgent, but the search runs in an engine process
+    def __init__(self, player, client=None, depth=3):
+        self.player = player
+        self.client = client if client is not None else EngineClient()
+        self.depth = depth
+
+    def make_move(self, board):
+        move, _ = self.client.analyse(board.moves, depth=self.depth)
+        return move
+
+
+if __name__ == "__main__":
+    Engine().loop()
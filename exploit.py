@@ -0,0 +1,186 @@
+import argparse
+import importlib
+import math
+import random
+import time
+
+from boards import Connect4Board, WindowBoard
+
+# Expectimax against the random agents. RandomAgent and ShortTermAgent pick
+# uniformly from the valid columns, so instead of assuming a perfect opponent
+# as minimax does, their moves are chance nodes averaged with equal weight,
+# and the agent plays the move with the highest estimated chance of winning.
+#
+# Values are estimated win probabilities in [0, 1]: a won game is 1 and a lost
+# or drawn one 0, but positions at the horizon get a logistic of the window
+# heuristic, so values are only exact when the search reaches the end of the
+# game. Staying in [0, 1] is what bounds every chance node:
+# after some replies are averaged, the rest can only add between 0 and their
+# weight, so a chance node stops once it cannot beat the move already found
+# (Ballard's Star1). Positions reached by different move orders are looked
+# up in a table of values and bounds instead of being searched again.
+
+ORDER = (3, 2, 4, 1, 5, 0, 6)  # Centre columns first, so good moves raise alpha early
+EXACT, LOWER, UPPER = 0, 1, 2
+LEAF_SCALE = 24.0  # Heuristic points per e-fold of the odds at the horizon
+
+
+class ExpectimaxAgent:
+    def __init__(self, player, depth=4, table_size=1 << 20):
+        self.player = player
+        self.opponent = 'R' if player == 'Y' else 'Y'
+        self.depth = depth  # Plies, counting the opponent's chance moves
+        self.table_size = table_size
+        self.table = {}  # key -> (depth, value, flag)
+        self.nodes = 0
+        self.value = None  # Estimated win probability of the last move played
+
+    def make_move(self, board):
+        # The window board keeps the heuristic up to date for the leaves
+        board = WindowBoard.from_board(board)
+        self.nodes = 0
+        best_col, best = None, -1.0
+        for col in ORDER:
+            if not board.is_valid_move(col):
+                continue
+            value = self.after_move(board, col, self.depth - 1, max(best, 0.0), 1.0)
+            if value > best:
+                best_col, best = col, value
+            if best >= 1.0:
+                break
+        self.value = best
+        return best_col
+
+    def after_move(self, board, col, depth, alpha, beta):
+        board.make_move(col, self.player)
+        if board.check_winner(self.player):
+            value = 1.0
+        elif board.is_full():
+            value = 0.0
+        else:
+            value = self.chance(board, depth, alpha, beta)
+        board.undo_move()
+        return value
+
+    def leaf(self, board):
+        # Estimated win probability past the horizon, from the window heuristic
+        score = board.heuristic()
+        if self.player == 'Y':
+            score = -score
+        return 1.0 / (1.0 + math.exp(-score / LEAF_SCALE))
+
+    def probe(self, key, depth, alpha, beta):
+        entry = self.table.get(key)
+        if entry is None or entry[0] < depth:
+            return None
+        _, value, flag = entry
+        if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+            return value
+        return None
+
+    def store(self, key, depth, value, alpha, beta):
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        flag = UPPER if value <= alpha else LOWER if value >= beta else EXACT
+        self.table[key] = (depth, value, flag)
+
+    def max_node(self, board, depth, alpha, beta):
+        # Our move: the best column
+        self.nodes += 1
+        if depth == 0:
+            return self.leaf(board)
+        key = board.key()
+        hit = self.probe(key, depth, alpha, beta)
+        if hit is not None:
+            return hit
+        best = 0.0
+        for col in ORDER:
+            if board.is_valid_move(col):
+                best = max(best, self.after_move(board, col, depth - 1, max(alpha, best), beta))
+                if best >= beta:
+                    break
+        self.store(key, depth, best, alpha, beta)
+        return best
+
+    def chance(self, board, depth, alpha, beta):
+        # The opponent's move: the average over every valid column. Returns an
+        # upper bound at most alpha or a lower bound at least beta when cut off.
+        self.nodes += 1
+        if depth == 0:
+            return self.leaf(board)
+        key = board.key()
+        hit = self.probe(key, depth, alpha, beta)
+        if hit is not None:
+            return hit
+        moves = board.get_valid_moves()
+        weight = 1.0 / len(moves)
+        total = 0.0
+        remaining = len(moves)
+        for col in moves:
+            remaining -= 1
+            board.make_move(col, self.opponent)
+            if board.check_winner(self.opponent) or board.is_full():
+                value = 0.0
+            else:
+                # The window this reply must leave to keep the average inside (alpha, beta),
+                # with the replies not yet searched at their best (1) and worst (0)
+                child_alpha = (alpha - total - remaining * weight) / weight
+                child_beta = (beta - total) / weight
+                value = self.max_node(board, depth - 1, max(child_alpha, 0.0), min(child_beta, 1.0))
+            board.undo_move()
+            total += weight * value
+            if total + remaining * weight <= alpha:
+                value = total + remaining * weight
+                self.store(key, depth, value, alpha, beta)
+                return value
+            if total >= beta:
+                self.store(key, depth, total, alpha, beta)
+                return total
+        self.store(key, depth, total, alpha, beta)
+        return total
+
+
+def match(spec, games, seed=0):
+    # spec (an agent as in try.py) against RandomAgent, alternating colours;
+    # returns the win rate, the mean plies of a won game and the seconds per move
+    make_agent = importlib.import_module('try').make_agent
+    from RandomAgents import RandomAgent
+    random.seed(seed)
+    wins = won_plies = moves = 0
+    thinking = 0.0
+    for game in range(games):
+        player = 'R' if game % 2 == 0 else 'Y'
+        agent = make_agent(spec, player)
+        opponent = RandomAgent('Y' if player == 'R' else 'R')
+        board = Connect4Board()
+        turn = 'R'
+        while not board.is_full():
+            if turn == player:
+                start = time.perf_counter()
+                col = agent.make_move(board)
+                thinking += time.perf_counter() - start
+                moves += 1
+            else:
+                col = opponent.make_move(board)
+            board.make_move(col, turn)
+            if board.check_winner(turn):
+                if turn == player:
+                    wins += 1
+                    won_plies += len(board.moves)
+                break
+            turn = 'Y' if turn == 'R' else 'R'
+    return wins / games, won_plies / max(1, wins), thinking / max(1, moves)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expectimax exploiter of the uniformly random agents")
+    parser.add_argument('--games', type=int, default=200, help="games against RandomAgent per agent")
+    parser.add_argument('--depth', type=int, default=4, help="expectimax depth in plies")
+    parser.add_argument('--compare', nargs='*', default=['longterm:3'], metavar='AGENT',
+                        help="other agents to measure the same way (try.py specs)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random opponent")
+    args = parser.parse_args()
+
+    for spec in [f'expectimax:{args.depth}'] + args.compare:
+        win_rate, plies, per_move = match(spec, args.games, seed=args.seed)
+        print(f"{spec:16} wins {win_rate:6.1%}  won in {plies:4.1f} plies  {per_move * 1000:7.1f} ms/move")
@@ -0,0 +1,37 @@
+import time
+
+import pygame
+
+# Events no game reacts to; blocking them keeps mouse movement from waking the loop
+IGNORED_EVENTS = [getattr(pygame, name) for name in
+                  ('MOUSEMOTION', 'MOUSEBUTTONUP', 'KEYUP', 'TEXTINPUT', 'TEXTEDITING', 'MOUSEWHEEL')
+                  if hasattr(pygame, name)]
+
+
+class IdleWaiter:
+    # Blocks the game loop in pygame.event.wait while it only waits for input
+    def __init__(self, timeout_ms=1000):
+        self.timeout_ms = timeout_ms
+        self.started = time.perf_counter()
+        self.idle_time = 0.0
+        self.waits = 0
+        self.wakeups = 0  # Waits that ended because something happened
+        pygame.event.set_blocked(IGNORED_EVENTS)
+
+    def wait(self):
+        start = time.perf_counter()
+        event = pygame.event.wait(self.timeout_ms)
+        self.idle_time += time.perf_counter() - start
+        self.waits += 1
+        if event.type != pygame.NOEVENT:
+            self.wakeups += 1
+            # Put the event back in front of anything that arrived since, for handle_events
+            pending = pygame.event.get()
+            pygame.event.post(event)
+            for later in pending:
+                pygame.event.post(later)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return (f"idle {self.idle_time:.1f} of {elapsed:.1f} s, {self.wakeups} wakeups "
+                f"({self.wakeups / elapsed:.2f}/s), {self.waits - self.wakeups} timeouts")
@@ -0,0 +1,139 @@
+import json
+import os
+import time
+
+import pygame
+
+# Records the input events of a game window to a file and plays them back,
+# so the GUI loops can be driven and measured without anyone at the screen.
+# One JSON object per line, seconds since the recording started:
+#
+#   {"t": 2.41, "type": "MOUSEBUTTONDOWN", "pos": [350, 120], "button": 1}
+#   {"t": 3.02, "type": "KEYDOWN", "key": 52, "mod": 0, "unicode": "4", "scancode": 33}
+#
+# Playback posts every event again just before the game's handle_events runs,
+# once the game is waiting for input, either at its recorded time or as fast
+# as the game can take it.
+
+RECORDED = {
+    'MOUSEBUTTONDOWN': ('pos', 'button'),
+    'KEYDOWN': ('key', 'mod', 'unicode', 'scancode'),
+    'QUIT': (),
+}
+
+
+class EventRecorder:
+    def __init__(self, path):
+        self.file = open(path, 'w')
+        self.started = time.perf_counter()
+        self.types = {getattr(pygame, name): name for name in RECORDED}
+
+    def attach(self, game):
+        handle_events = game.handle_events
+
+        def wrapper():
+            # Take the events off the queue to log them, then put them back for the game
+            events = pygame.event.get()
+            now = time.perf_counter() - self.started
+            for event in events:
+                name = self.types.get(event.type)
+                if name is not None:
+                    record = {'t': round(now, 4), 'type': name}
+                    for attribute in RECORDED[name]:
+                        value = getattr(event, attribute, None)
+                        record[attribute] = list(value) if isinstance(value, tuple) else value
+                    self.file.write(json.dumps(record) + '\n')
+                pygame.event.post(event)
+            self.file.flush()
+            return handle_events()
+
+        game.handle_events = wrapper
+
+    def close(self):
+        self.file.close()
+
+
+class FastClock:
+    # Stands in for pygame.time.Clock when playing back as fast as possible
+    def __init__(self):
+        self.last = time.perf_counter()
+
+    def tick(self, framerate=0):
+        now = time.perf_counter()
+        elapsed, self.last = now - self.last, now
+        return int(elapsed * 1000)
+
+
+class EventPlayer:
+    def __init__(self, path, realtime=False):
+        with open(path) as file:
+            self.events = [json.loads(line) for line in file if line.strip()]
+        self.realtime = realtime
+        self.next = 0
+        self.started = None
+
+    def attach(self, game):
+        # Attach after the profiler, so the events are queued before it looks for input
+        handle_events = game.handle_events
+        if not self.realtime:
+            game.clock = FastClock()
+            # Discs land on the next frame instead of falling for real time
+            game.view.gravity = float(1 << 40)
+        # Playback has no one to look at the end screen
+        game.exit_delay = 0
+
+        def wrapper():
+            self.post_due(game)
+            return handle_events()
+
+        game.handle_events = wrapper
+
+    def post_due(self, game):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        if self.next >= len(self.events):
+            if not game.game_over:
+                # Out of input before the game ended
+                pygame.event.post(pygame.event.Event(pygame.QUIT))
+            return
+        record = self.events[self.next]
+        if self.realtime and now - self.started < record['t']:
+            return
+        # A move is only taken while the game waits for one; one event per frame,
+        # as a person clicks
+        if record['type'] != 'QUIT' and not game.awaiting_input():
+            return
+        attributes = {name: tuple(value) if isinstance(value, list) else value
+                      for name, value in record.items() if name not in ('t', 'type')}
+        pygame.event.post(pygame.event.Event(getattr(pygame, record['type']), attributes))
+        self.next += 1
+
+
+def add_arguments(parser):
+    parser.add_argument('--record-input', metavar='PATH', help="save mouse and key input with timestamps")
+    parser.add_argument('--play-input', metavar='PATH',
+                        help="replay recorded input headlessly and print frame and move-latency metrics")
+    parser.add_argument('--realtime', action='store_true', help="replay input at its recorded times")
+
+
+def prepare(args):
+    # Call before the game opens its window: playback runs on the dummy video
+    # driver and always profiles
+    if args.play_input:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        args.profile = True
+        args.idle = False
+
+
+def setup(args, game):
+    # Call after profiling.setup
+    if args.record_input:
+        recorder = EventRecorder(args.record_input)
+        recorder.attach(game)
+        return recorder
+    if args.play_input:
+        player = EventPlayer(args.play_input, realtime=args.realtime)
+        player.attach(game)
+        return player
+    return None
@@ -2,6 +2,8 @@ import pygame
 import sys
 import random
 
+from boards import Connect4Board
+
 # Constants
 ROWS = 6
 COLS = 7
@@ -10,6 +12,9 @@ PLAYER1 = 1
 PLAYER2 = 2
 WINNING_LENGTH = 4
 
+# Players 1 and 2 are stored as 'R' and 'Y' on the shared board
+PIECES = {PLAYER1: 'R', PLAYER2: 'Y'}
+
 # Initialize Pygame
 pygame.init()
 
@@ -20,7 +25,7 @@ YELLOW = (255, 255, 0)
 BLUE = (0, 0, 255)
 
 # Create the game board
-board = [[EMPTY] * COLS for _ in range(ROWS)]
+board = Connect4Board()
 
 # Initialize Pygame window
 SQUARE_SIZE = 100
@@ -36,51 +41,29 @@ def draw_board():
             pygame.draw.rect(screen, WHITE, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
             pygame.draw.circle(screen, BLUE, (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 2 - 5)
 
+    grid = board.grid
     for row in range(ROWS):
         for col in range(COLS):
-            if board[row][col] == PLAYER1:
+            if grid[row][col] == PIECES[PLAYER1]:
                 pygame.draw.circle(screen, RED, (col * SQUARE_SIZE + SQUARE_SIZE // 2, (row + 1) * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 2 - 5)
-            elif board[row][col] == PLAYER2:
+            elif grid[row][col] == PIECES[PLAYER2]:
                 pygame.draw.circle(screen, YELLOW, (col * SQUARE_SIZE + SQUARE_SIZE // 2, (row + 1) * SQUARE_SIZE + SQUARE_SIZE // 2), SQUARE_SIZE // 2 - 5)
 
     pygame.display.flip()
 
 def is_valid_move(column):
-    return 0 <= column < COLS and board[0][column] == EMPTY
+    return board.is_valid_move(column)
 
 def drop_piece(column, player):
-    for row in range(ROWS - 1, -1, -1):
-        if board[row][column] == EMPTY:
-            board[row][column] = player
-            return row
+    board.make_move(column, PIECES[player])
+    # The new disc is the topmost one in its column
+    return next(row for row in range(ROWS) if board.cell(row, column) != ' ')
 
 def check_winner(row, col, player):
-    # Check horizontally
-    for c in range(col - WINNING_LENGTH + 1, col + 1):
-        if 0 <= c < COLS and board[row][c] == player:
-            return True
-
-    # Check vertically
-    for r in range(row - WINNING_LENGTH + 1, row + 1):
-        if 0 <= r < ROWS and board[r][col] == player:
-            return True
-
-    # Check diagonally (bottom-left to top-right)
-    for i in range(WINNING_LENGTH):
-        r, c = row - i, col + i
-        if 0 <= r < ROWS and 0 <= c < COLS and board[r][c] == player:
-            return True
-
-    # Check diagonally (top-left to bottom-right)
-    for i in range(WINNING_LENGTH):
-        r, c = row + i, col + i
-        if 0 <= r < ROWS and 0 <= c < COLS and board[r][c] == player:
-            return True
-
-    return False
+    return board.check_winner(PIECES[player])
 
 def is_board_full():
-    return all(cell != EMPTY for row in board for cell in row)
+    return board.is_full()
 
 def get_column_from_mouse_click(pos):
     return pos[0] // SQUARE_SIZE
@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import math
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+from boards import Connect4Board, GRID_ROWS, GRID_COLS, COLUMN_BITS, RED_BITS
+
+# N-tuple evaluator: each tuple is a fixed list of cells, and the contents of
+# those cells (empty, R or Y) index a lookup table of weights. The value of a
+# position is tanh of the summed weights, from R's point of view. Tables are
+# trained by TD(0) on self-play games and stored as a .npy file that is
+# memory-mapped when loaded.
+
+TUPLE_LENGTH = 6
+
+
+def make_tuples():
+    tuples = []
+    # 2x3 and 3x2 rectangles
+    for height, width in ((2, 3), (3, 2)):
+        for row in range(GRID_ROWS - height + 1):
+            for col in range(GRID_COLS - width + 1):
+                tuples.append([(row + r) * GRID_COLS + col + c for r in range(height) for c in range(width)])
+    # Straight lines of six cells: rows, columns and the long diagonals
+    for row in range(GRID_ROWS):
+        for col in range(GRID_COLS - 5):
+            tuples.append([row * GRID_COLS + col + i for i in range(6)])
+    for col in range(GRID_COLS):
+        tuples.append([i * GRID_COLS + col for i in range(6)])
+    for col in range(GRID_COLS - 5):
+        tuples.append([i * GRID_COLS + col + i for i in range(6)])
+        tuples.append([(5 - i) * GRID_COLS + col + i for i in range(6)])
+    return np.array(tuples, dtype=np.int64)
+
+
+TUPLES = make_tuples()
+TABLE_SIZE = 3 ** TUPLE_LENGTH
+OFFSETS = np.arange(len(TUPLES), dtype=np.int64) * TABLE_SIZE
+POWERS = 3 ** np.arange(TUPLE_LENGTH, dtype=np.int64)
+# Bit of every cell (row-major, top row first) in the board key
+BIT_POS = np.array([col * COLUMN_BITS + GRID_ROWS - 1 - row
+                    for row in range(GRID_ROWS) for col in range(GRID_COLS)], dtype=np.int64)
+# Cell order of the left-right mirror image
+MIRROR = np.array([row * GRID_COLS + GRID_COLS - 1 - col
+                   for row in range(GRID_ROWS) for col in range(GRID_COLS)], dtype=np.int64)
+KEY_BYTES = (2 * RED_BITS + 7) // 8
+
+# KEY_MATRIX @ (bits of the board key) gives every tuple's index in one BLAS
+# product, which is far cheaper than gathering cells one tuple at a time
+KEY_MATRIX = np.zeros((len(TUPLES), KEY_BYTES * 8))
+for _t, _cells in enumerate(TUPLES):
+    KEY_MATRIX[_t, BIT_POS[_cells]] += POWERS
+    KEY_MATRIX[_t, RED_BITS + BIT_POS[_cells]] += 2 * POWERS
+
+
+def table_indices(cells):
+    # cells has shape (..., 42); returns the flat weight index of every tuple
+    return cells[..., TUPLES] @ POWERS + OFFSETS
+
+
+class NTupleEvaluator:
+    def __init__(self, weights):
+        self.weights = weights
+        self.digest = None
+
+    def fingerprint(self):
+        # Short digest of the weights, so caches tell different tables apart
+        if self.digest is None:
+            self.digest = hashlib.sha1(np.ascontiguousarray(self.weights).tobytes()).hexdigest()[:12]
+        return self.digest
+
+    @classmethod
+    def load(cls, path):
+        # A plain view of the mapping indexes faster than the np.memmap subclass
+        weights = np.load(path, mmap_mode='r').view(np.ndarray)
+        if weights.shape != (len(TUPLES) * TABLE_SIZE,):
+            raise ValueError(f"{path} holds {weights.shape} weights, expected {len(TUPLES) * TABLE_SIZE}")
+        return cls(weights)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(len(TUPLES) * TABLE_SIZE, dtype=np.float32))
+
+    def save(self, path):
+        np.save(path, np.asarray(self.weights, dtype=np.float32))
+
+    def value(self, board):
+        bits = np.unpackbits(np.frombuffer(board.key().to_bytes(KEY_BYTES, 'little'), dtype=np.uint8),
+                             bitorder='little')
+        indices = (KEY_MATRIX @ bits).astype(np.int64) + OFFSETS
+        return math.tanh(self.weights[indices].sum())
+
+
+def play_self_game(weights, epsilon, seed):
+    # One epsilon-greedy game where both sides pick the move with the best one-ply value
+    rng = random.Random(seed)
+    evaluator = NTupleEvaluator(weights)
+    board = Connect4Board()
+    player = 'R'
+    winner = None
+    while not board.is_full():
+        moves = board.get_valid_moves()
+        if rng.random() < epsilon:
+            col = rng.choice(moves)
+        else:
+            best = None
+            for move in moves:
+                board.make_move(move, player)
+                if board.check_winner(player):
+                    value = 2.0
+                else:
+                    value = evaluator.value(board) * (1 if player == 'R' else -1)
+                board.undo_move()
+                if best is None or value > best[0]:
+                    best = (value, move)
+            col = best[1]
+        board.make_move(col, player)
+        if board.check_winner(player):
+            winner = player
+            break
+        player = 'Y' if player == 'R' else 'R'
+    return board.moves, winner
+
+
+# Weights of a training run, shared with every worker process once when the pool starts
+# and updated in place between batches, instead of pickled into every game's job
+shared_weights = None
+
+
+def init_worker(shared):
+    global shared_weights
+    shared_weights = np.frombuffer(shared, dtype=np.float32)
+
+
+def play_shared_game(epsilon, seed):
+    return play_self_game(shared_weights, epsilon, seed)
+
+
+def game_positions(moves):
+    # Cell arrays of every position after a move, plus their mirror images
+    cells = np.zeros((len(moves), GRID_ROWS * GRID_COLS), dtype=np.int64)
+    heights = [0] * GRID_COLS
+    current = np.zeros(GRID_ROWS * GRID_COLS, dtype=np.int64)
+    for ply, col in enumerate(moves):
+        current[(GRID_ROWS - 1 - heights[col]) * GRID_COLS + col] = 1 if ply % 2 == 0 else 2
+        heights[col] += 1
+        cells[ply] = current
+    return cells, cells[:, MIRROR]
+
+
+def td_update(weights, games, alpha):
+    # Batched TD(0): every position moves towards the value of the next one,
+    # the last position towards the result
+    indices = []
+    values = []
+    targets = []
+    for moves, winner in games:
+        reward = {'R': 1.0, 'Y': -1.0, None: 0.0}[winner]
+        for cells in game_positions(moves):
+            idx = table_indices(cells)
+            value = np.tanh(weights[idx].sum(axis=1))
+            indices.append(idx)
+            values.append(value)
+            targets.append(np.append(value[1:], reward))
+    idx = np.concatenate(indices)
+    values = np.concatenate(values)
+    target = np.concatenate(targets)
+    delta = (alpha * (target - values) * (1 - values ** 2)).astype(np.float32)
+    np.add.at(weights, idx, delta[:, None])
+    return float(np.mean(np.abs(target - values)))
+
+
+def train(games, out, workers=None, batch=200, alpha=0.01, epsilon=0.1, seed=0, resume=None):
+    evaluator = NTupleEvaluator.load(resume) if resume else NTupleEvaluator.empty()
+    shared = multiprocessing.RawArray('f', evaluator.weights.size)
+    weights = np.frombuffer(shared, dtype=np.float32)
+    weights[:] = evaluator.weights
+    played = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(shared,)) as pool:
+        while played < games:
+            # The workers are idle between batches, so updating the weights in place is safe
+            count = min(batch, games - played)
+            jobs = [(epsilon, seed + played + i) for i in range(count)]
+            results = pool.starmap(play_shared_game, jobs, chunksize=max(1, count // (4 * (workers or 4))))
+            error = td_update(weights, results, alpha)
+            played += count
+            red = sum(1 for _, winner in results if winner == 'R')
+            print(f"{played:>7} games  td error {error:.3f}  R wins {red / count:.0%}  "
+                  f"{played / (time.perf_counter() - start):.0f} games/s")
+    NTupleEvaluator(weights).save(out)
+    print(f"Saved {weights.nbytes // 1024} KB of weights to {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train n-tuple tables by TD learning from self-play")
+    parser.add_argument('--games', type=int, default=20000, help="self-play games to train on")
+    parser.add_argument('--out', default='ntuple.npy', help="weights file to write")
+    parser.add_argument('--resume', metavar='PATH', help="continue from an existing weights file")
+    parser.add_argument('--workers', type=int, default=None, help="game generation processes")
+    parser.add_argument('--batch', type=int, default=200, help="games per weight update")
+    parser.add_argument('--alpha', type=float, default=0.01, help="learning rate")
+    parser.add_argument('--epsilon', type=float, default=0.1, help="share of random exploration moves")
+    args = parser.parse_args()
+
+    train(args.games, args.out, workers=args.workers, batch=args.batch, alpha=args.alpha,
+          epsilon=args.epsilon, resume=args.resume)
@@ -0,0 +1,132 @@
+import argparse
+import sys
+import time
+
+from boards import BACKENDS, Connect4Board, GRID_COLS
+
+# Perft: walks every move sequence to a fixed depth over the board API and
+# counts the positions reached at each ply, and how many of them are wins.
+# Won and full positions are leaves and are not expanded further.
+
+# (positions, wins) at plies 1..8 from the empty board
+REFERENCE = [
+    (7, 0),
+    (49, 0),
+    (343, 0),
+    (2401, 0),
+    (16807, 0),
+    (117649, 0),
+    (823536, 13032),
+    (5673234, 44430),
+]
+
+
+def setup(cls, moves):
+    # Board of the given backend after the columns in moves ('4453', 1-7, R first)
+    board = cls()
+    player = 'R'
+    for char in moves:
+        col = ord(char) - ord('1')
+        if not board.is_valid_move(col) or board.check_winner('R') or board.check_winner('Y'):
+            raise ValueError(f"invalid move {char!r} in {moves!r}")
+        board.make_move(col, player)
+        player = 'Y' if player == 'R' else 'R'
+    return board, player
+
+
+def perft(board, depth, player):
+    # Returns [(positions, wins)] for every ply 1..depth below board
+    positions = [0] * depth
+    wins = [0] * depth
+    other = {'R': 'Y', 'Y': 'R'}
+
+    def walk(ply, player):
+        for col in range(GRID_COLS):
+            if not board.is_valid_move(col):
+                continue
+            board.make_move(col, player)
+            positions[ply] += 1
+            if board.check_winner(player):
+                wins[ply] += 1
+            elif ply + 1 < depth and not board.is_full():
+                walk(ply + 1, other[player])
+            board.undo_move()
+
+    if depth > 0 and not board.check_winner(other[player]) and not board.is_full():
+        walk(0, player)
+    return list(zip(positions, wins))
+
+
+def divide(board, depth, player):
+    # Positions at the last ply below every column, the first place to look when counts differ
+    counts = {}
+    other = 'Y' if player == 'R' else 'R'
+    for col in range(GRID_COLS):
+        if not board.is_valid_move(col):
+            continue
+        board.make_move(col, player)
+        if depth <= 1:
+            counts[col] = 1
+        elif board.check_winner(player) or board.is_full():
+            counts[col] = 0
+        else:
+            counts[col] = perft(board, depth - 1, other)[-1][0]
+        board.undo_move()
+    return counts
+
+
+def check(depth=7, backends=None):
+    # Compares every backend against the reference counts
+    for cls in (backends or BACKENDS).values():
+        board, player = setup(cls, '')
+        counts = perft(board, depth, player)
+        for ply, (got, expected) in enumerate(zip(counts, REFERENCE), 1):
+            assert got == expected, (cls.name, ply, got, expected)
+        assert board.moves == [] and board.key() == 0, cls.name
+    return True
+
+
+def speed(depth=6, moves=''):
+    # Positions per second of every backend
+    results = {}
+    for name, cls in BACKENDS.items():
+        board, player = setup(cls, moves)
+        start = time.perf_counter()
+        counts = perft(board, depth, player)
+        elapsed = time.perf_counter() - start
+        results[name] = (sum(positions for positions, _ in counts), elapsed)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count move sequences to check and time the board backends")
+    parser.add_argument('depth', type=int, nargs='?', help="plies to search (default 6, 7 for --check)")
+    parser.add_argument('--moves', default='', help="start position as columns 1-7, R first")
+    parser.add_argument('--divide', action='store_true', help="show the leaf count below every column")
+    parser.add_argument('--check', action='store_true', help="check all backends against the reference counts")
+    parser.add_argument('--speed', action='store_true', help="report positions per second of every backend")
+    args = parser.parse_args()
+
+    if args.check:
+        depth = min(args.depth or 7, len(REFERENCE))
+        check(depth)
+        print(f"Reference counts match to ply {depth}: {', '.join(BACKENDS)}")
+        sys.exit()
+    if args.depth is None:
+        args.depth = 6
+    if args.speed:
+        for name, (positions, elapsed) in sorted(speed(args.depth, args.moves).items(), key=lambda item: item[1][1]):
+            print(f"{name:10} {positions:>10} positions {elapsed:8.2f} s {positions / elapsed:>12,.0f} positions/s")
+        sys.exit()
+
+    board, player = setup(Connect4Board, args.moves)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, args.depth, player)
+        for col, leaves in counts.items():
+            print(f"{col + 1}: {leaves}")
+        print(f"total {sum(counts.values())}")
+    else:
+        for ply, (positions, wins) in enumerate(perft(board, args.depth, player), 1):
+            print(f"ply {ply}: {positions} positions, {wins} wins")
+    print(f"{time.perf_counter() - start:.2f} s ({Connect4Board.name})")
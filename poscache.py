@@ -0,0 +1,83 @@
+import sqlite3
+import sys
+import time
+
+# Searched positions kept on disk between runs. SQLite in WAL mode lets any
+# number of processes read while one writes, and only appends pages as it grows.
+# Entries are keyed by position and by the configuration of the agent that
+# searched them (search, evaluator), since agents score the same position
+# differently.
+
+KEY_BYTES = 13  # Board keys use 98 bits
+
+
+class PositionCache:
+    def __init__(self, path, max_entries=1_000_000, min_depth=4):
+        self.path = path
+        self.max_entries = max_entries
+        self.min_depth = min_depth  # Shallower results are cheaper to search again than to store
+
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS positions ('
+            'key BLOB, config TEXT, depth INTEGER, score INTEGER, best_move INTEGER, stamp REAL, '
+            'PRIMARY KEY (key, config))')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS positions_stamp ON positions (stamp)')
+
+        self.lookups = 0
+        self.hits = 0
+        self.writes = 0
+
+    def lookup(self, key, config, depth):
+        # Score and best move of a search at least this deep by an agent with this
+        # configuration, or None. The score is whatever that agent's search returned.
+        self.lookups += 1
+        row = self.connection.execute(
+            'SELECT score, best_move FROM positions WHERE key = ? AND config = ? AND depth >= ?',
+            (key.to_bytes(KEY_BYTES, 'big'), config, depth)).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return row
+
+    def store(self, key, config, depth, score, best_move):
+        if depth < self.min_depth:
+            return
+        # Keep whichever result is deeper
+        self.connection.execute(
+            'INSERT INTO positions (key, config, depth, score, best_move, stamp) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (key, config) DO UPDATE SET depth = excluded.depth, score = excluded.score, '
+            'best_move = excluded.best_move, stamp = excluded.stamp WHERE excluded.depth > positions.depth',
+            (key.to_bytes(KEY_BYTES, 'big'), config, depth, score, best_move, time.time()))
+        self.writes += 1
+        if self.writes % 256 == 0:
+            self.evict()
+
+    def evict(self):
+        # Drop the oldest results once the cache is over its size
+        count = len(self)
+        if count > self.max_entries:
+            self.connection.execute(
+                'DELETE FROM positions WHERE rowid IN (SELECT rowid FROM positions ORDER BY stamp LIMIT ?)',
+                (count - self.max_entries,))
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+
+    def stats(self):
+        rate = self.hits / self.lookups if self.lookups else 0
+        return f"position cache {self.path}: {self.hits}/{self.lookups} hits ({rate:.1%}), {self.writes} writes"
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    cache = PositionCache(sys.argv[1])
+    depths = cache.connection.execute(
+        'SELECT config, depth, COUNT(*) FROM positions GROUP BY config, depth ORDER BY config, depth').fetchall()
+    print(f"{len(cache)} positions")
+    for config, depth, count in depths:
+        print(f"{config} depth {depth:>2}: {count}")
@@ -0,0 +1,260 @@
+import argparse
+import os
+import sqlite3
+import time
+
+from boards import GRID_ROWS, GRID_COLS
+from records import parse_game
+
+# Every position seen in a set of game records, stored once in SQLite however
+# many games pass through it, with the moves played from it. A position is an
+# integer key: 7 bits per column, a marker bit above the top disc and a 1 for
+# every R disc below it. A position and its left-right mirror image share the
+# smaller of their two keys, and moves from a mirrored position are stored
+# mirrored too.
+#
+#   positions: key -> games, R wins, Y wins, draws
+#   moves:     (parent key, column) -> games, R wins, Y wins, draws
+#
+# Games are counted in batches in memory and added with one upsert per
+# distinct position or move. How far every record file was read is stored as
+# well, so building again only adds the games appended since. Malformed
+# records are skipped and counted instead of stopping the build.
+
+COLUMN_SHIFT = GRID_ROWS + 1
+EMPTY = sum(1 << (col * COLUMN_SHIFT) for col in range(GRID_COLS))
+RESULT_COLUMN = {'R': 1, 'Y': 2, 'D': 3}  # Offset of the result in a count list; '?' only counts the game
+
+
+def mirror_col(col):
+    return GRID_COLS - 1 - col
+
+
+def start():
+    # Keys of the empty board and of its mirror image
+    return EMPTY, EMPTY
+
+
+def play(key, mirrored, heights, col, red):
+    # Keys after a disc at heights[col]: the marker moves up a cell and an R disc leaves a 1 behind
+    step = (1 + red) << heights[col]
+    return key + (step << (col * COLUMN_SHIFT)), mirrored + (step << (mirror_col(col) * COLUMN_SHIFT))
+
+
+def canonical(key, mirrored, col=None):
+    # Stored key and, if given, the column as stored from it
+    if mirrored < key:
+        return mirrored, None if col is None else mirror_col(col)
+    if mirrored == key and col is not None:
+        # A symmetric position: both mirror columns lead to the same place
+        return key, min(col, mirror_col(col))
+    return key, col
+
+
+def walk(moves):
+    # Canonical keys of every position of a game after the first, with the move
+    # played to it and the key it was played from
+    key, mirrored = start()
+    heights = [0] * GRID_COLS
+    for ply, col in enumerate(moves):
+        if not 0 <= col < GRID_COLS or heights[col] == GRID_ROWS:
+            raise ValueError(f"invalid move {col + 1}")
+        parent, stored = canonical(key, mirrored, col)
+        key, mirrored = play(key, mirrored, heights, col, ply % 2 == 0)
+        heights[col] += 1
+        yield parent, stored, canonical(key, mirrored)[0]
+
+
+def position_keys(moves):
+    # Keys of the position after moves and of its mirror image, and the column heights
+    key, mirrored = start()
+    heights = [0] * GRID_COLS
+    for ply, col in enumerate(moves):
+        if not 0 <= col < GRID_COLS or heights[col] == GRID_ROWS:
+            raise ValueError(f"invalid move {col + 1}")
+        key, mirrored = play(key, mirrored, heights, col, ply % 2 == 0)
+        heights[col] += 1
+    return key, mirrored, heights
+
+
+class PositionDatabase:
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS positions ('
+            'key INTEGER PRIMARY KEY, games INTEGER, red INTEGER, yellow INTEGER, draws INTEGER)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS moves ('
+            'parent INTEGER, col INTEGER, games INTEGER, red INTEGER, yellow INTEGER, '
+            'draws INTEGER, PRIMARY KEY (parent, col)) WITHOUT ROWID')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, offset INTEGER)')
+        # Totals for the size report: every position of every game, as stored per game
+        self.connection.execute('CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER)')
+
+    def total(self, name):
+        row = self.connection.execute('SELECT value FROM totals WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def add_games(self, games, source=None):
+        # games: (moves, result) pairs; every position and move is counted once per game.
+        # source is the (path, offset) reached, saved in the same transaction as the counts.
+        # Returns the number of malformed games skipped.
+        positions = {}
+        edges = {}
+        occurrences = 0
+        added = skipped = 0
+        for moves, result in games:
+            try:
+                if result not in RESULT_COLUMN and result != '?':
+                    raise ValueError(f"unknown result {result!r}")
+                steps = list(walk(moves))
+            except ValueError:
+                skipped += 1
+                continue
+            added += 1
+            column = RESULT_COLUMN.get(result)
+            counts = positions.setdefault(EMPTY, [0, 0, 0, 0])
+            counts[0] += 1
+            if column:
+                counts[column] += 1
+            for parent, col, child in steps:
+                counts = positions.setdefault(child, [0, 0, 0, 0])
+                counts[0] += 1
+                edge = edges.setdefault((parent, col), [0, 0, 0, 0])
+                edge[0] += 1
+                if column:
+                    counts[column] += 1
+                    edge[column] += 1
+            occurrences += len(moves) + 1
+        # Sorted keys keep the B-tree writes local
+        with self.connection:
+            self.connection.execute('BEGIN')
+            self.connection.executemany(
+                'INSERT INTO positions VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                'games = games + excluded.games, red = red + excluded.red, yellow = yellow + excluded.yellow, '
+                'draws = draws + excluded.draws',
+                ((key, *positions[key]) for key in sorted(positions)))
+            self.connection.executemany(
+                'INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (parent, col) DO UPDATE SET '
+                'games = games + excluded.games, red = red + excluded.red, yellow = yellow + excluded.yellow, '
+                'draws = draws + excluded.draws',
+                ((*edge, *edges[edge]) for edge in sorted(edges)))
+            self.connection.executemany(
+                'INSERT INTO totals VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+                (('games', added), ('occurrences', occurrences), ('skipped', skipped)))
+            if source is not None:
+                self.connection.execute(
+                    'INSERT INTO sources VALUES (?, ?) ON CONFLICT (path) DO UPDATE SET offset = excluded.offset',
+                    source)
+        return skipped
+
+    def build(self, path, batch=50000):
+        # Adds the complete lines of a record file not read before; returns the games
+        # added and the malformed ones skipped
+        name = os.path.abspath(path)
+        row = self.connection.execute('SELECT offset FROM sources WHERE path = ?', (name,)).fetchone()
+        offset = row[0] if row else 0
+        added = skipped = 0
+        with open(path, 'rb') as file:
+            file.seek(offset)
+            games = []
+            while True:
+                line = file.readline()
+                if line.endswith(b'\n'):
+                    offset += len(line)
+                    if line.strip():
+                        games.append(parse_game(line.decode(errors='replace')))
+                if len(games) == batch or not line.endswith(b'\n'):
+                    # A line without a newline is still being written, and is left for next time
+                    bad = self.add_games(games, (name, offset))
+                    added += len(games) - bad
+                    skipped += bad
+                    games = []
+                    if not line.endswith(b'\n'):
+                        return added, skipped
+
+    def lookup(self, moves):
+        # (games, R wins, Y wins, draws) of the position after moves, or None if never seen
+        key, _ = canonical(*position_keys(moves)[:2])
+        return self.connection.execute(
+            'SELECT games, red, yellow, draws FROM positions WHERE key = ?', (key,)).fetchone()
+
+    def continuations(self, moves):
+        # Every move seen after moves, most played first: (columns, games, R wins, Y wins,
+        # draws, games through the resulting position from any move order). columns
+        # holds both mirror columns when the position is symmetric.
+        key, mirrored, heights = position_keys(moves)
+        parent, _ = canonical(key, mirrored)
+        rows = self.connection.execute(
+            'SELECT col, games, red, yellow, draws FROM moves WHERE parent = ? ORDER BY games DESC',
+            (parent,)).fetchall()
+        results = []
+        for col, *counts in rows:
+            if mirrored < key:
+                columns = (mirror_col(col),)
+            elif mirrored == key and col != mirror_col(col):
+                columns = (col, mirror_col(col))
+            else:
+                columns = (col,)
+            child, _ = canonical(*play(key, mirrored, heights, columns[0], len(moves) % 2 == 0))
+            reached = self.connection.execute('SELECT games FROM positions WHERE key = ?', (child,)).fetchone()[0]
+            results.append((columns, *counts, reached))
+        return results
+
+    def report(self):
+        count = lambda table: self.connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        positions, edges = count('positions'), count('moves')
+        games, occurrences = self.total('games'), self.total('occurrences')
+        self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size = os.path.getsize(self.path)
+        skipped = self.total('skipped')
+        lines = [f"{games} games, {occurrences} positions played, {positions} distinct positions, {edges} moves"
+                 + (f", {skipped} malformed records skipped" if skipped else ''),
+                 f"  every stored position was played {occurrences / max(1, positions):.1f} times on average"]
+        if occurrences:
+            # Per game storage keeps a row for every position of every game, at the same bytes per row
+            per_game = occurrences * size / (positions + edges)
+            lines.append(f"  database {size / 2 ** 20:.1f} MB in {positions + edges} rows; per game storage would "
+                         f"need {occurrences} rows, about {per_game / 2 ** 20:.1f} MB ({size / per_game:.1%})")
+        sources = self.connection.execute('SELECT path, offset FROM sources').fetchall()
+        raw = sum(offset for _, offset in sources)
+        if raw:
+            lines.append(f"  record files {raw / 2 ** 20:.1f} MB")
+        return '\n'.join(lines)
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build and query a database of the positions in game records")
+    parser.add_argument('paths', nargs='*', help="game record files to add (only new games are read)")
+    parser.add_argument('--db', default='positions.sqlite', help="database file")
+    parser.add_argument('--query', metavar='MOVES',
+                        help="list the moves seen after MOVES (1-based, '' for the start position)")
+    args = parser.parse_args()
+
+    database = PositionDatabase(args.db)
+    for path in args.paths:
+        start_time = time.perf_counter()
+        added, skipped = database.build(path)
+        elapsed = time.perf_counter() - start_time
+        print(f"{path}: added {added} games in {elapsed:.1f} s ({added / max(elapsed, 1e-9):.0f} games/s)"
+              + (f", skipped {skipped} malformed records" if skipped else ''))
+    if args.query is not None:
+        moves = [ord(char) - ord('1') for char in args.query]
+        seen = database.lookup(moves)
+        if seen is None:
+            print("position not seen")
+        else:
+            games, red, yellow, draws = seen
+            print(f"{games} games: R {red / games:.1%}  Y {yellow / games:.1%}  D {draws / games:.1%}")
+            for columns, games, red, yellow, draws, reached in database.continuations(moves):
+                print(f"  {'/'.join(str(col + 1) for col in columns):>4} {games:8} games  R {red / games:.1%}  "
+                      f"Y {yellow / games:.1%}  D {draws / games:.1%}  (position reached {reached} times)")
+    else:
+        print(database.report())
+    database.close()
@@ -0,0 +1,152 @@
+import atexit
+import time
+from collections import deque
+
+import pygame
+
+# Frame-time and input-latency profiling for the Connect4Game loops. The
+# profiler wraps a game's handle_events, update and draw, keeps the last
+# frames in a ring buffer and prints a summary when the process exits.
+
+PHASES = ('handle_events', 'update', 'draw')
+HISTOGRAM_EDGES_MS = (1, 2, 4, 8, 16, 33, 66, 133, 266, 533, 1066)
+INPUT_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class FrameProfiler:
+    def __init__(self, size=2048, overlay=False):
+        self.frames = deque(maxlen=size)  # (frame time, handle_events, update, draw) in seconds
+        self.latencies = deque(maxlen=size)  # Input event to the disc being drawn
+        self.overlay = overlay
+        self.font = None
+        self.game = None
+
+        self.frame_start = None
+        self.phase_times = {}
+        self.pending_input = None
+        self.moves_at_input = 0
+
+    def attach(self, game):
+        self.game = game
+        for phase in PHASES:
+            setattr(game, phase, self.timed(phase, getattr(game, phase)))
+
+    def timed(self, phase, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            if phase == 'handle_events':
+                self.begin_frame(start)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.phase_times[phase] = end - start
+                if phase == 'draw':
+                    self.end_frame(end)
+        return wrapper
+
+    def begin_frame(self, now):
+        if self.frame_start is not None:
+            self.frames.append((now - self.frame_start,) + tuple(self.phase_times.get(phase, 0.0) for phase in PHASES))
+        self.frame_start = now
+        self.phase_times = {}
+        # Events are still queued here, so this is the earliest the game can see them
+        if self.pending_input is None and pygame.event.peek(INPUT_EVENTS):
+            self.pending_input = now
+            self.moves_at_input = len(self.game.board.moves)
+
+    def end_frame(self, now):
+        if self.pending_input is not None:
+            moves = len(self.game.board.moves)
+            if moves != self.moves_at_input:
+                self.latencies.append(now - self.pending_input)
+                self.pending_input = None
+            elif self.frame_start - self.pending_input > 5:
+                self.pending_input = None  # The input never played a move
+        if self.overlay:
+            self.draw_overlay()
+
+    def draw_overlay(self):
+        if self.font is None:
+            self.font = pygame.font.Font(None, 24)
+        frame_times = [frame[0] for frame in self.frames]
+        busy_times = [sum(frame[1:]) for frame in self.frames]
+        fps = len(frame_times) / sum(frame_times) if frame_times else 0.0
+        text = self.font.render(
+            f"{fps:5.1f} fps  p50 {percentile(busy_times, 0.5) * 1000:.1f} ms  "
+            f"p99 {percentile(busy_times, 0.99) * 1000:.1f} ms", True, (0, 0, 0), (220, 220, 220))
+        screen = pygame.display.get_surface()
+        rect = screen.blit(text, (4, 4))
+        pygame.display.update(rect)
+
+    def summary(self):
+        lines = [f"Profiled {len(self.frames)} frames"]
+        if self.frames:
+            frame_times = [frame[0] for frame in self.frames]
+            lines.append(f"  {'phase':14} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+            for i, name in enumerate(('frame',) + PHASES):
+                times = [frame[i] for frame in self.frames]
+                lines.append(f"  {name:14} {percentile(times, 0.5) * 1000:8.2f} "
+                             f"{percentile(times, 0.99) * 1000:8.2f} {max(times) * 1000:8.2f}")
+            lines.append(f"  fps {len(frame_times) / sum(frame_times):.1f}")
+            lines.append("  frame time histogram:")
+            lines.extend(self.histogram(frame_times))
+        if self.latencies:
+            latencies = list(self.latencies)
+            lines.append(f"  input to disc: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+                         f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms over {len(latencies)} moves")
+        return '\n'.join(lines)
+
+    def histogram(self, times, width=40):
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for seconds in times:
+            ms = seconds * 1000
+            bucket = 0
+            while bucket < len(HISTOGRAM_EDGES_MS) and ms >= HISTOGRAM_EDGES_MS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        lines = []
+        labels = [f"< {HISTOGRAM_EDGES_MS[0]}"] + [f"{low}-{high}" for low, high in
+                                                   zip(HISTOGRAM_EDGES_MS, HISTOGRAM_EDGES_MS[1:])]
+        labels.append(f">= {HISTOGRAM_EDGES_MS[-1]}")
+        for label, count in zip(labels, counts):
+            if count:
+                bar = '#' * max(1, count * width // len(times))
+                lines.append(f"    {label:>11} ms {count:6} {bar}")
+        return lines
+
+
+def add_arguments(parser):
+    parser.add_argument('--profile', action='store_true', help="record frame and input-latency timings")
+    parser.add_argument('--profile-overlay', action='store_true', help="show FPS and frame times on screen")
+    parser.add_argument('--profile-cprofile', metavar='PATH', help="also save a cProfile capture to PATH")
+
+
+def setup(args, game):
+    # Attaches the profilers requested on the command line; results are printed at exit
+    profiler = None
+    if args.profile or args.profile_overlay:
+        profiler = FrameProfiler(overlay=args.profile_overlay)
+        profiler.attach(game)
+        atexit.register(lambda: print(profiler.summary()))
+    if args.profile_cprofile:
+        import cProfile
+        import pstats
+
+        capture = cProfile.Profile()
+
+        def save():
+            capture.disable()
+            capture.dump_stats(args.profile_cprofile)
+            pstats.Stats(capture).sort_stats('cumulative').print_stats(15)
+
+        atexit.register(save)
+        capture.enable()
+    return profiler
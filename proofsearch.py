@@ -0,0 +1,277 @@
+import argparse
+import random
+import time
+
+from boards import Connect4Board
+
+# Depth-first proof-number search (df-pn) for forced wins. Every position
+# has a proof number, the fewest unresolved positions that still have to be
+# won to prove the attacker wins, and a disproof number, the fewest whose
+# failure shows the attacker does not. The search always extends the most
+# proving position, so narrow forcing lines are proved long before an
+# alpha-beta search reaches their depth.
+#
+# The numbers live in a bounded table keyed by position. When it is full,
+# the half holding the least search work is dropped, except for settled
+# positions, which the winning line is read from. Draws count as not won,
+# so a loss is proved by a second search with the opponent attacking.
+
+WIN, LOSS, UNKNOWN = 'win', 'loss', 'unknown'
+INFINITY = 10 ** 9
+EPSILON = 0.25  # Children get 1 + EPSILON times the second best number, so the search switches branches less often
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class ProofSearch:
+    def __init__(self, table_size=1 << 18):
+        self.table_size = table_size
+        # One table per attacker: key -> (proof, disproof, work)
+        self.tables = {'R': {}, 'Y': {}}
+        self.nodes = 0
+        self.max_nodes = None
+        self.deadline = None
+
+    def prove(self, board, player, max_nodes=None, deadline=None):
+        # Result for player, who is to move, and the line played to it: the
+        # winning line for a win, the longest defence found for a loss
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        opponent = 'Y' if player == 'R' else 'R'
+        if board.is_full() or board.check_winner(player) or board.check_winner(opponent):
+            return UNKNOWN, []  # Nothing to prove from a finished game
+        for attacker, result in ((player, WIN), (opponent, LOSS)):
+            board = board.copy()
+            try:
+                proof, _ = self.search(board, attacker, player, INFINITY, INFINITY)
+            except BudgetExhausted:
+                return UNKNOWN, []
+            if proof == 0:
+                return result, self.line(board, attacker, player)
+        return UNKNOWN, []
+
+    def check_limits(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExhausted()
+        if self.deadline is not None and self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            raise BudgetExhausted()
+
+    def children(self, board, attacker, player):
+        # (move, key, settled numbers or None) of every move; a move that wins
+        # or fills the board settles its child at once
+        other = 'Y' if player == 'R' else 'R'
+        children = []
+        for col in board.get_valid_moves():
+            board.make_move(col, player)
+            if board.check_winner(player):
+                settled = (0, INFINITY) if player == attacker else (INFINITY, 0)
+            elif board.is_full():
+                settled = (INFINITY, 0)
+            else:
+                settled = None
+            children.append((col, board.key(), settled))
+            board.undo_move()
+        return children, other
+
+    def numbers(self, table, child):
+        _, key, settled = child
+        if settled is not None:
+            return settled
+        entry = table.get(key)
+        return (1, 1) if entry is None else entry[:2]
+
+    def search(self, board, attacker, player, proof_limit, disproof_limit):
+        # Expands below the position until its numbers reach a limit; returns them
+        self.check_limits()
+        table = self.tables[attacker]
+        children, other = self.children(board, attacker, player)
+        attacking = player == attacker
+        work = self.nodes
+        while True:
+            numbers = [self.numbers(table, child) for child in children]
+            # At the attacker's moves one proved child is enough, at the defender's all must be
+            if attacking:
+                proof = min(p for p, _ in numbers)
+                disproof = min(INFINITY, sum(d for _, d in numbers))
+            else:
+                proof = min(INFINITY, sum(p for p, _ in numbers))
+                disproof = min(d for _, d in numbers)
+            if proof >= proof_limit or disproof >= disproof_limit:
+                break
+
+            # The most proving child: least proof at the attacker's move, least disproof at the defender's
+            own = 0 if attacking else 1
+            order = sorted(range(len(children)), key=lambda i: numbers[i][own])
+            best = order[0]
+            second = numbers[order[1]][own] if len(order) > 1 else INFINITY
+            child_proof, child_disproof = numbers[best]
+            bound = min(INFINITY, int(second * (1 + EPSILON)) + 1)
+            if attacking:
+                proof_child_limit = min(proof_limit, bound)
+                disproof_child_limit = disproof_limit - disproof + child_disproof
+            else:
+                proof_child_limit = proof_limit - proof + child_proof
+                disproof_child_limit = min(disproof_limit, bound)
+
+            col, key, _ = children[best]
+            board.make_move(col, player)
+            try:
+                self.search(board, attacker, other, proof_child_limit, disproof_child_limit)
+            finally:
+                board.undo_move()
+        self.store(table, board.key(), proof, disproof, self.nodes - work)
+        return proof, disproof
+
+    def store(self, table, key, proof, disproof, work):
+        if key not in table and len(table) >= self.table_size:
+            self.collect(table)
+        entry = table.get(key)
+        table[key] = (proof, disproof, work + (entry[2] if entry is not None else 0))
+
+    def collect(self, table):
+        # Drops the half of the table that took the least work to search, unsettled
+        # positions first; settled ones only go once nothing else is left
+        entries = sorted((not (entry[0] and entry[1]), entry[2], key) for key, entry in table.items())
+        for _, _, key in entries[:max(1, len(table) // 2)]:
+            del table[key]
+
+    def line(self, board, attacker, player):
+        # Follows proved moves to the win: the first at the attacker's moves, the
+        # one whose proof took the most work at the defender's
+        table = self.tables[attacker]
+        board = board.copy()
+        line = []
+        while True:
+            children, other = self.children(board, attacker, player)
+            proved = [child for child in children if self.numbers(table, child)[0] == 0]
+            if not proved:
+                return line
+            if player == attacker:
+                col, _, settled = min(proved, key=lambda child: child[2] is None)
+            else:
+                col, _, settled = max(proved, key=lambda child: table.get(child[1], (0, 0, 0))[2])
+            board.make_move(col, player)
+            line.append(col)
+            if settled is not None:
+                return line
+            player = other
+
+
+def random_position(rng, plies):
+    board = Connect4Board()
+    player = 'R'
+    for _ in range(plies):
+        col = rng.choice(board.get_valid_moves())
+        board.make_move(col, player)
+        if board.check_winner(player):
+            board.undo_move()
+            break
+        player = 'Y' if player == 'R' else 'R'
+    return board, player
+
+
+def check(positions=50, empty=14, seed=0):
+    # Results against an exhaustive LongTermAgent search of near-full positions:
+    # proved wins and losses must match its score, and winning lines must win
+    from LongTearm import LongTermAgent
+
+    rng = random.Random(seed)
+    prover = ProofSearch()
+    counts = {WIN: 0, LOSS: 0, UNKNOWN: 0}
+    bad = 0
+    done = 0
+    while done < positions:
+        board, player = random_position(rng, 42 - empty)
+        if board.is_full() or len(board.moves) != 42 - empty:
+            continue
+        done += 1
+        result, line = prover.prove(board, player)
+        agent = LongTermAgent(player, depth=empty, keep_state=False)
+        score, _ = agent.search_root(board, empty)
+        expected = {1: WIN, -1: LOSS, 0: UNKNOWN}[score]
+        replay = board.copy()
+        mover = player
+        for col in line:
+            replay.make_move(col, mover)
+            mover = 'Y' if mover == 'R' else 'R'
+        winner = {WIN: player, LOSS: 'Y' if player == 'R' else 'R'}.get(result)
+        ok = result == expected and (winner is None or (line and replay.check_winner(winner)))
+        bad += not ok
+        counts[result] += 1
+    print(f"{positions} positions with {empty} empty cells: {counts[WIN]} wins, {counts[LOSS]} losses, "
+          f"{counts[UNKNOWN]} neither; {bad} disagree with the full search")
+    return bad == 0
+
+
+def compare(positions=30, plies=16, nodes=20000, seed=0):
+    # Proofs found within a node budget on random positions, against a
+    # LongTermAgent deepening one ply at a time until its score is a win or
+    # a loss, with twenty times the nodes
+    from LongTearm import LongTermAgent, SearchAborted
+
+    rng = random.Random(seed)
+    totals = {'proved': 0, 'proof nodes': 0, 'proof time': 0.0, 'found': 0, 'ab nodes': 0, 'ab time': 0.0}
+    done = 0
+    while done < positions:
+        board, player = random_position(rng, plies)
+        if len(board.moves) != plies:
+            continue
+        done += 1
+        prover = ProofSearch()
+        start = time.perf_counter()
+        result, _ = prover.prove(board, player, max_nodes=nodes)
+        elapsed = time.perf_counter() - start
+        if result == UNKNOWN:
+            continue
+        totals['proved'] += 1
+        totals['proof nodes'] += prover.nodes
+        totals['proof time'] += elapsed
+        agent = LongTermAgent(player, keep_state=False)
+        agent.max_nodes = 20 * nodes
+        start = time.perf_counter()
+        try:
+            for depth in range(1, 43 - plies):
+                score, _ = agent.search_root(board, depth)
+                if score != 0:
+                    totals['found'] += 1
+                    break
+        except SearchAborted:
+            pass
+        totals['ab nodes'] += agent.nodes
+        totals['ab time'] += time.perf_counter() - start
+    print(f"{positions} positions after {plies} plies: {totals['proved']} proved within {nodes} nodes, "
+          f"{totals['proof nodes']} nodes, {totals['proof time']:.1f} s")
+    print(f"  alpha-beta found {totals['found']} of them, {totals['ab nodes']} nodes, {totals['ab time']:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prove forced wins with depth-first proof-number search")
+    parser.add_argument('moves', nargs='?', default='', help="position as columns 1-7, R first")
+    parser.add_argument('--nodes', type=int, help="node budget")
+    parser.add_argument('--movetime', type=int, help="time budget in ms")
+    parser.add_argument('--check', action='store_true',
+                        help="compare with an exhaustive alpha-beta search on random near-full positions")
+    parser.add_argument('--compare', action='store_true',
+                        help="compare with alpha-beta deepening on random positions, within --nodes (default 20000)")
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(0 if check() else 1)
+    if args.compare:
+        compare(nodes=args.nodes or 20000)
+        raise SystemExit()
+    from engine import parse_moves
+
+    board, player = parse_moves(args.moves)
+    prover = ProofSearch()
+    start = time.perf_counter()
+    deadline = start + args.movetime / 1000 if args.movetime else None
+    result, line = prover.prove(board, player, max_nodes=args.nodes, deadline=deadline)
+    elapsed = time.perf_counter() - start
+    print(f"{result} for {player} in {prover.nodes} nodes, {elapsed:.2f} s")
+    if line:
+        print("line: " + ''.join(str(col + 1) for col in line))
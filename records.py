@@ -0,0 +1,84 @@
+import os
+from array import array
+
+# Game records are text files with one game per line: the columns played
+# (1-7, 'R' moves first) and the result, R, Y or D for a draw.
+#
+#   4453322 R
+
+RESULTS = {'R': 'R', 'Y': 'Y', 'Draw': 'D', None: '?'}
+
+
+def format_game(moves, winner):
+    return ''.join(str(col + 1) for col in moves) + ' ' + RESULTS[winner]
+
+
+def parse_game(line):
+    # Returns the 0-based columns and the result letter
+    fields = line.split()
+    if not fields:
+        raise ValueError("empty game record")
+    moves = [ord(char) - ord('1') for char in fields[0]]
+    result = fields[1] if len(fields) > 1 else '?'
+    return moves, result
+
+
+class GameWriter:
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def write(self, moves, winner):
+        self.file.write(format_game(moves, winner) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+def iter_games(path):
+    # Streams (moves, result) without reading the whole file
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield parse_game(line)
+
+
+class GameIndex:
+    # Byte offset of every game, built a chunk at a time so huge files open at once
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.size = os.path.getsize(path)
+        self.offsets = array('Q')
+        self.scanned = 0  # Bytes of the file already indexed
+
+    @property
+    def complete(self):
+        return self.scanned >= self.size
+
+    def scan(self, max_lines=20000):
+        # Indexes up to max_lines more games, returns False once the whole file is indexed
+        if self.complete:
+            return False
+        self.file.seek(self.scanned)
+        for _ in range(max_lines):
+            offset = self.file.tell()
+            line = self.file.readline()
+            if not line:
+                self.scanned = self.size
+                break
+            if line.strip():
+                self.offsets.append(offset)
+            self.scanned = self.file.tell()
+        return not self.complete
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, number):
+        while number >= len(self.offsets) and self.scan():
+            pass
+        self.file.seek(self.offsets[number])
+        return parse_game(self.file.readline().decode())
+
+    def close(self):
+        self.file.close()
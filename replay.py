@@ -0,0 +1,231 @@
+import argparse
+import sys
+
+import pygame
+
+from boards import Connect4Board, GRID_ROWS, GRID_COLS
+from records import GameIndex
+
+# Constants for the GUI
+CELL_SIZE = 100
+BOARD_WIDTH = GRID_COLS * CELL_SIZE
+BOARD_HEIGHT = GRID_ROWS * CELL_SIZE
+BAR_HEIGHT = 60
+SCREEN_WIDTH = BOARD_WIDTH
+SCREEN_HEIGHT = BOARD_HEIGHT + BAR_HEIGHT
+DISC_RADIUS = CELL_SIZE // 2 - 5
+COLORS = {'R': (255, 0, 0), 'Y': (255, 255, 0)}
+
+
+class ReplayGame:
+    # Board snapshots every `keyframe` plies, so any ply is at most keyframe - 1 moves away.
+    # A record with a move that cannot be played raises ValueError.
+    def __init__(self, moves, result, keyframe=8):
+        if keyframe < 1:
+            raise ValueError("keyframe must be at least 1")
+        self.moves = moves
+        self.result = result
+        self.keyframe = keyframe
+        self.keyframes = []
+        board = Connect4Board()
+        player = 'R'
+        for ply, col in enumerate(moves):
+            if ply % keyframe == 0:
+                self.keyframes.append(board.copy())
+            if not board.make_move(col, player):
+                raise ValueError(f"invalid move {col + 1} at ply {ply + 1}")
+            player = 'Y' if player == 'R' else 'R'
+        if len(moves) % keyframe == 0:
+            self.keyframes.append(board.copy())
+
+    def __len__(self):
+        return len(self.moves)
+
+    def board_at(self, ply):
+        board = self.keyframes[ply // self.keyframe].copy()
+        player = 'R' if len(board.moves) % 2 == 0 else 'Y'
+        for col in self.moves[len(board.moves):ply]:
+            board.make_move(col, player)
+            player = 'Y' if player == 'R' else 'R'
+        return board
+
+
+class ReplayViewer:
+    def __init__(self, path, keyframe=8):
+        self.index = GameIndex(path)
+        while not len(self.index) and self.index.scan():
+            pass
+        if not len(self.index):
+            self.index.close()
+            raise ValueError(f"{path} holds no games")
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Connect 4-REPLAY")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.Font(None, 28)
+
+        self.keyframe = keyframe
+        self.game_number = 0
+        self.game = None  # None when the record is malformed
+        self.error = None  # Why it was rejected
+        self.ply = 0
+        self.playing = False
+        self.speed = 4.0  # Plies per second
+        self.play_timer = 0.0
+        self.scrubbing = False
+
+        self.shown = None  # Grid currently on screen, to redraw only changed cells
+        self.shown_ply = None
+        self.load_game(0)
+
+    def load_game(self, number):
+        number = max(0, number)
+        if number >= len(self.index):
+            # Index just enough of the file to reach the requested game
+            while number >= len(self.index) and self.index.scan():
+                pass
+            number = min(number, len(self.index) - 1)
+        self.game_number = number
+        try:
+            self.game = ReplayGame(*self.index[number], keyframe=self.keyframe)
+            self.error = None
+        except ValueError as error:
+            self.game = None
+            self.error = f"malformed record: {error}"
+        self.ply = 0
+        self.playing = False
+        self.shown = None
+        self.shown_ply = None
+
+    def length(self):
+        return len(self.game) if self.game is not None else 0
+
+    def seek(self, ply):
+        self.ply = max(0, min(self.length(), ply))
+
+    def run(self):
+        while True:
+            elapsed = self.clock.tick(60) / 1000
+            self.handle_events()
+            self.update(elapsed)
+            self.draw()
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_RIGHT:
+                    self.seek(self.ply + 1)
+                elif event.key == pygame.K_LEFT:
+                    self.seek(self.ply - 1)
+                elif event.key == pygame.K_HOME:
+                    self.seek(0)
+                elif event.key == pygame.K_END:
+                    self.seek(self.length())
+                elif event.key == pygame.K_SPACE:
+                    self.playing = not self.playing
+                    self.play_timer = 0.0
+                elif event.key == pygame.K_UP:
+                    self.speed = min(self.speed * 2, 256.0)
+                elif event.key == pygame.K_DOWN:
+                    self.speed = max(self.speed / 2, 0.25)
+                elif event.key == pygame.K_PAGEDOWN:
+                    self.load_game(self.game_number + 1)
+                elif event.key == pygame.K_PAGEUP:
+                    self.load_game(self.game_number - 1)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.pos[1] >= BOARD_HEIGHT:
+                self.scrubbing = True
+                self.scrub(event.pos[0])
+            elif event.type == pygame.MOUSEMOTION and self.scrubbing:
+                self.scrub(event.pos[0])
+            elif event.type == pygame.MOUSEBUTTONUP:
+                self.scrubbing = False
+
+    def scrub(self, x):
+        self.seek(round(x / SCREEN_WIDTH * self.length()))
+
+    def update(self, elapsed):
+        # Keep indexing the file in the background so the game count fills in
+        self.index.scan(max_lines=5000)
+        if self.playing:
+            self.play_timer += elapsed * self.speed
+            steps = int(self.play_timer)
+            self.play_timer -= steps
+            self.seek(self.ply + steps)
+            if self.ply == self.length():
+                self.playing = False
+
+    def draw(self):
+        dirty = []
+        if self.shown is None:
+            self.screen.fill((255, 255, 255))  # White background
+            for row in range(GRID_ROWS + 1):
+                pygame.draw.line(self.screen, (0, 0, 0), (0, row * CELL_SIZE), (BOARD_WIDTH, row * CELL_SIZE), 2)
+            for col in range(GRID_COLS + 1):
+                pygame.draw.line(self.screen, (0, 0, 0), (col * CELL_SIZE, 0), (col * CELL_SIZE, BOARD_HEIGHT), 2)
+            self.shown = [[' '] * GRID_COLS for _ in range(GRID_ROWS)]
+            dirty.append(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+
+        # Redraw only the cells that differ from what is on screen
+        if self.ply != self.shown_ply:
+            board = self.game.board_at(self.ply) if self.game is not None else Connect4Board()
+            grid = board.grid
+            for row in range(GRID_ROWS):
+                for col in range(GRID_COLS):
+                    if grid[row][col] != self.shown[row][col]:
+                        dirty.append(self.draw_cell(row, col, grid[row][col]))
+                        self.shown[row][col] = grid[row][col]
+            self.shown_ply = self.ply
+
+        dirty.append(self.draw_bar())
+        pygame.display.update(dirty)
+
+    def draw_cell(self, row, col, piece):
+        rect = pygame.Rect(col * CELL_SIZE + 2, row * CELL_SIZE + 2, CELL_SIZE - 2, CELL_SIZE - 2)
+        self.screen.fill((255, 255, 255), rect)
+        if piece != ' ':
+            pygame.draw.circle(self.screen, COLORS[piece],
+                               (col * CELL_SIZE + CELL_SIZE // 2, row * CELL_SIZE + CELL_SIZE // 2), DISC_RADIUS)
+        return rect
+
+    def draw_bar(self):
+        rect = pygame.Rect(0, BOARD_HEIGHT + 2, SCREEN_WIDTH, BAR_HEIGHT - 2)
+        self.screen.fill((230, 230, 230), rect)
+        if self.length():
+            progress = int(SCREEN_WIDTH * self.ply / self.length())
+            self.screen.fill((120, 120, 120), (0, BOARD_HEIGHT + 2, progress, 8))
+        total = str(len(self.index)) if self.index.complete else f"{len(self.index)}+"
+        state = 'playing' if self.playing else 'paused'
+        if self.game is None:
+            status = f"Game {self.game_number + 1}/{total}   {self.error}"
+        else:
+            status = (f"Game {self.game_number + 1}/{total}   ply {self.ply}/{self.length()}   "
+                      f"result {self.game.result}   {state} x{self.speed:g}")
+        text = self.font.render(status, True, (0, 0, 0))
+        self.screen.blit(text, (10, BOARD_HEIGHT + 22))
+        return rect
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{text} is not at least 1")
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay recorded games: Left/Right step, Home/End, Space play, "
+                    "Up/Down speed, PageUp/PageDown game, click or drag the bar to seek")
+    parser.add_argument('path', help="game record file, one game per line")
+    parser.add_argument('--keyframe', type=positive_int, default=8, help="plies between board keyframes")
+    args = parser.parse_args()
+
+    try:
+        viewer = ReplayViewer(args.path, keyframe=args.keyframe)
+    except ValueError as error:
+        sys.exit(str(error))
+    viewer.run()
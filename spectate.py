@@ -0,0 +1,201 @@
+import argparse
+import importlib
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+import pygame
+
+from animation import CELL_SIZE, DISC_RADIUS, COLORS, BACKGROUND, LINE_COLOR
+from boards import Connect4Board, GRID_ROWS, GRID_COLS
+
+# Spectator mode: many agent-vs-agent games tiled in one window. Worker
+# processes play the games at full speed and write every board into shared
+# memory; the window reads the boards once a frame and redraws only the tiles
+# whose board changed, from board and disc images scaled once at startup.
+
+CELLS = GRID_ROWS * GRID_COLS
+STRIDE = CELLS + 1  # Cells of a tile (0 empty, 1 R, 2 Y), then its result
+PIECES = {'R': 1, 'Y': 2}
+RESULTS = {None: 0, 'R': 1, 'Y': 2, 'Draw': 3}
+RESULT_COLORS = {1: (220, 0, 0), 2: (220, 190, 0), 3: (90, 90, 90)}
+BAR_HEIGHT = 30
+
+
+class SpectatedGame:
+    def __init__(self, tile, specs, cells):
+        self.tile = tile
+        self.specs = specs
+        self.cells = cells
+        self.finished_at = None
+        self.reset()
+
+    def reset(self):
+        # Agents are specs as in try.py ('random', 'longterm:4', ...); colours alternate between games
+        make_agent = importlib.import_module('try').make_agent
+        first, second = self.specs if random.random() < 0.5 else self.specs[::-1]
+        self.agents = {'R': make_agent(first, 'R'), 'Y': make_agent(second, 'Y')}
+        self.board = Connect4Board()
+        self.player = 'R'
+        self.finished_at = None
+        base = self.tile * STRIDE
+        self.cells[base:base + STRIDE] = bytes(STRIDE)
+
+    def step(self):
+        # Plays one move, returns the result once the game is over
+        col = self.agents[self.player].make_move(self.board)
+        self.board.make_move(col, self.player)
+        row = GRID_ROWS - self.board.moves.count(col)
+        self.cells[self.tile * STRIDE + row * GRID_COLS + col] = PIECES[self.player]
+        if self.board.check_winner(self.player):
+            return self.player
+        if self.board.is_full():
+            return 'Draw'
+        self.player = 'Y' if self.player == 'R' else 'R'
+        return None
+
+
+def simulate(tiles, specs, cells, counters, stop, pause, seed):
+    # Worker process: plays its tiles round robin, one move per game at a time
+    random.seed(seed)
+    games = [SpectatedGame(tile, specs, cells) for tile in tiles]
+    while not stop.is_set():
+        now = time.perf_counter()
+        for game in games:
+            if game.finished_at is not None:
+                if now - game.finished_at >= pause:
+                    game.reset()
+                continue
+            result = game.step()
+            if result is not None:
+                game.finished_at = now
+                cells[game.tile * STRIDE + CELLS] = RESULTS[result]
+                counters[game.tile * len(RESULTS) + RESULTS[result]] += 1
+        if pause and all(game.finished_at is not None for game in games):
+            time.sleep(min(pause, 0.01))
+
+
+class Spectator:
+    def __init__(self, tiles=16, specs=('random', 'random'), workers=None, pause=1.0, width=1200):
+        self.tiles = tiles
+        self.columns = math.ceil(math.sqrt(tiles))
+        self.rows = math.ceil(tiles / self.columns)
+        self.tile_width = width // self.columns
+        self.tile_height = self.tile_width * GRID_ROWS // GRID_COLS
+        self.cell_size = self.tile_width / GRID_COLS
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.tile_width * self.columns,
+                                               self.tile_height * self.rows + BAR_HEIGHT))
+        pygame.display.set_caption(f"Connect 4-SPECTATOR {specs[0]} vs {specs[1]}")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.Font(None, 24)
+        self.make_surfaces()
+
+        # Boards and results written by the workers, read every frame
+        self.cells = multiprocessing.Array('b', tiles * STRIDE, lock=False)
+        # Results per tile, so no two workers ever write the same counter
+        self.counters = multiprocessing.Array('l', tiles * len(RESULTS), lock=False)
+        self.shown = [None] * tiles
+        self.stop = multiprocessing.Event()
+        workers = min(workers or multiprocessing.cpu_count(), tiles)
+        self.workers = [multiprocessing.Process(
+            target=simulate, args=(list(range(i, tiles, workers)), specs, self.cells, self.counters,
+                                   self.stop, pause, random.randrange(1 << 30)), daemon=True)
+            for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+        self.started = time.perf_counter()
+
+    def make_surfaces(self):
+        # Full-size board and discs drawn once, then scaled to the tile size once
+        board = pygame.Surface((GRID_COLS * CELL_SIZE, GRID_ROWS * CELL_SIZE))
+        board.fill(BACKGROUND)
+        for row in range(GRID_ROWS + 1):
+            pygame.draw.line(board, LINE_COLOR, (0, row * CELL_SIZE), (GRID_COLS * CELL_SIZE, row * CELL_SIZE), 6)
+        for col in range(GRID_COLS + 1):
+            pygame.draw.line(board, LINE_COLOR, (col * CELL_SIZE, 0), (col * CELL_SIZE, GRID_ROWS * CELL_SIZE), 6)
+        self.board_surface = pygame.transform.smoothscale(board, (self.tile_width, self.tile_height)).convert()
+        size = max(1, round(2 * DISC_RADIUS * self.cell_size / CELL_SIZE))
+        self.disc_surfaces = {}
+        for piece, color in COLORS.items():
+            disc = pygame.Surface((2 * DISC_RADIUS, 2 * DISC_RADIUS), pygame.SRCALPHA)
+            pygame.draw.circle(disc, color, (DISC_RADIUS, DISC_RADIUS), DISC_RADIUS)
+            self.disc_surfaces[PIECES[piece]] = pygame.transform.smoothscale(disc, (size, size)).convert_alpha()
+        self.disc_offset = (self.cell_size - size) / 2
+
+    def run(self):
+        try:
+            while True:
+                self.handle_events()
+                self.draw()
+                self.clock.tick(30)
+        finally:
+            self.close()
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                self.close()
+                pygame.quit()
+                sys.exit()
+
+    def draw(self):
+        snapshot = bytes(self.cells)
+        dirty = []
+        for tile in range(self.tiles):
+            state = snapshot[tile * STRIDE:(tile + 1) * STRIDE]
+            if state != self.shown[tile]:
+                dirty.append(self.draw_tile(tile, state))
+                self.shown[tile] = state
+        dirty.append(self.draw_bar())
+        pygame.display.update(dirty)
+
+    def draw_tile(self, tile, state):
+        x = tile % self.columns * self.tile_width
+        y = tile // self.columns * self.tile_height
+        self.screen.blit(self.board_surface, (x, y))
+        for cell, piece in enumerate(state[:CELLS]):
+            if piece:
+                row, col = divmod(cell, GRID_COLS)
+                self.screen.blit(self.disc_surfaces[piece], (x + col * self.cell_size + self.disc_offset,
+                                                             y + row * self.cell_size + self.disc_offset))
+        rect = pygame.Rect(x, y, self.tile_width, self.tile_height)
+        if state[CELLS]:
+            pygame.draw.rect(self.screen, RESULT_COLORS[state[CELLS]], rect, 4)
+        return rect
+
+    def draw_bar(self):
+        rect = pygame.Rect(0, self.tile_height * self.rows, self.screen.get_width(), BAR_HEIGHT)
+        self.screen.fill((230, 230, 230), rect)
+        red, yellow, draws = (sum(self.counters[RESULTS[result]::len(RESULTS)]) for result in ('R', 'Y', 'Draw'))
+        games = red + yellow + draws
+        elapsed = time.perf_counter() - self.started
+        text = self.font.render(f"{games} games ({games / elapsed:.1f}/s)   R {red}   Y {yellow}   draws {draws}"
+                                f"   {self.clock.get_fps():.0f} fps", True, (0, 0, 0))
+        self.screen.blit(text, (10, rect.top + 7))
+        return rect
+
+    def close(self):
+        self.stop.set()
+        for worker in self.workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch many agent-vs-agent games at once")
+    parser.add_argument('--tiles', type=int, default=16, help="games shown at once, 16 to 64 fit well")
+    parser.add_argument('--agents', nargs=2, default=('random', 'random'), metavar=('FIRST', 'SECOND'),
+                        help="agents as in try.py: random, longterm:DEPTH[:WEIGHTS|:windows|:proof], expectimax:DEPTH")
+    parser.add_argument('--workers', type=int, help="simulation processes (default: one per CPU)")
+    parser.add_argument('--pause', type=float, default=1.0, help="seconds a finished game stays on screen")
+    parser.add_argument('--width', type=int, default=1200, help="window width in pixels")
+    args = parser.parse_args()
+
+    spectator = Spectator(tiles=args.tiles, specs=args.agents, workers=args.workers, pause=args.pause,
+                          width=args.width)
+    spectator.run()
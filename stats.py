@@ -0,0 +1,273 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from boards import GRID_ROWS, GRID_COLS
+
+# Aggregate statistics over game record files (see records.py) that are far
+# too large to load. Records are streamed in byte ranges, every range is
+# counted into NumPy accumulators in a worker, and the partial results are
+# summed. The totals are saved with the byte offset reached in every file,
+# so a later run only counts the games appended since. Malformed records are
+# skipped and counted instead of stopping the run.
+
+MAX_PLIES = GRID_ROWS * GRID_COLS
+RESULT_INDEX = {b'R': 0, b'Y': 1, b'D': 2, b'?': 3}  # '?' or no result counts as unfinished
+RESULT_NAMES = ('R', 'Y', 'D', '?')
+COLUMN_DIGITS = bytes(range(ord('1'), ord('1') + GRID_COLS))
+
+
+def parse_record(line):
+    # Moves (digits 1-7) and result index of a record line, or None if it is malformed.
+    # Columns filled past the top are caught for a whole batch in GameStats.update.
+    fields = line.split()
+    if not fields or len(fields) > 2 or len(fields[0]) > MAX_PLIES or fields[0].translate(None, COLUMN_DIGITS):
+        return None
+    result = RESULT_INDEX.get(fields[1] if len(fields) > 1 else b'?')
+    return None if result is None else (fields[0], result)
+
+
+class GameStats:
+    def __init__(self, opening_plies=3):
+        self.opening_plies = opening_plies
+        self.games = 0
+        self.skipped = 0  # Malformed records
+        self.first_move = np.zeros((GRID_COLS, 4), dtype=np.int64)  # Result by the first column played
+        self.columns = np.zeros(GRID_COLS, dtype=np.int64)  # Moves played in every column
+        self.cells = np.zeros((2, GRID_ROWS, GRID_COLS), dtype=np.int64)  # Final discs by player, top row first
+        self.lengths = np.zeros(MAX_PLIES + 1, dtype=np.int64)
+        self.openings = np.zeros((GRID_COLS ** opening_plies, 4), dtype=np.int64)  # Result by opening
+
+    def update(self, lines):
+        # Counts a list of record lines (bytes); blank lines are ignored
+        games = []
+        for line in lines:
+            if not line.strip():
+                continue
+            game = parse_record(line)
+            if game is None:
+                self.skipped += 1
+            else:
+                games.append(game)
+        if not games:
+            return
+        count = len(games)
+        moves = np.full((count, MAX_PLIES), -1, dtype=np.int64)
+        lengths = np.empty(count, dtype=np.int64)
+        results = np.empty(count, dtype=np.int64)
+        for i, (digits, result) in enumerate(games):
+            moves[i, :len(digits)] = np.frombuffer(digits, dtype=np.uint8) - ord('1')
+            lengths[i] = len(digits)
+            results[i] = result
+
+        played = moves >= 0
+        one_hot = (moves[:, :, None] == np.arange(GRID_COLS)) & played[:, :, None]
+        overfull = one_hot.sum(axis=1).max(axis=1) > GRID_ROWS
+        if overfull.any():
+            self.skipped += int(overfull.sum())
+            keep = ~overfull
+            moves, lengths, results = moves[keep], lengths[keep], results[keep]
+            played, one_hot = played[keep], one_hot[keep]
+            count = len(moves)
+
+        self.games += count
+        self.lengths += np.bincount(lengths, minlength=MAX_PLIES + 1)
+        self.columns += np.bincount(moves[played], minlength=GRID_COLS)
+        started = lengths > 0
+        np.add.at(self.first_move, (moves[started, 0], results[started]), 1)
+
+        # Height of every disc: how many earlier moves went into the same column
+        heights = (np.cumsum(one_hot, axis=1) - one_hot)[one_hot]
+        plies = np.broadcast_to(np.arange(MAX_PLIES), moves.shape)[played]
+        np.add.at(self.cells, (plies % 2, GRID_ROWS - 1 - heights, moves[played]), 1)
+
+        long_enough = lengths >= self.opening_plies
+        weights = GRID_COLS ** np.arange(self.opening_plies - 1, -1, -1)
+        openings = moves[long_enough, :self.opening_plies] @ weights
+        np.add.at(self.openings, (openings, results[long_enough]), 1)
+
+    def merge(self, other):
+        if other.opening_plies != self.opening_plies:
+            raise ValueError("cannot merge statistics with different opening lengths")
+        self.games += other.games
+        self.skipped += other.skipped
+        for name in ('first_move', 'columns', 'cells', 'lengths', 'openings'):
+            getattr(self, name).__iadd__(getattr(other, name))
+        return self
+
+    def save(self, path, offsets):
+        temp = path + '.tmp.npz'
+        np.savez(temp, games=self.games, skipped=self.skipped, first_move=self.first_move, columns=self.columns, cells=self.cells,
+                 lengths=self.lengths, openings=self.openings, opening_plies=self.opening_plies,
+                 offsets=json.dumps(offsets))
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            stats = cls(int(data['opening_plies']))
+            stats.games = int(data['games'])
+            stats.skipped = int(data['skipped']) if 'skipped' in data.files else 0
+            for name in ('first_move', 'columns', 'cells', 'lengths', 'openings'):
+                setattr(stats, name, data[name].copy())
+            return stats, json.loads(str(data['offsets']))
+
+    def report(self, top=10):
+        lines = [f"{self.games} games"]
+        if self.skipped:
+            lines[0] += f", {self.skipped} malformed records skipped"
+        if not self.games:
+            return '\n'.join(lines)
+        totals = self.first_move.sum(axis=0)
+        lines.append("  results: " + '  '.join(f"{name} {count / max(1, totals.sum()):.1%}"
+                                                  for name, count in zip(RESULT_NAMES, totals)))
+        lines.append("  first move   games    R wins   Y wins   draws")
+        for col in range(GRID_COLS):
+            row = self.first_move[col]
+            n = max(1, row.sum())
+            lines.append(f"  {col + 1:10} {row.sum():7} {row[0] / n:9.1%} {row[1] / n:8.1%} {row[2] / n:7.1%}")
+        share = self.columns / max(1, self.columns.sum())
+        lines.append("  moves by column: " + ' '.join(f"{col + 1}:{value:.1%}" for col, value in enumerate(share)))
+        lines.append("  final occupancy (R/Y share of games, top row first):")
+        for row in range(GRID_ROWS):
+            lines.append("    " + ' '.join(f"{self.cells[0, row, col] / self.games:4.0%}/{self.cells[1, row, col] / self.games:<4.0%}"
+                                           for col in range(GRID_COLS)))
+        lengths = np.arange(MAX_PLIES + 1)
+        cumulative = np.cumsum(self.lengths) / self.games
+        percentiles = [int(np.searchsorted(cumulative, q)) for q in (0.1, 0.5, 0.9)]
+        lines.append(f"  length: mean {(lengths * self.lengths).sum() / self.games:.1f} plies, "
+                     f"p10 {percentiles[0]} p50 {percentiles[1]} p90 {percentiles[2]}")
+        lines.append(f"  most played openings ({self.opening_plies} plies):")
+        counts = self.openings.sum(axis=1)
+        for index in np.argsort(-counts, kind='stable')[:top]:
+            if counts[index] == 0:
+                break
+            digits = ''.join(str(index // GRID_COLS ** power % GRID_COLS + 1)
+                             for power in range(self.opening_plies - 1, -1, -1))
+            row = self.openings[index]
+            lines.append(f"    {digits:8} {counts[index]:7} games  R {row[0] / counts[index]:.1%}  "
+                         f"Y {row[1] / counts[index]:.1%}  D {row[2] / counts[index]:.1%}")
+        return '\n'.join(lines)
+
+
+def count_range(path, start, end, opening_plies, batch=20000):
+    # Worker: statistics of the complete lines in [start, end)
+    stats = GameStats(opening_plies)
+    with open(path, 'rb') as file:
+        file.seek(start)
+        lines = []
+        position = start
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            lines.append(line)
+            if len(lines) == batch:
+                stats.update(lines)
+                lines = []
+        stats.update(lines)
+    return stats
+
+
+def count_job(job):
+    return count_range(*job)
+
+
+def line_start(file, position):
+    # First line boundary at or after position
+    if position <= 0:
+        return 0
+    file.seek(position - 1)
+    file.readline()
+    return file.tell()
+
+
+def split_ranges(path, start, end, parts):
+    # Byte ranges of about equal size that start and end on line boundaries
+    bounds = [start]
+    with open(path, 'rb') as file:
+        for i in range(1, parts):
+            bounds.append(min(end, max(bounds[-1], line_start(file, start + (end - start) * i // parts))))
+    bounds.append(end)
+    return [(low, high) for low, high in zip(bounds, bounds[1:]) if high > low]
+
+
+def complete_end(path, size):
+    # Offset after the last full line, so a game being appended is left for next time
+    with open(path, 'rb') as file:
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            file.seek(position - step)
+            block = file.read(step)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                return position - step + newline + 1
+            position -= step
+    return 0
+
+
+def aggregate(paths, state, workers=None, opening_plies=None, round_bytes=64 << 20):
+    # opening_plies defaults to the saved state's, or 3 for a new one
+    if os.path.exists(state):
+        stats, offsets = GameStats.load(state)
+        if opening_plies is not None and opening_plies != stats.opening_plies:
+            raise ValueError(f"{state} counts openings of {stats.opening_plies} plies, not {opening_plies}; "
+                             f"use another --state to change it")
+    else:
+        stats, offsets = GameStats(opening_plies or 3), {}
+    workers = workers or os.cpu_count() or 1
+    start_time = time.perf_counter()
+    added = skipped = 0
+    with multiprocessing.Pool(workers) as pool:
+        for path in paths:
+            key = os.path.abspath(path)
+            end = complete_end(path, os.path.getsize(path))
+            offset = offsets.get(key, 0)
+            if offset > end:
+                raise ValueError(f"{path} is shorter than when it was last counted")
+            # A round at a time, saving after each, so an interrupted run keeps most of its work
+            while offset < end:
+                with open(path, 'rb') as file:
+                    round_end = min(end, line_start(file, offset + round_bytes))
+                jobs = [(path, low, high, stats.opening_plies)
+                        for low, high in split_ranges(path, offset, round_end, workers)]
+                before = stats.games
+                skipped_before = stats.skipped
+                for partial in pool.imap_unordered(count_job, jobs):
+                    stats.merge(partial)
+                added += stats.games - before
+                skipped += stats.skipped - skipped_before
+                offset = round_end
+                offsets[key] = offset
+                stats.save(state, offsets)
+    elapsed = time.perf_counter() - start_time
+    print(f"Added {added} games in {elapsed:.1f} s ({added / max(elapsed, 1e-9):.0f} games/s), {stats.games} in total")
+    if skipped:
+        print(f"Skipped {skipped} malformed records")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate statistics over game record files")
+    parser.add_argument('paths', nargs='*', help="game record files, one game per line")
+    parser.add_argument('--state', default='stats.npz', help="saved totals and the offsets reached in every file")
+    parser.add_argument('--workers', type=int, help="counting processes (default: one per CPU)")
+    parser.add_argument('--opening-plies', type=int,
+                        help="length of the openings compared (default 3, or the saved state's)")
+    parser.add_argument('--top', type=int, default=10, help="openings to list")
+    args = parser.parse_args()
+
+    if args.paths:
+        try:
+            stats = aggregate(args.paths, args.state, workers=args.workers, opening_plies=args.opening_plies)
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        stats, _ = GameStats.load(args.state)
+    print(stats.report(top=args.top))
@@ -0,0 +1,413 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+import numpy as np
+
+# Tablebases for small Connect 4 variants (4x5, 5x4, 4x6, ...). Every position
+# has a perfect index: each column is a mixed-radix digit holding its disc
+# count k and colours as (2**k - 1) + pattern, so a column of height h has
+# 2**(h + 1) - 1 states. The table stores 2 bits per index, the result for the
+# side to move, and is memory-mapped for lookups.
+#
+# Generation is retrograde: a forward pass lists the reachable positions ply
+# by ply, then a backward pass solves them from the last ply up, each ply in
+# parallel chunks that read the plies below from the table file. Every ply
+# done is recorded in a checkpoint, so an interrupted run resumes.
+#
+# The index space grows as (2**(rows + 1) - 1)**cols, so a variant whose table
+# would not fit in memory is refused before any work starts: 4x6 and 5x5 need
+# about 200 MB, 6x5 and 5x6 need 8 and 15 GB.
+
+UNKNOWN, LOSS, DRAW, WIN = 0, 1, 2, 3
+MAGIC = b'C4TB'
+HEADER_BYTES = 16
+MEMORY_SHARE = 0.5  # Largest share of physical memory a table may take by default
+
+
+class Variant:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.base = 2 ** (rows + 1) - 1
+        self.powers = [self.base ** col for col in range(cols)]
+        self.size = self.base ** cols
+        self.column_bits = rows + 1
+
+    def decode(self, index):
+        # (R bitboard, Y bitboard, heights), bottom cell first in every column
+        bits = [0, 0]
+        heights = []
+        for col in range(self.cols):
+            index, state = divmod(index, self.base)
+            count = (state + 1).bit_length() - 1
+            pattern = state - (2 ** count - 1)
+            for height in range(count):
+                bits[(pattern >> height) & 1] |= 1 << (col * self.column_bits + height)
+            heights.append(count)
+        return bits[0], bits[1], heights
+
+    def child(self, index, col, height, yellow):
+        # Index after a disc of the given colour lands at height in col
+        return index + self.powers[col] * (2 ** height) * (1 + yellow)
+
+    def connects(self, bits):
+        for shift in (1, self.column_bits, self.column_bits + 1, self.column_bits - 1):
+            pairs = bits & (bits >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
+
+    def index_of(self, moves):
+        # Index after the 0-based columns in moves, R first
+        heights = [0] * self.cols
+        index = 0
+        for ply, col in enumerate(moves):
+            if not 0 <= col < self.cols or heights[col] == self.rows:
+                raise ValueError(f"invalid move {col + 1} in {moves}")
+            index = self.child(index, col, heights[col], ply % 2)
+            heights[col] += 1
+        return index, heights
+
+
+def table_bytes(rows, cols):
+    return (Variant(rows, cols).size + 3) // 4
+
+
+def check_size(rows, cols, limit=None):
+    # Raises ValueError when the table would take more than limit bytes, by default
+    # MEMORY_SHARE of the physical memory
+    if limit is None:
+        limit = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') * MEMORY_SHARE
+    size = table_bytes(rows, cols)
+    if size > limit:
+        raise ValueError(f"a {rows}x{cols} table needs {size / 2 ** 30:.1f} GB, "
+                         f"more than the {limit / 2 ** 30:.1f} GB allowed")
+
+
+class VariantBoard:
+    # A board of the variant's size with the methods the agents and try.play_game use;
+    # discs are bitboards in the Variant layout
+    def __init__(self, rows, cols):
+        self.variant = Variant(rows, cols)
+        self.rows = rows
+        self.cols = cols
+        self.bits = {'R': 0, 'Y': 0}
+        self.heights = [0] * cols
+        self.moves = []
+
+    def is_valid_move(self, col):
+        return 0 <= col < self.cols and self.heights[col] < self.rows
+
+    def get_valid_moves(self):
+        return [col for col in range(self.cols) if self.heights[col] < self.rows]
+
+    def make_move(self, col, player):
+        if not self.is_valid_move(col):
+            return False
+        self.bits[player] |= 1 << (col * self.variant.column_bits + self.heights[col])
+        self.heights[col] += 1
+        self.moves.append(col)
+        return True
+
+    def undo_move(self):
+        col = self.moves.pop()
+        self.heights[col] -= 1
+        mask = ~(1 << (col * self.variant.column_bits + self.heights[col]))
+        self.bits['R'] &= mask
+        self.bits['Y'] &= mask
+
+    def check_winner(self, player):
+        return self.variant.connects(self.bits[player])
+
+    def is_full(self):
+        return len(self.moves) == self.rows * self.cols
+
+    def copy(self):
+        board = VariantBoard(self.rows, self.cols)
+        board.bits = dict(self.bits)
+        board.heights = self.heights[:]
+        board.moves = self.moves[:]
+        return board
+
+    @property
+    def grid(self):
+        # Rows of ' ', 'R' and 'Y', top row first
+        return [[next((player for player, bits in self.bits.items()
+                       if bits >> (col * self.variant.column_bits + row) & 1), ' ')
+                 for col in range(self.cols)] for row in range(self.rows - 1, -1, -1)]
+
+    def display_board(self):
+        for row in self.grid:
+            print('|' + '|'.join(row) + '|')
+        print(' ' + ' '.join(str(col + 1) for col in range(self.cols)))
+
+
+def expand(rows, cols, indices):
+    # Indices of the children of every unfinished position
+    variant = Variant(rows, cols)
+    children = []
+    for index in indices.tolist():
+        red, yellow, heights = variant.decode(index)
+        if variant.connects(red) or variant.connects(yellow):
+            continue
+        to_move = sum(heights) % 2
+        for col in range(cols):
+            if heights[col] < rows:
+                children.append(variant.child(index, col, heights[col], to_move))
+    return np.unique(np.array(children, dtype=np.int64))
+
+
+def solve_chunk(rows, cols, indices, path):
+    # Values of positions whose children are already in the table
+    variant = Variant(rows, cols)
+    table = Tablebase(path)
+    values = np.empty(len(indices), dtype=np.uint8)
+    for i, index in enumerate(indices.tolist()):
+        red, yellow, heights = variant.decode(index)
+        if variant.connects(red) or variant.connects(yellow):
+            values[i] = LOSS  # The previous player has just won
+            continue
+        to_move = sum(heights) % 2
+        best = UNKNOWN
+        for col in range(cols):
+            if heights[col] < rows:
+                # The child's value is for the opponent
+                reply = table.value(variant.child(index, col, heights[col], to_move))
+                best = max(best, WIN + LOSS - reply)
+                if best == WIN:
+                    break
+        values[i] = DRAW if best == UNKNOWN else best  # No moves left: a full board
+    table.close()
+    return values
+
+
+def solve_job(job):
+    return solve_chunk(*job)
+
+
+def expand_job(job):
+    return expand(*job)
+
+
+class Tablebase:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            header = file.read(HEADER_BYTES)
+        if header[:4] != MAGIC:
+            raise ValueError(f"{path} is not a tablebase")
+        self.variant = Variant(header[4], header[5])
+        self.table = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER_BYTES)
+
+    @staticmethod
+    def create(path, rows, cols):
+        size = table_bytes(rows, cols)
+        with open(path, 'wb') as file:
+            file.write(MAGIC + bytes([rows, cols]) + bytes(HEADER_BYTES - 6))
+            file.truncate(HEADER_BYTES + size)
+
+    def value(self, index):
+        return (int(self.table[index >> 2]) >> ((index & 3) * 2)) & 3
+
+    def values(self, moves):
+        # Result of every column for the side to move after moves, None for full columns
+        variant = self.variant
+        index, heights = variant.index_of(moves)
+        results = []
+        for col in range(variant.cols):
+            if heights[col] < variant.rows:
+                reply = self.value(variant.child(index, col, heights[col], len(moves) % 2))
+                results.append(WIN + LOSS - reply if reply != UNKNOWN else None)
+            else:
+                results.append(None)
+        return results
+
+    def close(self):
+        del self.table
+
+
+class TablebaseAgent:
+    # Perfect play on a solved variant: one table read per column. Plays on a
+    # VariantBoard of the table's size, or any board with a moves list.
+    def __init__(self, player, path):
+        self.player = player
+        self.tablebase = Tablebase(path)
+        self.rows, self.cols = self.tablebase.variant.rows, self.tablebase.variant.cols
+
+    def make_move(self, board):
+        values = self.tablebase.values(board.moves)
+        # An immediate win first, so a won game is also finished
+        variant = self.tablebase.variant
+        index, heights = variant.index_of(board.moves)
+        red, yellow, _ = variant.decode(index)
+        own = red if len(board.moves) % 2 == 0 else yellow
+        for col in range(variant.cols):
+            if heights[col] < variant.rows and variant.connects(own | 1 << (col * variant.column_bits + heights[col])):
+                return col
+        best = None
+        for col, value in enumerate(values):
+            if value is not None and (best is None or value > values[best]):
+                best = col
+        return best
+
+
+def peak_memory_mb():
+    # Peak resident size of this process and of the largest worker
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def play(path, human='R'):
+    # Human against TablebaseAgent in the terminal
+    agent = TablebaseAgent('Y' if human == 'R' else 'R', path)
+    board = VariantBoard(agent.rows, agent.cols)
+    player = 'R'
+    while not board.is_full():
+        board.display_board()
+        if player == human:
+            text = input(f"{player} to move, column 1-{board.cols}: ").strip()
+            if not text.isdigit() or not board.make_move(int(text) - 1, player):
+                print("not a valid column")
+                continue
+        else:
+            col = agent.make_move(board)
+            print(f"{player} plays {col + 1}")
+            board.make_move(col, player)
+        if board.check_winner(player):
+            board.display_board()
+            print(f"{player} wins")
+            return
+        player = 'Y' if player == 'R' else 'R'
+    board.display_board()
+    print("draw")
+
+
+def match(path, spec, games=100, seed=0):
+    # TablebaseAgent against a try.py agent on the variant, alternating colours;
+    # a perfect player never loses a drawn or won position
+    import importlib
+
+    sprt = importlib.import_module('try')
+    tablebase = Tablebase(path)
+    variant = tablebase.variant
+    start = ('?', 'loss', 'draw', 'win')[tablebase.value(0)]
+    tablebase.close()
+    counts = {'wins': 0, 'draws': 0, 'losses': 0}
+    for game in range(games):
+        colour = 'R' if game % 2 == 0 else 'Y'
+        other = 'Y' if colour == 'R' else 'R'
+        rng = random.Random(seed + game)
+        agents = {colour: TablebaseAgent(colour, path), other: sprt.make_agent(spec, other, rng)}
+        winner = sprt.play_game(agents['R'], agents['Y'], board=VariantBoard(variant.rows, variant.cols))
+        counts['draws' if winner is None else 'wins' if winner == colour else 'losses'] += 1
+    print(f"{variant.rows}x{variant.cols}, a {start} for the first player: tablebase against {spec} in {games} games: "
+          f"{counts['wins']} wins, {counts['draws']} draws, {counts['losses']} losses")
+    return counts
+
+
+def generate(rows, cols, out, workers=None, chunk=20000, max_table_bytes=None):
+    check_size(rows, cols, max_table_bytes)
+    variant = Variant(rows, cols)
+    plies = rows * cols
+    levels = out + '.levels'
+    checkpoint_path = out + '.checkpoint'
+    os.makedirs(levels, exist_ok=True)
+    state = {'rows': rows, 'cols': cols, 'forward': 0, 'backward': plies + 1}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as file:
+            state = json.load(file)
+        if (state['rows'], state['cols']) != (rows, cols):
+            raise ValueError(f"{checkpoint_path} belongs to a {state['rows']}x{state['cols']} run")
+        print(f"Resuming: forward pass at ply {state['forward']}, backward pass at ply {state['backward']}")
+
+    def save_state():
+        with open(checkpoint_path + '.tmp', 'w') as file:
+            json.dump(state, file)
+        os.replace(checkpoint_path + '.tmp', checkpoint_path)
+
+    def level_path(ply):
+        return os.path.join(levels, f"ply_{ply:02}.npy")
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        if state['forward'] == 0:
+            np.save(level_path(0), np.zeros(1, dtype=np.int64))
+            state['forward'] = 1
+            save_state()
+        # Forward: reachable positions of every ply
+        while state['forward'] <= plies:
+            ply = state['forward']
+            parents = np.load(level_path(ply - 1))
+            parts = pool.map(expand_job, [(rows, cols, parents[i:i + chunk]) for i in range(0, len(parents), chunk)])
+            positions = np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+            np.save(level_path(ply), positions)
+            print(f"ply {ply:2}: {len(positions):>10} positions")
+            state['forward'] = ply + 1
+            save_state()
+
+        if state['backward'] == plies + 1:
+            Tablebase.create(out, rows, cols)
+        # Backward: solve each ply from the table entries of the ply below
+        while state['backward'] > 0:
+            ply = state['backward'] - 1
+            positions = np.load(level_path(ply))
+            jobs = [(rows, cols, positions[i:i + chunk], out) for i in range(0, len(positions), chunk)]
+            values = np.concatenate(pool.map(solve_job, jobs)) if jobs else np.zeros(0, dtype=np.uint8)
+            table = np.memmap(out, dtype=np.uint8, mode='r+', offset=HEADER_BYTES)
+            shifts = ((positions & 3) * 2).astype(np.uint8)
+            # Clear first so a ply redone after a crash cannot mix old bits in
+            np.bitwise_and.at(table, positions >> 2, ~(np.uint8(3) << shifts))
+            np.bitwise_or.at(table, positions >> 2, values << shifts)
+            table.flush()
+            del table
+            counts = np.bincount(values, minlength=4)
+            print(f"ply {ply:2} solved: {counts[WIN]} wins, {counts[DRAW]} draws, {counts[LOSS]} losses")
+            state['backward'] = ply
+            save_state()
+
+    result = ('?', 'loss', 'draw', 'win')[Tablebase(out).value(0)]
+    own, children = peak_memory_mb()
+    level_bytes = max(os.path.getsize(level_path(ply)) for ply in range(plies + 1))
+    print(f"{rows}x{cols} solved in {time.perf_counter() - start:.1f} s: first player {result}")
+    print(f"table {(variant.size + 3) // 4 / 2 ** 20:.1f} MB for {variant.size} indices, "
+          f"largest ply list {level_bytes / 2 ** 20:.1f} MB, peak RSS {own:.0f} MB main / {children:.0f} MB worker")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a small Connect 4 variant into a packed tablebase")
+    parser.add_argument('--rows', type=int, default=4, help="board rows")
+    parser.add_argument('--cols', type=int, default=5, help="board columns")
+    parser.add_argument('--out', help="tablebase file (default c4_ROWSxCOLS.tb)")
+    parser.add_argument('--workers', type=int, help="solver processes (default: one per CPU)")
+    parser.add_argument('--chunk', type=int, default=20000, help="positions per work item")
+    parser.add_argument('--max-table-mb', type=int,
+                        help="largest table to generate (default: half the physical memory)")
+    parser.add_argument('--query', metavar='MOVES', help="print the result of every column after MOVES (1-based)")
+    parser.add_argument('--play', action='store_true', help="play against the tablebase in the terminal")
+    parser.add_argument('--match', metavar='AGENT', help="play the tablebase against a try.py agent, e.g. random")
+    parser.add_argument('--games', type=int, default=100, help="games of --match")
+    args = parser.parse_args()
+    out = args.out or f"c4_{args.rows}x{args.cols}.tb"
+
+    if args.play:
+        play(out)
+        sys.exit()
+    if args.match:
+        match(out, args.match, games=args.games)
+        sys.exit()
+    if args.query is not None:
+        names = {WIN: 'win', DRAW: 'draw', LOSS: 'loss', None: '-'}
+        values = Tablebase(out).values([ord(char) - ord('1') for char in args.query])
+        print(' '.join(f"{col + 1}:{names[value]}" for col, value in enumerate(values)))
+        sys.exit()
+    try:
+        generate(args.rows, args.cols, out, workers=args.workers, chunk=args.chunk,
+                 max_table_bytes=args.max_table_mb and args.max_table_mb * 2 ** 20)
+    except ValueError as error:
+        parser.error(str(error))
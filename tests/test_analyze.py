@@ -0,0 +1,153 @@
+import json
+import random
+
+import pytest
+
+import analyze
+from analyze import Checkpoint, analyse_file, read_chunks
+from boards import random_game
+from engine import best_column
+
+
+def write_positions(path, count, seed=0):
+    # Prefixes of random games as move strings, with a record line, a blank line and a bad move mixed in
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        moves = random_game(rng)
+        lines.append(''.join(str(col + 1) for col in moves[:rng.randrange(len(moves) + 1)]))
+    lines[3] += ' R'
+    lines.insert(5, '')
+    lines.insert(9, '4449')
+    path.write_text('\n'.join(lines) + '\n')
+    offsets = []
+    offset = 0
+    for line in lines:
+        if line.split():
+            offsets.append((offset, line.split()[0]))
+        offset += len(line) + 1
+    return offsets
+
+
+def read_results(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def without_nodes(results):
+    # Node counts depend on what each worker's table already holds
+    return [{key: value for key, value in result.items() if key != 'nodes'} for result in results]
+
+
+@pytest.fixture
+def positions(tmp_path):
+    path = tmp_path / 'positions.txt'
+    return path, write_positions(path, 30)
+
+
+def test_read_chunks_covers_the_file(positions):
+    path, offsets = positions
+    chunks = list(read_chunks(str(path), 0, 4))
+    assert [item for _, _, chunk in chunks for item in chunk] == offsets
+    assert chunks[0][0] == 0 and chunks[-1][1] == path.stat().st_size
+    assert all(end == start for (_, end, _), (start, _, _) in zip(chunks, chunks[1:]))
+
+
+def test_ordered_output_follows_the_input(tmp_path, positions):
+    path, offsets = positions
+    out = str(tmp_path / 'scores.jsonl')
+    assert analyse_file(str(path), out, depth=2, workers=3, chunk_size=2, in_flight=3) == len(offsets)
+    results = read_results(out)
+    assert [(result['offset'], result['moves']) for result in results] == offsets
+    checkpoint = Checkpoint(out + '.checkpoint')
+    checkpoint.load()
+    assert checkpoint.offset == path.stat().st_size and not checkpoint.done
+
+
+def test_results_match_a_local_search(tmp_path, positions):
+    path, offsets = positions
+    out = str(tmp_path / 'scores.jsonl')
+    analyse_file(str(path), out, depth=2, workers=2, chunk_size=4)
+    analyze.init_worker(None)
+    for result in read_results(out):
+        if 'error' in result:
+            assert result['moves'] == '4449'
+            continue
+        expected = analyze.analyse_position(result['moves'], 2, None)
+        assert result['scores'] == expected['scores']
+        if result['scores'] is None:
+            assert result['best'] is None
+        else:
+            assert result['best'] == best_column(result['scores']) + 1
+
+
+def test_unordered_output_has_every_position_once(tmp_path, positions):
+    path, offsets = positions
+    out = str(tmp_path / 'scores.jsonl')
+    analyse_file(str(path), out, depth=2, workers=3, chunk_size=1, ordered=False)
+    results = read_results(out)
+    assert sorted((result['offset'], result['moves']) for result in results) == offsets
+
+
+def interrupted_run(tmp_path, path, offsets, chunk_size, written_chunks):
+    # Output and checkpoint as a run killed after writing written_chunks (chunk indices) would leave them
+    full = str(tmp_path / 'full.jsonl')
+    analyse_file(str(path), full, depth=2, workers=2, chunk_size=chunk_size)
+    results = read_results(full)
+    chunks = list(read_chunks(str(path), 0, chunk_size))
+    out = str(tmp_path / 'scores.jsonl')
+    checkpoint = Checkpoint(out + '.checkpoint')
+    checkpoint.chunk_size = chunk_size
+    with open(out, 'w') as file:
+        for index in written_chunks:
+            start, end, chunk = chunks[index]
+            for offset, _ in chunk:
+                file.write(json.dumps(next(r for r in results if r['offset'] == offset)) + '\n')
+            if start == checkpoint.offset:
+                checkpoint.offset = end
+            else:
+                checkpoint.done.add(start)
+        checkpoint.output_size = file.tell()
+        # A half-written line past the checkpoint, as a kill mid-write leaves it
+        file.write('{"offset": ')
+    checkpoint.save()
+    return out, results
+
+
+def test_resume_continues_an_ordered_run(tmp_path, positions):
+    path, offsets = positions
+    out, results = interrupted_run(tmp_path, path, offsets, 4, [0, 1, 2])
+    # The checkpoint's chunk size wins over a different one on the command line
+    written = analyse_file(str(path), out, depth=2, workers=2, chunk_size=7, resume=True)
+    assert written == len(offsets) - 12
+    assert without_nodes(read_results(out)) == without_nodes(results)
+
+
+def test_resume_skips_chunks_an_unordered_run_wrote(tmp_path, positions):
+    path, offsets = positions
+    out, results = interrupted_run(tmp_path, path, offsets, 4, [0, 3, 5])
+    checkpoint = Checkpoint(out + '.checkpoint')
+    checkpoint.load()
+    assert checkpoint.offset > 0 and len(checkpoint.done) == 2
+    written = analyse_file(str(path), out, depth=2, workers=2, chunk_size=4, ordered=False, resume=True)
+    assert written == len(offsets) - 12
+    resumed = read_results(out)
+    assert without_nodes(sorted(resumed, key=lambda result: result['offset'])) == without_nodes(results)
+    checkpoint.load()
+    assert checkpoint.offset == path.stat().st_size and not checkpoint.done
+
+
+def test_resume_after_a_finished_run_writes_nothing(tmp_path, positions):
+    path, offsets = positions
+    out = str(tmp_path / 'scores.jsonl')
+    analyse_file(str(path), out, depth=2, workers=2, chunk_size=4)
+    before = read_results(out)
+    assert analyse_file(str(path), out, depth=2, workers=2, chunk_size=4, resume=True) == 0
+    assert read_results(out) == before
+
+
+def test_without_resume_the_output_starts_over(tmp_path, positions):
+    path, offsets = positions
+    out, _ = interrupted_run(tmp_path, path, offsets, 4, [0])
+    analyse_file(str(path), out, depth=2, workers=2, chunk_size=4)
+    assert [(result['offset'], result['moves']) for result in read_results(out)] == offsets
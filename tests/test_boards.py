@@ -0,0 +1,149 @@
+import random
+
+import pytest
+
+import boards
+from boards import BACKENDS, GRID_ROWS, GRID_COLS, ListBoard, random_game
+
+# Every backend runs through the same cases; ListBoard, the original string
+# grid, is the reference the others are compared with.
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    return BACKENDS[request.param]
+
+
+def play(cls, moves):
+    board = cls()
+    player = 'R'
+    for col in moves:
+        assert board.make_move(col, player)
+        player = 'Y' if player == 'R' else 'R'
+    return board
+
+
+def test_empty_board(backend):
+    board = backend()
+    assert board.moves == []
+    assert board.key() == 0
+    assert board.grid == [[' '] * GRID_COLS for _ in range(GRID_ROWS)]
+    assert board.get_valid_moves() == list(range(GRID_COLS))
+    assert not board.is_full()
+    assert not board.check_winner('R') and not board.check_winner('Y')
+
+
+def test_discs_stack_from_the_bottom(backend):
+    board = play(backend, [3, 3, 4])
+    assert board.cell(GRID_ROWS - 1, 3) == 'R'
+    assert board.cell(GRID_ROWS - 2, 3) == 'Y'
+    assert board.cell(GRID_ROWS - 1, 4) == 'R'
+    assert board.cell(GRID_ROWS - 3, 3) == ' '
+
+
+def test_full_column_rejects_moves(backend):
+    board = play(backend, [0] * GRID_ROWS)
+    assert not board.is_valid_move(0)
+    assert not board.make_move(0, 'R')
+    assert len(board.moves) == GRID_ROWS
+    assert 0 not in board.get_valid_moves()
+    assert not board.is_valid_move(-1) and not board.is_valid_move(GRID_COLS)
+
+
+@pytest.mark.parametrize('moves, winner', [
+    ([0, 0, 1, 1, 2, 2, 3], 'R'),              # horizontal
+    ([0, 1, 0, 1, 0, 1, 0], 'R'),              # vertical
+    ([0, 1, 1, 2, 6, 2, 2, 3, 3, 3, 3], 'R'),  # ascending diagonal
+    ([6, 5, 5, 4, 0, 4, 4, 3, 3, 3, 3], 'R'),  # descending diagonal
+    ([5, 0, 1, 1, 2, 6, 2, 2, 3, 3, 3, 3], 'Y'),  # the second player
+])
+def test_four_in_a_row(backend, moves, winner):
+    board = play(backend, moves)
+    loser = 'Y' if winner == 'R' else 'R'
+    assert board.check_winner(winner)
+    assert not board.check_winner(loser)
+    board.undo_move()
+    assert not board.check_winner(winner)
+
+
+def test_lines_do_not_wrap_between_columns(backend):
+    # R holds the top three cells of column 0 and the bottom cell of column 1,
+    # which are neighbours in a bitboard without sentinel bits
+    board = play(backend, [1, 0, 6, 0, 6, 0, 0, 5, 0, 5, 0])
+    assert [board.cell(row, 0) for row in range(3)] == ['R'] * 3 and board.cell(GRID_ROWS - 1, 1) == 'R'
+    assert not board.check_winner('R') and not board.check_winner('Y')
+
+
+def test_undo_restores_every_position(backend):
+    moves = random_game(random.Random(1))
+    board = backend()
+    history = []
+    player = 'R'
+    for col in moves:
+        history.append((board.key(), [row[:] for row in board.grid]))
+        board.make_move(col, player)
+        player = 'Y' if player == 'R' else 'R'
+    for key, grid in reversed(history):
+        board.undo_move()
+        assert board.key() == key
+        assert board.grid == grid
+
+
+def test_copy_is_independent(backend):
+    board = play(backend, [3, 2, 3])
+    copy = board.copy()
+    copy.make_move(4, 'Y')
+    assert board.moves == [3, 2, 3]
+    assert board.cell(GRID_ROWS - 1, 4) == ' '
+    assert copy.key() != board.key()
+    copy.undo_move()
+    assert copy.key() == board.key() and copy.grid == board.grid
+
+
+def test_full_board(backend):
+    # Fills columns in pairs with a pattern that never connects four
+    moves = []
+    for pair in ((0, 1), (2, 3), (4, 5)):
+        for _ in range(GRID_ROWS // 2):
+            moves += [pair[0], pair[1], pair[1], pair[0]]
+    moves += [6] * GRID_ROWS
+    board = backend()
+    player = 'R'
+    for col in moves:
+        board.make_move(col, player)
+        player = 'Y' if player == 'R' else 'R'
+    assert board.is_full()
+    assert board.get_valid_moves() == []
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_games_match_reference(backend, seed):
+    moves = random_game(random.Random(seed))
+    reference, board = ListBoard(), backend()
+    player = 'R'
+    for ply, col in enumerate(moves):
+        assert board.make_move(col, player) == reference.make_move(col, player)
+        assert board.grid == reference.grid
+        assert board.key() == reference.key()
+        assert board.is_full() == reference.is_full()
+        assert board.get_valid_moves() == reference.get_valid_moves()
+        for p in ('R', 'Y'):
+            assert board.check_winner(p) == reference.check_winner(p)
+        if ply % 8 == 0:
+            assert board.heuristic() == reference.heuristic()
+        player = 'Y' if player == 'R' else 'R'
+
+
+def test_conformance_check_passes():
+    assert boards.check_conformance(games=20)
+
+
+def test_backend_choice_is_explicit(monkeypatch):
+    monkeypatch.delenv('CONNECT4_BACKEND', raising=False)
+    assert boards.select_backend() is BACKENDS[boards.DEFAULT_BACKEND]
+    for name, cls in BACKENDS.items():
+        monkeypatch.setenv('CONNECT4_BACKEND', name)
+        assert boards.select_backend() is cls
+    monkeypatch.setenv('CONNECT4_BACKEND', 'abacus')
+    with pytest.raises(ValueError):
+        boards.select_backend()
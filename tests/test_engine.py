@@ -0,0 +1,155 @@
+import io
+import time
+
+import pytest
+
+from engine import Engine, EngineClient, best_column, format_scores, parse_moves
+
+
+def output(engine):
+    with engine.out_lock:
+        return engine.out.getvalue().splitlines()
+
+
+def wait_for(engine, prefix, timeout=30):
+    # The search runs in a thread, so poll its output until a line starts with prefix
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        lines = output(engine)
+        if any(line.startswith(prefix) for line in lines):
+            return lines
+        time.sleep(0.01)
+    raise AssertionError(f"no {prefix!r} line in {output(engine)}")
+
+
+@pytest.fixture
+def engine():
+    engine = Engine(out=io.StringIO())
+    yield engine
+    engine.stop()
+
+
+def test_parse_moves_alternates_players():
+    board, player = parse_moves('4453')
+    assert board.moves == [3, 3, 4, 2]
+    assert player == 'R'
+    # Row 0 is the top row
+    assert board.cell(5, 3) == 'R' and board.cell(4, 3) == 'Y' and board.cell(5, 2) == 'Y'
+
+
+@pytest.mark.parametrize('moves', ['8', '0', 'x', '1111111', '12121212'])
+def test_parse_moves_rejects_illegal_moves(moves):
+    # Off the board, into a full column, or after the game is won
+    with pytest.raises(ValueError):
+        parse_moves(moves)
+
+
+def test_scores_skip_full_columns():
+    scores = [None, 2, -1, 2, None, 0, None]
+    assert format_scores(scores) == '2:2 3:-1 4:2 6:0'
+    assert best_column(scores) == 1
+
+
+def test_handshake(engine):
+    assert engine.handle('c4i')
+    assert engine.handle('isready')
+    assert output(engine)[-2:] == ['c4iok', 'readyok']
+    assert output(engine)[0].startswith('id name ')
+
+
+def test_unknown_and_blank_lines(engine):
+    assert engine.handle('')
+    assert engine.handle('frobnicate 3')
+    assert output(engine) == ['info string unknown command frobnicate']
+
+
+def test_position_with_and_without_keywords(engine):
+    engine.handle('position startpos moves 4453')
+    assert engine.board.moves == [3, 3, 4, 2]
+    engine.handle('position 44')
+    assert engine.board.moves == [3, 3]
+    assert engine.player == 'R'
+
+
+def test_invalid_position_keeps_the_previous_one(engine):
+    engine.handle('position startpos moves 44')
+    engine.handle('position startpos moves 49')
+    assert output(engine) == ["info string invalid move '9' in '49'"]
+    assert engine.board.moves == [3, 3]
+
+
+def test_go_depth_reports_every_depth(engine):
+    engine.handle('position startpos moves 4455')
+    engine.handle('go depth 3')
+    lines = wait_for(engine, 'bestmove')
+    info = [line for line in lines if line.startswith('info depth')]
+    assert [int(line.split()[2]) for line in info] == [1, 2, 3]
+    scores = [None] * 7
+    for item in info[-1].split('scores ')[1].split():
+        col, score = item.split(':')
+        scores[int(col) - 1] = int(score)
+    assert lines[-1] == f"bestmove {best_column(scores) + 1}"
+
+
+@pytest.mark.parametrize('command', ['go depth', 'go depth three', 'go movetime -5', 'go nodes 1.5 depth 2'])
+def test_malformed_go_is_reported_and_ignored(engine, command):
+    keyword = command.split()[1]
+    engine.handle(command)
+    assert output(engine) == [f"info string go {keyword} needs a whole number"]
+    assert engine.search_thread is None
+
+
+def test_loop_continues_after_a_malformed_go(engine):
+    engine.loop(io.StringIO('go depth x\nisready\nposition moves 4\ngo depth 1\nisready\nquit\nisready\n'))
+    lines = output(engine)
+    assert lines[0] == 'info string go depth needs a whole number'
+    assert lines[1] == 'readyok'
+    assert lines[-2].startswith('bestmove ')
+    # Nothing is read after quit
+    assert lines[-1] == 'readyok'
+    assert lines.count('readyok') == 2
+
+
+def test_go_infinite_runs_until_stop(engine):
+    engine.handle('go infinite')
+    wait_for(engine, 'info depth 1 ')
+    assert engine.search_thread.is_alive()
+    assert not any(line.startswith('bestmove') for line in output(engine))
+    engine.handle('stop')
+    lines = output(engine)
+    assert engine.search_thread is None
+    assert lines[-1].startswith('bestmove ')
+    assert sum(line.startswith('bestmove') for line in lines) == 1
+
+
+def test_a_new_go_stops_the_running_search(engine):
+    engine.handle('go infinite')
+    wait_for(engine, 'info depth 1 ')
+    engine.handle('go depth 1')
+    engine.wait()
+    assert sum(line.startswith('bestmove') for line in output(engine)) == 2
+
+
+def test_finished_game_has_no_best_move(engine):
+    # Red's fourth disc in column 1 ends the game
+    engine.handle('position startpos moves 1212121')
+    engine.handle('go depth 2')
+    assert wait_for(engine, 'bestmove') == ['bestmove none']
+
+
+def test_newgame_resets_the_position(engine):
+    engine.handle('position startpos moves 4453')
+    engine.handle('newgame')
+    assert engine.board.moves == [] and engine.player == 'R'
+
+
+def test_client_round_trip():
+    client = EngineClient()
+    try:
+        move, scores = client.analyse([3, 3, 4, 4, 2, 2], depth=2)
+        # Red has three in a row on the bottom and wins in column 2 or 6
+        assert move in (1, 5)
+        assert scores[move] == max(score for score in scores if score is not None)
+    finally:
+        client.close()
+    assert client.process.returncode == 0
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from boards import WindowBoard
+from exploit import ORDER, ExpectimaxAgent
+
+
+def positions(seed, count=6, plies=8):
+    # Positions after a few random moves, with the game still open
+    rng = random.Random(seed)
+    found = []
+    while len(found) < count:
+        board = WindowBoard()
+        player = 'R'
+        for _ in range(rng.randrange(plies)):
+            board.make_move(rng.choice(board.get_valid_moves()), player)
+            if board.check_winner(player):
+                break
+            player = 'Y' if player == 'R' else 'R'
+        else:
+            found.append((board, player))
+    return found
+
+
+def plain_max(agent, board, depth):
+    # Expectimax without cutoffs or the table, with the agent's leaves
+    if depth == 0:
+        return agent.leaf(board)
+    best = 0.0
+    for col in ORDER:
+        if board.is_valid_move(col):
+            best = max(best, plain_after(agent, board, col, depth - 1))
+    return best
+
+
+def plain_after(agent, board, col, depth):
+    board.make_move(col, agent.player)
+    if board.check_winner(agent.player):
+        value = 1.0
+    elif board.is_full():
+        value = 0.0
+    else:
+        value = plain_chance(agent, board, depth)
+    board.undo_move()
+    return value
+
+
+def plain_chance(agent, board, depth):
+    if depth == 0:
+        return agent.leaf(board)
+    moves = board.get_valid_moves()
+    total = 0.0
+    for col in moves:
+        board.make_move(col, agent.opponent)
+        if board.check_winner(agent.opponent) or board.is_full():
+            value = 0.0
+        else:
+            value = plain_max(agent, board, depth - 1)
+        board.undo_move()
+        total += value / len(moves)
+    return total
+
+
+def check_bound(value, exact, alpha, beta):
+    # Fail low gives an upper bound, fail high a lower bound, and inside the window the value
+    if value <= alpha:
+        assert exact <= value + 1e-9
+    elif value >= beta:
+        assert exact >= value - 1e-9
+    else:
+        assert value == pytest.approx(exact)
+
+
+WINDOWS = [(0.0, 1.0), (0.3, 0.5), (0.45, 0.55), (0.0, 0.2), (0.8, 1.0), (0.5, 0.5 + 1e-6)]
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('alpha, beta', WINDOWS)
+def test_chance_nodes_return_bounds_outside_the_window(seed, alpha, beta):
+    for board, player in positions(seed):
+        agent = ExpectimaxAgent('Y' if player == 'R' else 'R', depth=3)
+        exact = plain_chance(agent, board, 3)
+        check_bound(agent.chance(board, 3, alpha, beta), exact, alpha, beta)
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('alpha, beta', WINDOWS)
+def test_max_nodes_return_bounds_outside_the_window(seed, alpha, beta):
+    for board, player in positions(seed):
+        agent = ExpectimaxAgent(player, depth=3)
+        exact = plain_max(agent, board, 3)
+        check_bound(agent.max_node(board, 3, alpha, beta), exact, alpha, beta)
+
+
+def test_full_window_matches_plain_expectimax():
+    for board, player in positions(7, count=10):
+        agent = ExpectimaxAgent(player, depth=4)
+        assert agent.max_node(board, 4, 0.0, 1.0) == pytest.approx(plain_max(agent, board, 4))
+
+
+def test_bounds_hold_with_entries_from_other_windows():
+    # One table across every window, so cached bounds are probed with windows they were not stored for
+    for board, player in positions(11):
+        agent = ExpectimaxAgent(player, depth=3)
+        exact = plain_max(agent, board, 3)
+        for alpha, beta in WINDOWS + WINDOWS[::-1]:
+            check_bound(agent.max_node(board, 3, alpha, beta), exact, alpha, beta)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_plays_the_plain_expectimax_move(seed):
+    for board, player in positions(seed):
+        agent = ExpectimaxAgent(player, depth=4)
+        col = agent.make_move(board)
+        values = {c: plain_after(agent, board, c, 3) for c in ORDER if board.is_valid_move(c)}
+        assert values[col] == pytest.approx(max(values.values()))
+        assert agent.value == pytest.approx(max(values.values()))
@@ -0,0 +1,102 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from boards import Connect4Board, GRID_COLS, GRID_ROWS
+from ntuple import OFFSETS, TABLE_SIZE, TUPLES, NTupleEvaluator, game_positions, table_indices, td_update
+
+
+def random_game(seed):
+    rng = random.Random(seed)
+    board = Connect4Board()
+    player = 'R'
+    while not board.is_full():
+        board.make_move(rng.choice(board.get_valid_moves()), player)
+        if board.check_winner(player):
+            break
+        player = 'Y' if player == 'R' else 'R'
+    return board.moves
+
+
+def replay(moves):
+    # Boards after every move
+    board = Connect4Board()
+    for ply, col in enumerate(moves):
+        board.make_move(col, 'R' if ply % 2 == 0 else 'Y')
+        yield board
+
+
+@pytest.fixture
+def evaluator():
+    rng = np.random.default_rng(0)
+    return NTupleEvaluator((rng.standard_normal(len(TUPLES) * TABLE_SIZE) * 0.1).astype(np.float32))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_game_positions_match_the_board(seed):
+    moves = random_game(seed)
+    cells, mirrored = game_positions(moves)
+    codes = {' ': 0, 'R': 1, 'Y': 2}
+    for ply, board in enumerate(replay(moves)):
+        grid = [codes[board.cell(row, col)] for row in range(GRID_ROWS) for col in range(GRID_COLS)]
+        assert cells[ply].tolist() == grid
+        assert mirrored[ply].reshape(GRID_ROWS, GRID_COLS).tolist() == \
+            [row[::-1] for row in np.array(grid).reshape(GRID_ROWS, GRID_COLS).tolist()]
+
+
+def test_indices_stay_in_their_own_table():
+    cells, _ = game_positions(random_game(0))
+    indices = table_indices(cells)
+    assert indices.shape == (len(cells), len(TUPLES))
+    assert (indices >= OFFSETS).all() and (indices < OFFSETS + TABLE_SIZE).all()
+    # Empty cells are digit 0, so the empty board is the first entry of every table
+    assert (table_indices(np.zeros(GRID_ROWS * GRID_COLS, dtype=np.int64)) == OFFSETS).all()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_key_matrix_matches_the_cell_indices(evaluator, seed):
+    # value() reads the board key, td_update the cell arrays; both must index the same weights
+    moves = random_game(seed)
+    cells, mirrored = game_positions(moves)
+    expected = np.tanh(evaluator.weights[table_indices(cells)].sum(axis=1))
+    mirror_expected = np.tanh(evaluator.weights[table_indices(mirrored)].sum(axis=1))
+    mirror_moves = [GRID_COLS - 1 - col for col in moves]
+    for ply, board in enumerate(replay(moves)):
+        assert evaluator.value(board) == pytest.approx(expected[ply], abs=1e-5)
+    for ply, mirror in enumerate(replay(mirror_moves)):
+        assert evaluator.value(mirror) == pytest.approx(mirror_expected[ply], abs=1e-5)
+
+
+def test_save_load_round_trip(tmp_path, evaluator):
+    path = str(tmp_path / 'weights.npy')
+    evaluator.save(path)
+    loaded = NTupleEvaluator.load(path)
+    assert type(loaded.weights) is np.ndarray
+    assert np.array_equal(loaded.weights, evaluator.weights)
+    assert loaded.fingerprint() == evaluator.fingerprint()
+    board = list(replay(random_game(3)))[-1]
+    assert loaded.value(board) == evaluator.value(board)
+
+
+def test_fingerprint_tells_tables_apart(evaluator):
+    assert NTupleEvaluator.empty().fingerprint() != evaluator.fingerprint()
+
+
+def test_load_rejects_the_wrong_shape(tmp_path):
+    path = str(tmp_path / 'short.npy')
+    np.save(path, np.zeros(TABLE_SIZE, dtype=np.float32))
+    with pytest.raises(ValueError, match='expected'):
+        NTupleEvaluator.load(path)
+
+
+def test_td_update_moves_towards_the_result():
+    weights = np.zeros(len(TUPLES) * TABLE_SIZE, dtype=np.float32)
+    moves = random_game(1)
+    winner = 'R' if len(moves) % 2 == 1 else 'Y'
+    error = td_update(weights, [(moves, winner)], alpha=0.1)
+    assert error > 0
+    final = list(replay(moves))[-1]
+    value = NTupleEvaluator(weights).value(final)
+    assert math.copysign(1, value) == (1 if winner == 'R' else -1)
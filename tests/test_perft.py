@@ -0,0 +1,54 @@
+import pytest
+
+from boards import BACKENDS, BitBoard
+from perft import REFERENCE, divide, perft, setup
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    return BACKENDS[request.param]
+
+
+def test_shallow_plies_match_reference(backend):
+    board, player = setup(backend, '')
+    assert perft(board, 5, player) == REFERENCE[:5]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('depth', [6, 7])
+def test_deep_plies_match_reference(backend, depth):
+    board, player = setup(backend, '')
+    assert perft(board, depth, player)[-1] == REFERENCE[depth - 1]
+
+
+@pytest.mark.slow
+def test_ply_8_matches_reference():
+    # Only on the fastest backend: 5.7 million positions
+    board, player = setup(BitBoard, '')
+    assert perft(board, 8, player)[-1] == REFERENCE[7]
+
+
+def test_perft_leaves_the_board_unchanged(backend):
+    board, player = setup(backend, '4453')
+    key, moves = board.key(), list(board.moves)
+    perft(board, 3, player)
+    assert board.key() == key and board.moves == moves
+
+
+def test_divide_adds_up_to_perft(backend):
+    board, player = setup(backend, '4453')
+    counts = divide(board, 4, player)
+    assert sum(counts.values()) == perft(board, 4, player)[-1][0]
+
+
+def test_won_positions_are_not_expanded(backend):
+    # R has just won with four in the bottom row, so nothing follows
+    board, player = setup(backend, '1122334')
+    assert perft(board, 2, player) == [(0, 0), (0, 0)]
+
+
+def test_invalid_setup_is_rejected(backend):
+    with pytest.raises(ValueError):
+        setup(backend, '1111111')
+    with pytest.raises(ValueError):
+        setup(backend, '11223345')
@@ -0,0 +1,29 @@
+from boards import Connect4Board
+from LongTearm import LongTermAgent
+from poscache import PositionCache
+
+
+def test_entries_are_kept_apart_by_configuration(tmp_path):
+    cache = PositionCache(str(tmp_path / 'positions.db'), min_depth=1)
+    board = Connect4Board()
+    board.make_move(3, 'R')
+    plain = LongTermAgent('Y', depth=4, keep_state=False, cache=cache)
+    heuristic = LongTermAgent('Y', depth=4, keep_state=False, cache=cache, heuristic=True)
+    assert plain.cache_config != heuristic.cache_config
+
+    plain_score, _ = plain.cached_search(board, 4)
+    assert cache.lookup(board.key(), heuristic.cache_config, 4) is None
+    heuristic_score, _ = heuristic.cached_search(board, 4)
+    assert cache.hits == 0 and len(cache) == 2
+    assert cache.lookup(board.key(), plain.cache_config, 4)[0] == plain_score
+    assert cache.lookup(board.key(), heuristic.cache_config, 4)[0] == heuristic_score
+
+
+def test_deeper_results_are_kept(tmp_path):
+    cache = PositionCache(str(tmp_path / 'positions.db'), min_depth=1)
+    cache.store(5, 'pvs', 6, 1, 3)
+    cache.store(5, 'pvs', 4, 0, 2)
+    assert cache.lookup(5, 'pvs', 6) == (1, 3)
+    assert cache.lookup(5, 'pvs', 7) is None
+    assert cache.lookup(5, 'minimax', 4) is None
+
@@ -0,0 +1,53 @@
+from posdb import PositionDatabase, canonical, position_keys
+
+
+def open_database(tmp_path):
+    return PositionDatabase(str(tmp_path / 'positions.sqlite'))
+
+
+def test_mirror_images_share_a_key():
+    assert canonical(*position_keys([0, 3])[:2]) == canonical(*position_keys([6, 3])[:2])
+    assert canonical(*position_keys([0])[:2]) != canonical(*position_keys([1])[:2])
+    # A symmetric position stores a move and its mirror image as the same column
+    key, mirrored, _ = position_keys([3])
+    assert key == mirrored
+    assert canonical(key, mirrored, 5) == canonical(key, mirrored, 1) == (key, 1)
+
+
+def test_mirrored_games_are_counted_together(tmp_path):
+    database = open_database(tmp_path)
+    database.add_games([([0, 3], 'R'), ([6, 3], 'Y')])
+    assert database.lookup([0]) == database.lookup([6]) == (2, 1, 1, 0)
+    assert database.lookup([]) == (2, 1, 1, 0)
+    assert database.continuations([]) == [((0, 6), 2, 1, 1, 0, 2)]  # Both columns of a symmetric position
+    assert database.continuations([6]) == [((3,), 2, 1, 1, 0, 2)]
+    assert database.lookup([3]) is None
+
+
+def test_building_again_adds_only_new_games(tmp_path):
+    database = open_database(tmp_path)
+    records = tmp_path / 'games.txt'
+    records.write_text('4453 R\n44 D\n')
+    assert database.build(str(records)) == (2, 0)
+    assert database.build(str(records)) == (0, 0)
+    with open(records, 'a') as file:
+        file.write('1 Y\n77')  # The last line is still being written
+    assert database.build(str(records)) == (1, 0)
+    assert database.lookup([]) == (3, 1, 1, 1)
+    with open(records, 'a') as file:
+        file.write(' R\n')
+    assert database.build(str(records)) == (1, 0)
+    assert database.lookup([6, 6]) == (1, 1, 0, 0)
+
+
+def test_malformed_records_are_skipped(tmp_path):
+    database = open_database(tmp_path)
+    records = tmp_path / 'games.txt'
+    records.write_text('4453 R\n1111111 R\n8 Y\n44 X\n4 Y\n')
+    assert database.build(str(records)) == (2, 3)
+    assert database.lookup([]) == (2, 1, 1, 0)
+    assert database.total('games') == 2 and database.total('skipped') == 3
+    assert '3 malformed records skipped' in database.report()
+    # The offset moved past them, so building again neither fails nor counts them twice
+    assert database.build(str(records)) == (0, 0)
+    assert database.total('skipped') == 3
@@ -0,0 +1,34 @@
+from boards import Connect4Board
+from proofsearch import LOSS, UNKNOWN, WIN, ProofSearch
+
+
+def play(moves):
+    board = Connect4Board()
+    player = 'R'
+    for col in moves:
+        board.make_move(col, player)
+        player = 'Y' if player == 'R' else 'R'
+    return board, player
+
+
+def test_finished_positions_have_nothing_to_prove():
+    full = []
+    for pair in ((0, 1), (2, 3), (4, 5)):
+        full += [pair[0], pair[1], pair[1], pair[0]] * 3
+    full += [6] * 6
+    board, player = play(full)
+    assert board.is_full()
+    assert ProofSearch().prove(board, player) == (UNKNOWN, [])
+    board, player = play([0, 1, 0, 1, 0, 1, 0])
+    assert ProofSearch().prove(board, player) == (UNKNOWN, [])
+
+
+def test_immediate_win_and_loss():
+    # R has three in the bottom row with both ends open
+    board, player = play([1, 1, 2, 2, 3])
+    assert player == 'Y'
+    result, line = ProofSearch().prove(board, player)
+    assert result == LOSS and line
+    board.make_move(0, 'Y')
+    result, line = ProofSearch().prove(board, 'R')
+    assert result == WIN and line == [4]
@@ -0,0 +1,96 @@
+import os
+import random
+
+import pygame
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from boards import Connect4Board, random_game
+from replay import ReplayGame, ReplayViewer
+
+
+@pytest.fixture(autouse=True)
+def quit_pygame():
+    # ReplayGame starts pygame, whose timer thread would deadlock the forked pools of later tests
+    yield
+    pygame.quit()
+
+
+def boards_of(moves):
+    board = Connect4Board()
+    grids = [[row[:] for row in board.grid]]
+    player = 'R'
+    for col in moves:
+        board.make_move(col, player)
+        grids.append([row[:] for row in board.grid])
+        player = 'Y' if player == 'R' else 'R'
+    return grids
+
+
+@pytest.mark.parametrize('keyframe', [1, 3, 8, 64])
+@pytest.mark.parametrize('seed', range(5))
+def test_every_ply_is_rebuilt_from_keyframes(keyframe, seed):
+    moves = random_game(random.Random(seed))
+    game = ReplayGame(moves, 'R', keyframe=keyframe)
+    assert len(game.keyframes) == len(moves) // keyframe + 1
+    for ply, grid in enumerate(boards_of(moves)):
+        board = game.board_at(ply)
+        assert board.grid == grid and board.moves == moves[:ply]
+
+
+def test_game_length_on_a_keyframe():
+    moves = [3, 3, 4, 4, 2, 2, 1, 1]
+    game = ReplayGame(moves, '?', keyframe=4)
+    assert len(game.keyframes) == 3
+    assert game.board_at(8).grid == boards_of(moves)[8]
+
+
+@pytest.mark.parametrize('moves', [[0] * 7, [3, -1], [3, 7], [3, 8]])
+def test_unplayable_moves_are_rejected(moves):
+    with pytest.raises(ValueError):
+        ReplayGame(moves, 'R')
+
+
+def test_keyframe_must_be_positive():
+    with pytest.raises(ValueError):
+        ReplayGame([3], 'R', keyframe=0)
+
+
+@pytest.fixture
+def viewer(tmp_path):
+    records = tmp_path / 'games.txt'
+    records.write_text('4453 R\n\n1111111 Y\n12 ?\n')
+    viewer = ReplayViewer(str(records), keyframe=2)
+    yield viewer
+    viewer.index.close()
+
+
+def test_seeking_stays_inside_the_game(viewer):
+    assert viewer.game.moves == [3, 3, 4, 2] and viewer.length() == 4
+    viewer.seek(3)
+    assert viewer.ply == 3
+    viewer.seek(10)
+    assert viewer.ply == 4
+    viewer.seek(-2)
+    assert viewer.ply == 0
+    viewer.scrub(350)
+    assert viewer.ply == 2
+    viewer.draw()
+
+
+def test_malformed_records_show_a_message(viewer):
+    viewer.load_game(1)
+    assert viewer.game is None and 'invalid move 1 at ply 7' in viewer.error
+    viewer.seek(3)
+    assert viewer.ply == 0
+    viewer.draw()
+    viewer.load_game(2)
+    assert viewer.game.moves == [0, 1] and viewer.error is None
+
+
+def test_loading_is_clamped_to_the_file(viewer):
+    viewer.load_game(10)
+    assert viewer.game_number == 2
+    viewer.load_game(-1)
+    assert viewer.game_number == 0
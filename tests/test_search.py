@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from boards import Connect4Board, WindowBoard
+from LongTearm import LongTermAgent
+
+
+def play_against_random(agent, seed, fresh_agent):
+    # Plays agent against random moves; yields the kept-state and fresh move of every agent turn
+    rng = random.Random(seed)
+    board = Connect4Board()
+    player = 'R'
+    while not (board.check_winner('R') or board.check_winner('Y') or board.is_full()):
+        if player == agent.player:
+            fresh = fresh_agent().make_move(board.copy())
+            kept = agent.make_move(board.copy())
+            yield kept, fresh
+            board.make_move(kept, player)
+        else:
+            board.make_move(rng.choice(board.get_valid_moves()), player)
+        player = 'Y' if player == 'R' else 'R'
+
+
+@pytest.mark.parametrize('heuristic', [False, True])
+@pytest.mark.parametrize('player', ['R', 'Y'])
+@pytest.mark.parametrize('seed', range(10))
+def test_kept_state_plays_the_fresh_move(player, seed, heuristic):
+    # Entries left by earlier moves may be deeper than needed, but must not change the move chosen
+    agent = LongTermAgent(player, depth=5, heuristic=heuristic)
+    fresh_agent = lambda: LongTermAgent(player, depth=5, keep_state=False, heuristic=heuristic)
+    for kept, fresh in play_against_random(agent, seed, fresh_agent):
+        assert kept == fresh
+
+
+
+def test_pondering_searches_the_heuristic_board(monkeypatch):
+    # The heuristic agent searches a WindowBoard, where the heuristic is a lookup
+    agent = LongTermAgent('R', depth=2, keep_state=False, heuristic=True)
+    searched = []
+    monkeypatch.setattr(agent, 'cached_search', lambda board, depth: searched.append(type(board)) or (0, 3))
+    board = Connect4Board()
+    board.make_move(3, 'R')
+    agent.ponder(board)
+    assert searched == [WindowBoard] * 7
+    assert len(agent.ponder_results) == 7
+
+
+def test_ponder_hits_are_played_before_proving():
+    agent = LongTermAgent('Y', depth=2, keep_state=False, proof_nodes=1000)
+    board = Connect4Board()
+    board.make_move(3, 'R')
+    agent.ponder_results[board.key()] = 5
+    assert agent.make_move(board) == 5
+    assert agent.ponder_hits == 1 and agent.prover.nodes == 0
+
+
+def random_positions(count, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Connect4Board()
+        player = 'R'
+        for _ in range(rng.randint(0, 16)):
+            board.make_move(rng.choice(board.get_valid_moves()), player)
+            player = 'Y' if player == 'R' else 'R'
+            if board.check_winner('R') or board.check_winner('Y'):
+                break
+        else:
+            positions.append((board, player))
+    return positions
+
+
+@pytest.mark.parametrize('heuristic', [False, True])
+def test_pvs_plays_the_plain_minimax_move(heuristic):
+    # plain_minimax is the original alpha-beta, which keeps the lowest column among equal scores
+    for board, player in random_positions(40):
+        plain = LongTermAgent(player, depth=4, keep_state=False, heuristic=heuristic)
+        _, expected = plain.plain_minimax(board, 4, True, float('-inf'), float('inf'))
+        for search in ('pvs', 'minimax'):
+            agent = LongTermAgent(player, depth=4, keep_state=False, heuristic=heuristic, search=search)
+            assert agent.make_move(board) == expected
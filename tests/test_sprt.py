@@ -0,0 +1,74 @@
+import importlib
+import math
+import random
+
+import pytest
+
+from boards import Connect4Board
+
+sprt = importlib.import_module('try')  # try is a keyword
+UPPER = math.log(0.95 / 0.05)
+
+
+@pytest.mark.parametrize('result, expected', [
+    ((2, 0, 0), 4), ((1, 1, 0), 3), ((1, 0, 1), 2), ((0, 2, 0), 2), ((0, 1, 1), 1), ((0, 0, 2), 0),
+])
+def test_pairs_are_binned_by_pair_score(result, expected):
+    assert sprt.pair_bin(*result) == expected
+
+
+def test_no_pairs_give_no_evidence():
+    assert sprt.sprt_llr([0] * 5, 0, 50) == 0.0
+
+
+def test_sweeps_decide_for_the_candidate():
+    llrs = [sprt.sprt_llr([0, 0, 0, 0, n], 0, 50) for n in (1, 2, 4, 8)]
+    assert all(0 < low < high for low, high in zip(llrs, llrs[1:]))
+    assert llrs[-1] > UPPER
+    assert sprt.sprt_llr([8, 0, 0, 0, 0], 0, 50) < -UPPER
+
+
+def test_all_draws_are_finite_evidence_against_h1():
+    llr = sprt.sprt_llr([0, 0, 10, 0, 0], 0, 50)
+    assert math.isfinite(llr) and llr < 0
+
+
+def test_llr_matches_the_pentanomial_formula():
+    pairs = [3, 5, 20, 9, 4]
+    counts = [count + 0.2 for count in pairs]
+    total = sum(counts)
+    mean = sum(count * i / 4 for i, count in enumerate(counts)) / total
+    variance = sum(count * (i / 4 - mean) ** 2 for i, count in enumerate(counts)) / total
+    score0, score1 = sprt.elo_score(0), sprt.elo_score(50)
+    expected = (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance / total)
+    assert sprt.sprt_llr(pairs, 0, 50) == pytest.approx(expected)
+
+
+def test_wider_spread_is_weaker_evidence():
+    # Five sweeps each way score the same as ten drawn pairs, but spread wider
+    draws = sprt.sprt_llr([0, 0, 10, 0, 0], 0, 50)
+    sweeps = sprt.sprt_llr([5, 0, 0, 0, 5], 0, 50)
+    assert draws < sweeps < 0
+
+
+@pytest.mark.parametrize('plies, count', [(1, 7), (2, 49), (4, 1120)])
+def test_opening_book_holds_every_position_once(plies, count):
+    book = sprt.opening_book(plies, random.Random(0))
+    assert len(book) == count
+    keys = set()
+    for moves in book:
+        board = Connect4Board()
+        for ply, col in enumerate(moves):
+            assert board.make_move(col, 'R' if ply % 2 == 0 else 'Y')
+        keys.add(board.key())
+    assert len(keys) == count
+    assert book == sprt.opening_book(plies, random.Random(0))
+    assert book != sprt.opening_book(plies, random.Random(1))
+
+
+def test_pairs_repeat_with_the_same_seed():
+    global_state = random.getstate()
+    results = [sprt.play_pair('random', 'random', [3, 3], seed) for seed in (5, 5, 6)]
+    assert results[0] == results[1]
+    assert all(sum(result) == 2 for result in results)
+    assert random.getstate() == global_state  # The agents drew from their own generator
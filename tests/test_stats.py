@@ -0,0 +1,37 @@
+import pytest
+
+from stats import GameStats, aggregate
+
+
+def test_malformed_records_are_skipped_and_counted():
+    stats = GameStats()
+    stats.update([b'4453 R\n', b'8 R\n', b'4406 Y\n', b'1234567' * 7 + b' D\n', b'1111111 R\n',
+                  b'44 X\n', b'44 R extra\n', b'\n', b'4 Y\n', b'12'])
+    assert stats.games == 3
+    assert stats.skipped == 6
+    assert stats.first_move[:, 3].sum() == 1  # '12' has no result and counts as unfinished
+    assert stats.cells.sum() == 4 + 1 + 2
+
+
+def test_skipped_records_survive_merge_and_save(tmp_path):
+    stats = GameStats()
+    stats.update([b'4453 R\n', b'0 Y\n'])
+    stats.merge(GameStats().merge(stats))
+    assert stats.skipped == 2
+    path = str(tmp_path / 'stats.npz')
+    stats.save(path, {})
+    loaded, _ = GameStats.load(path)
+    assert loaded.skipped == 2 and loaded.games == 2
+
+
+def test_saved_opening_length_must_match(tmp_path):
+    games = tmp_path / 'games.txt'
+    games.write_text('4453 R\n4444 Y\n')
+    state = str(tmp_path / 'stats.npz')
+    assert aggregate([str(games)], state, workers=1).opening_plies == 3
+    with open(games, 'a') as file:
+        file.write('3 D\n')
+    with pytest.raises(ValueError):
+        aggregate([str(games)], state, workers=1, opening_plies=4)
+    assert aggregate([str(games)], state, workers=1, opening_plies=3).games == 3
+    assert aggregate([str(games)], state, workers=1).games == 3
@@ -0,0 +1,109 @@
+import importlib
+
+import pytest
+
+from tablebase import DRAW, LOSS, WIN, Tablebase, TablebaseAgent, VariantBoard, check_size, generate, match
+
+
+def brute_force(board, player, values):
+    # Value for player, to move, of every position below board, by plain negamax
+    index, _ = board.variant.index_of(board.moves)
+    if index in values:
+        return values[index]
+    other = 'Y' if player == 'R' else 'R'
+    if board.check_winner(other):
+        value = LOSS
+    elif board.is_full():
+        value = DRAW
+    else:
+        value = LOSS
+        for col in board.get_valid_moves():
+            board.make_move(col, player)
+            value = max(value, WIN + LOSS - brute_force(board, other, values))
+            board.undo_move()
+    values[index] = value
+    return value
+
+
+def solve(tmp_path, rows, cols):
+    path = str(tmp_path / f'c4_{rows}x{cols}.tb')
+    generate(rows, cols, path, workers=2)
+    return path
+
+
+def check_against_brute_force(path, rows, cols):
+    values = {}
+    brute_force(VariantBoard(rows, cols), 'R', values)
+    table = Tablebase(path)
+    mismatches = sum(table.value(index) != value for index, value in values.items())
+    table.close()
+    return len(values), mismatches
+
+
+@pytest.mark.parametrize('rows, cols', [(3, 4), (4, 3)])
+def test_small_tables_match_brute_force(tmp_path, rows, cols):
+    path = solve(tmp_path, rows, cols)
+    positions, mismatches = check_against_brute_force(path, rows, cols)
+    assert positions > 1000 and mismatches == 0
+
+
+@pytest.mark.slow
+def test_4x4_matches_brute_force(tmp_path):
+    path = solve(tmp_path, 4, 4)
+    assert check_against_brute_force(path, 4, 4) == (161029, 0)
+
+
+def test_agent_plays_only_best_moves(tmp_path):
+    path = solve(tmp_path, 3, 4)
+    values = {}
+    brute_force(VariantBoard(3, 4), 'R', values)
+    variant = VariantBoard(3, 4).variant
+    agents = {player: TablebaseAgent(player, path) for player in ('R', 'Y')}
+    seen = set()
+
+    def visit(board, player):
+        other = 'Y' if player == 'R' else 'R'
+        index, _ = variant.index_of(board.moves)
+        if index in seen or board.check_winner(other) or board.is_full():
+            return
+        seen.add(index)
+        col = agents[player].make_move(board)
+        best = max(WIN + LOSS - values[variant.index_of(board.moves + [move])[0]]
+                   for move in board.get_valid_moves())
+        assert WIN + LOSS - values[variant.index_of(board.moves + [col])[0]] == best
+        for move in board.get_valid_moves():
+            board.make_move(move, player)
+            visit(board, other)
+            board.undo_move()
+
+    visit(VariantBoard(3, 4), 'R')
+    assert len(seen) > 1000
+
+
+def test_agent_is_wired_into_try(tmp_path):
+    path = solve(tmp_path, 3, 4)
+    sprt = importlib.import_module('try')
+    assert isinstance(sprt.make_agent(f'tablebase:{path}', 'R'), TablebaseAgent)
+    counts = match(path, 'random', games=20)
+    assert counts['losses'] == 0 and sum(counts.values()) == 20
+
+
+def test_variant_board_undo():
+    board = VariantBoard(4, 5)
+    for col, player in ((0, 'R'), (0, 'Y'), (1, 'R')):
+        assert board.make_move(col, player)
+    assert board.grid[-1] == ['R', 'R', ' ', ' ', ' '] and board.grid[-2][0] == 'Y'
+    board.undo_move()
+    assert board.moves == [0, 0] and board.bits['R'] == 1
+    for _ in range(2):
+        board.make_move(0, 'R')
+    assert not board.is_valid_move(0) and not board.make_move(0, 'Y')
+
+
+def test_tables_too_large_for_memory_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        check_size(6, 5, limit=4 * 2 ** 30)
+    check_size(4, 5, limit=4 * 2 ** 30)
+    with pytest.raises(ValueError):
+        generate(4, 5, str(tmp_path / 'c4_4x5.tb'), max_table_bytes=2 ** 20)
+    assert not list(tmp_path.iterdir())
@@ -1,70 +1,19 @@
 import pygame
 import sys
+import math
+import multiprocessing
 import random
 import time
 
+from boards import Connect4Board, GRID_ROWS, GRID_COLS
+from records import GameWriter
+
 # Constants for the GUI
 SCREEN_WIDTH = 700
 SCREEN_HEIGHT = 600
 CELL_SIZE = 100
-GRID_ROWS = 6
-GRID_COLS = 7
 DISC_RADIUS = CELL_SIZE // 2 - 5
 
-class Connect4Board:
-    def __init__(self):
-        self.grid = [[' ' for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
-
-    def display_board(self):
-        for row in self.grid:
-            print('|'.join(row))
-            print('-' * (GRID_COLS * 2 - 1))
-
-    def is_valid_move(self, col):
-        return 0 <= col < GRID_COLS and self.grid[0][col] == ' '
-
-    def get_valid_moves(self):
-        return [col for col in range(GRID_COLS) if self.is_valid_move(col)]
-
-    def make_move(self, col, player):
-        for row in range(GRID_ROWS - 1, -1, -1):
-            if self.grid[row][col] == ' ':
-                self.grid[row][col] = player
-                return True
-        return False  # Column is full
-
-    def check_winner(self, player):
-        # Check horizontally, vertically, and diagonally (similar to previous code)
-        # Check horizontally
-        for row in range(GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row][col + i] == player for i in range(4)):
-                    return True
-
-        # Check vertically
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS):
-                if all(self.grid[row + i][col] == player for i in range(4)):
-                    return True
-
-        # Check diagonally (down-right)
-        for row in range(GRID_ROWS - 3):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row + i][col + i] == player for i in range(4)):
-                    return True
-
-        # Check diagonally (up-right)
-        for row in range(3, GRID_ROWS):
-            for col in range(GRID_COLS - 3):
-                if all(self.grid[row - i][col + i] == player for i in range(4)):
-                    return True
-
-        return False
-
-
-    def is_full(self):
-        return all(self.grid[0][col] != ' ' for col in range(GRID_COLS))
-
 class RandomAgent:
     def select_move(self, valid_moves):
         return random.choice(valid_moves)
@@ -126,11 +75,12 @@ class Connect4Game:
             pygame.draw.line(self.screen, (0, 0, 0), (col * CELL_SIZE, 0), (col * CELL_SIZE, SCREEN_HEIGHT), 2)
 
         # Draw discs on the board
+        grid = self.board.grid
         for row in range(GRID_ROWS):
             for col in range(GRID_COLS):
-                if self.board.grid[row][col] == 'R':
+                if grid[row][col] == 'R':
                     color = (255, 0, 0)  # Red for player 'R'
-                elif self.board.grid[row][col] == 'Y':
+                elif grid[row][col] == 'Y':
                     color = (255, 255, 0)  # Yellow for player 'Y'
                 else:
                     continue  # Skip empty cells
@@ -153,15 +103,19 @@ class Connect4Game:
 
         pygame.display.flip()
 
-    def run_ai_vs_ai(self, num_games):
+    def run_ai_vs_ai(self, num_games, record_path=None):
         red_wins = 0
         yellow_wins = 0
         draws = 0
+        # Optionally append every game to a record file for replay.py
+        writer = GameWriter(record_path) if record_path else None
 
         for _ in range(num_games):
             self.reset_game()
             while not self.game_over:
                 self.update()
+            if writer is not None:
+                writer.write(self.board.moves, self.winner)
 
             if self.winner == 'R':
                 red_wins += 1
@@ -170,6 +124,9 @@ class Connect4Game:
             elif self.winner == 'Draw':
                 draws += 1
 
+        if writer is not None:
+            writer.close()
+
         print(f"Red Wins: {red_wins}")
         print(f"Yellow Wins: {yellow_wins}")
         print(f"Draws: {draws}")
@@ -180,7 +137,205 @@ class Connect4Game:
         self.game_over = False
         self.winner = None
 
+
+# Proof-number search budget per move of 'longterm:DEPTH:proof'
+PROOF_NODES = 2000
+
+
+def make_agent(spec, player, rng=None):
+    # 'random', 'longterm:DEPTH', 'longterm:DEPTH:WEIGHTS.npy' for the n-tuple evaluator
+    # or 'longterm:DEPTH:windows' for the window-count heuristic, 'longterm:DEPTH:proof' to try a
+    # proof-number search first; 'expectimax:DEPTH' plays for the most wins against the random agents;
+    # 'tablebase:PATH' plays a solved small variant perfectly, on a tablebase.VariantBoard.
+    # rng is the random.Random of agents that choose at random, the shared generator by default.
+    name, _, options = spec.partition(':')
+    if name == 'random':
+        import RandomAgents
+        return RandomAgents.RandomAgent(player, rng or random)
+    if name == 'longterm':
+        from LongTearm import LongTermAgent
+        depth, _, weights = options.partition(':')
+        if weights == 'windows':
+            return LongTermAgent(player, depth=int(depth or 3), heuristic=True)
+        if weights == 'proof':
+            return LongTermAgent(player, depth=int(depth or 3), proof_nodes=PROOF_NODES)
+        evaluator = None
+        if weights:
+            from ntuple import NTupleEvaluator
+            evaluator = NTupleEvaluator.load(weights)
+        return LongTermAgent(player, depth=int(depth or 3), evaluator=evaluator)
+    if name == 'expectimax':
+        from exploit import ExpectimaxAgent
+        return ExpectimaxAgent(player, depth=int(options or 4))
+    if name == 'tablebase':
+        from tablebase import TablebaseAgent
+        return TablebaseAgent(player, options)
+    raise ValueError(f"unknown agent {spec!r}")
+
+
+def play_game(red, yellow, opening=(), board=None):
+    # Headless game from the given opening columns, returns 'R', 'Y' or None for a draw.
+    # board is an empty board to play on, a Connect4Board by default.
+    board = board if board is not None else Connect4Board()
+    agents = {'R': red, 'Y': yellow}
+    player = 'R'
+    for col in opening:
+        board.make_move(col, player)
+        player = 'Y' if player == 'R' else 'R'
+    while not board.is_full():
+        board.make_move(agents[player].make_move(board), player)
+        if board.check_winner(player):
+            return player
+        player = 'Y' if player == 'R' else 'R'
+    return None
+
+
+def opening_book(plies, rng):
+    # Every distinct position after plies moves that nobody has won yet, once each, as
+    # the columns played to it, in random order. Deterministic agents play the same
+    # pair from the same position, and a repeated pair is no new evidence for the test.
+    openings = {Connect4Board().key(): []}
+    player = 'R'
+    for _ in range(plies):
+        following = {}
+        for moves in openings.values():
+            board = Connect4Board()
+            for ply, col in enumerate(moves):
+                board.make_move(col, 'R' if ply % 2 == 0 else 'Y')
+            for col in board.get_valid_moves():
+                board.make_move(col, player)
+                if not board.check_winner(player):
+                    following.setdefault(board.key(), moves + [col])
+                board.undo_move()
+        openings = following
+        player = 'Y' if player == 'R' else 'R'
+    book = [openings[key] for key in sorted(openings)]
+    rng.shuffle(book)
+    return book
+
+
+def pair_bin(wins, draws, losses):
+    # Pentanomial bin of a game pair: the candidate's pair score in half points, 0 to 4
+    return 2 * wins + draws
+
+
+def play_pair(candidate, baseline, opening, seed):
+    # Both colours from the same opening, so the opening's bias cancels out.
+    # Returns (wins, draws, losses) of the candidate.
+    rng = random.Random(seed)
+    wins = draws = losses = 0
+    for colour in ('R', 'Y'):
+        other = 'Y' if colour == 'R' else 'R'
+        agents = {colour: make_agent(candidate, colour, rng), other: make_agent(baseline, other, rng)}
+        winner = play_game(agents['R'], agents['Y'], opening)
+        if winner is None:
+            draws += 1
+        elif winner == colour:
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses
+
+
+def play_pair_job(job):
+    return play_pair(*job)
+
+
+def elo_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def sprt_llr(pairs, elo0, elo1):
+    # Log-likelihood ratio of elo1 against elo0, using the normal approximation
+    # (GSPRT). pairs counts the game pairs by the candidate's pair score, 0 to 2
+    # in half points (pentanomial): the two games of a pair share an opening, so
+    # they are not independent and the spread is measured over pairs.
+    # One pseudo-pair spread evenly over the five scores keeps a sample where
+    # every pair ended the same (all sweeps, all draws) decidable.
+    if not sum(pairs):
+        return 0.0
+    counts = [count + 0.2 for count in pairs]
+    total = sum(counts)
+    scores = [i / 4 for i in range(5)]  # Pair score per game
+    mean = sum(count * score for count, score in zip(counts, scores)) / total
+    variance = sum(count * (score - mean) ** 2 for count, score in zip(counts, scores)) / total
+    score0, score1 = elo_score(elo0), elo_score(elo1)
+    return (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance / total)
+
+
+def run_sprt(candidate, baseline, elo0=0.0, elo1=50.0, alpha=0.05, beta=0.05, max_games=20000,
+             workers=None, opening_plies=6, seed=0):
+    # Plays game pairs in parallel until the LLR crosses a bound; returns 'H1', 'H0' or None.
+    # Every pair starts from a different position, so the test ends when they run out.
+    lower = math.log(beta / (1 - alpha))
+    upper = math.log((1 - beta) / alpha)
+    wins = draws = losses = 0
+    pairs = [0] * 5
+    llr = 0.0
+    decision = None
+    start = time.perf_counter()
+    print(f"SPRT {candidate} vs {baseline}: elo0 {elo0:g} elo1 {elo1:g} alpha {alpha:g} beta {beta:g}, "
+          f"bounds [{lower:.2f}, {upper:.2f}]")
+    book = opening_book(opening_plies, random.Random(seed))[:max_games // 2]
+    jobs = ((candidate, baseline, opening, seed + pair) for pair, opening in enumerate(book))
+    pool = multiprocessing.Pool(workers)
+    try:
+        for result in pool.imap_unordered(play_pair_job, jobs):
+            wins, draws, losses = wins + result[0], draws + result[1], losses + result[2]
+            pairs[pair_bin(*result)] += 1
+            llr = sprt_llr(pairs, elo0, elo1)
+            games = wins + draws + losses
+            if games % 100 == 0:
+                print(f"{games:>7} games  +{wins} ={draws} -{losses}  LLR {llr:6.2f}")
+            if llr >= upper:
+                decision = 'H1'
+                break
+            if llr <= lower:
+                decision = 'H0'
+                break
+    finally:
+        # Drop the games still in flight once the test is decided
+        pool.terminate()
+        pool.join()
+
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games if games else 0.5
+    elapsed = time.perf_counter() - start
+    print(f"{games} games  +{wins} ={draws} -{losses}  score {score:.1%}  LLR {llr:.2f}  {elapsed:.1f} s")
+    print(f"pairs by candidate score 0-2: {' '.join(str(count) for count in pairs)}")
+    if decision == 'H1':
+        print(f"H1 accepted: {candidate} is at least {elo1:g} Elo stronger")
+    elif decision == 'H0':
+        print(f"H0 accepted: {candidate} is not {elo1:g} Elo stronger (at most {elo0:g})")
+    else:
+        print(f"Inconclusive after {games} games ({len(book)} distinct openings of {opening_plies} plies)")
+    return decision
+
+
 # Run the game
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play random agents against each other")
+    parser.add_argument('--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('--record', metavar='PATH', help="append every game to this record file")
+    parser.add_argument('--sprt', nargs=2, metavar=('CANDIDATE', 'BASELINE'),
+                        help="sequential test of two agents (random, longterm:DEPTH[:WEIGHTS|:windows|:proof], "
+                             "expectimax:DEPTH) until decided")
+    parser.add_argument('--elo0', type=float, default=0.0, help="SPRT null hypothesis Elo difference")
+    parser.add_argument('--elo1', type=float, default=50.0, help="SPRT alternative hypothesis Elo difference")
+    parser.add_argument('--alpha', type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument('--beta', type=float, default=0.05, help="SPRT false negative rate")
+    parser.add_argument('--max-games', type=int, default=20000, help="give up on the SPRT after this many games")
+    parser.add_argument('--workers', type=int, default=None, help="game processes for the SPRT")
+    parser.add_argument('--opening-plies', type=int, default=6,
+                        help="plies of the opening position of each SPRT game pair, every position played once")
+    args = parser.parse_args()
+
+    if args.sprt:
+        run_sprt(*args.sprt, elo0=args.elo0, elo1=args.elo1, alpha=args.alpha, beta=args.beta,
+                 max_games=args.max_games, workers=args.workers, opening_plies=args.opening_plies)
+        sys.exit()
+
     game = Connect4Game()
-    game.run_ai_vs_ai(num_games=100)
+    game.run_ai_vs_ai(num_games=args.games, record_path=args.record)